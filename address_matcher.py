@@ -1,6 +1,12 @@
 import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple
+import numpy as np
 import pandas as pd
 from fuzzywuzzy import fuzz
+from fuzzywuzzy import utils as fuzz_utils
+from rapidfuzz import fuzz as rf_fuzz, process
 
 from address_utils import (
     strip_address_postfixes,
@@ -13,46 +19,696 @@ FUZZY_MATCH_THRESHOLD = 80
 STRONG_FULL_MATCH_THRESHOLD = 90
 LV0_COMPOSITE_BONUS = 20
 EXACT_WORD_MATCH_BONUS = 10
+NGRAM_SIZE = 2
+# Largest indel distance (as a fraction of the combined length) that can still
+# round up to FUZZY_MATCH_THRESHOLD in fuzz.ratio, with a little slack.
+MAX_EDIT_FRACTION = (100 - FUZZY_MATCH_THRESHOLD + 1) / 100
+LEVEL_COLUMNS = ['lv1', 'lv2', 'lv3', 'lv4']
+# rapidfuzz prefilters: candidates scoring below these cannot reach
+# FUZZY_MATCH_THRESHOLD in fuzzywuzzy (rapidfuzz's partial_ratio is an exact
+# maximum over alignments, so it never scores below fuzzywuzzy's heuristic by
+# more than rounding). Survivors are re-scored with fuzzywuzzy.
+FULL_MATCH_PREFILTER_CUTOFF = FUZZY_MATCH_THRESHOLD - 1
+COMPONENT_PREFILTER_CUTOFF = FUZZY_MATCH_THRESHOLD - 5
+# fuzzywuzzy's WRatio stays within this of rapidfuzz's (the prefilter's premise),
+# which bounds a component's contribution in top-k pruning
+COMPONENT_PREFILTER_SLACK = FUZZY_MATCH_THRESHOLD - COMPONENT_PREFILTER_CUTOFF
+BOUND_TOLERANCE = 1e-9 # Float summation order differs between bounds and scores
+MATCH_MANY_BLOCK_SIZE = 256
+MATCH_OUTCOMES = ('strong_full', 'composite', 'none')
+DEFAULT_CACHE_SIZE = 10_000 # Entries per matcher cache (lv0, normalization, match results)
+# N-gram keys are packed into one int64 (the code points, then the occurrence
+# number), so the postings are a sorted array searched in place
+CODEPOINT_BITS = 21
+OCCURRENCE_BITS = 16
 # --- End Configuration Constants ---
 
+def _ngram_keys(text: str, n: int = NGRAM_SIZE) -> list[int]:
+    """
+    Returns the character n-grams of text as int64 keys, each tagged with its
+    occurrence number so that shared keys count the multiset intersection of
+    n-grams. Occurrences past OCCURRENCE_BITS are left out.
+    """
+    seen = {}
+    keys = []
+    for i in range(len(text) - n + 1):
+        gram = text[i:i + n]
+        if gram in seen:
+            code, occurrence = seen[gram]
+        else:
+            code, occurrence = 0, 0
+            for char in gram:
+                code = (code << CODEPOINT_BITS) | ord(char)
+            code <<= OCCURRENCE_BITS
+        seen[gram] = code, occurrence + 1
+        if occurrence < 1 << OCCURRENCE_BITS:
+            keys.append(code | occurrence)
+    return keys
+
+def _as_slice(positions: np.ndarray) -> slice | np.ndarray:
+    """
+    Returns positions as a slice if they form a contiguous run.
+    """
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return positions
+
+def _score_upper_bound(similarity: np.ndarray) -> np.ndarray:
+    """
+    Turns a (float) upper bound of a 0-100 similarity into an upper bound of
+    the rounded integer score fuzzywuzzy reports.
+    """
+    return np.floor(similarity) + 1
+
+def _build_postings(keys_per_item) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Builds an inverted index (key -> sorted item positions) in CSR form:
+    the sorted int64 keys, offsets into positions (len(keys) + 1), and the
+    int32 positions.
+    """
+    keys = []
+    positions = []
+    for position, item_keys in enumerate(keys_per_item):
+        keys.extend(item_keys)
+        positions.extend([position] * len(item_keys))
+    keys = np.asarray(keys, dtype=np.int64)
+    positions = np.asarray(positions, dtype=np.int32)
+    order = np.lexsort((positions, keys))
+    unique_keys, starts = np.unique(keys[order], return_index=True)
+    return unique_keys, np.append(starts, len(keys)).astype(np.int64), positions[order]
+
+def _csr_slices(offsets: np.ndarray, values: np.ndarray, rows: np.ndarray) -> list[np.ndarray]:
+    """
+    Returns the values of the given CSR rows as views into values.
+    """
+    return [values[start:end] for start, end in zip(offsets[rows].tolist(), offsets[rows + 1].tolist())]
+
+class LRUCache:
+    """
+    Bounded in-memory LRU mapping with hit/miss counts (thread-safe). A
+    max_entries of 0 disables caching; lookups are still counted.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        Returns (found, value); value is None when not found.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drops all entries; hit/miss counts are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+class MatchCandidate(NamedTuple):
+    """
+    One ranked match from AddressMatcher.top_k. stage is 'full' (score is
+    fuzz.ratio of the full address) or 'composite' (score is the composite
+    score); breakdown holds the parts of the score.
+    """
+    full_address: str
+    score: float
+    stage: str
+    position: int
+    row: pd.Series
+    breakdown: dict
+
 class AddressMatcher:
-    def __init__(self, df_addr_optimized: pd.DataFrame):
+    def __init__(self, df_addr_optimized: pd.DataFrame, index: dict | None = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            df_addr_optimized (pd.DataFrame): Output of normalize_address_df.
+            index (dict | None, optional): Matcher indices from export_index
+                (e.g. memory-mapped by address_store), built from df_addr_optimized
+                when None.
+            cache_size (int, optional): Entries kept by each LRU cache (lv0
+                resolution, query normalization, match results); 0 disables
+                them. Defaults to DEFAULT_CACHE_SIZE.
+        """
         self.df_addr_optimized = df_addr_optimized
+        self._load_index(index if index is not None else self._build_index())
+        self.match_outcomes = dict.fromkeys(MATCH_OUTCOMES, 0)
+        self._outcome_lock = threading.Lock()
+        # Keyed by the query string; reload() clears them
+        self._lv0_cache = LRUCache(cache_size)
+        self._normalize_cache = LRUCache(cache_size)
+        self._match_cache = LRUCache(cache_size)
+
+    def reload(self, df_addr_optimized: pd.DataFrame, index: dict | None = None) -> None:
+        """
+        Switches to a new address table (and its index, built when None) and
+        invalidates the caches. Not safe to call while matches are running.
+        """
+        self.df_addr_optimized = df_addr_optimized
+        self._load_index(index if index is not None else self._build_index())
+        self.clear_caches()
+        logging.debug("Reloaded address table (%d rows), matcher caches cleared", self._n_rows)
+
+    def clear_caches(self) -> None:
+        for cache in (self._lv0_cache, self._normalize_cache, self._match_cache):
+            cache.clear()
+
+    def cache_stats(self) -> dict:
+        """
+        Returns the stats (hits, misses, hit_rate, entries, max_entries) of
+        the 'lv0', 'normalize' and 'match' caches.
+        """
+        return {
+            'lv0': self._lv0_cache.stats(),
+            'normalize': self._normalize_cache.stats(),
+            'match': self._match_cache.stats(),
+        }
+
+    def _identify_lv0(self, rag_address: str) -> str | None:
+        found, identified_lv0 = self._lv0_cache.get(rag_address)
+        if not found:
+            identified_lv0 = extract_lv0_from_rag_address(rag_address, self.df_addr_optimized, FUZZY_MATCH_THRESHOLD, self._unique_lv0s)
+            self._lv0_cache.put(rag_address, identified_lv0)
+        return identified_lv0
+
+    def _normalize(self, rag_address: str) -> str:
+        found, normalized = self._normalize_cache.get(rag_address)
+        if not found:
+            normalized = normalize_rag_address(rag_address)
+            self._normalize_cache.put(rag_address, normalized)
+        return normalized
+
+    def _build_index(self) -> dict:
+        """
+        Builds the candidate indices used by find_matching_address from the
+        columns precomputed by normalize_address_df: an occurrence-tagged n-gram
+        index over 'full_address' (Stage 1) and the distinct stripped lv1-lv4
+        components pre-processed for WRatio (Stage 2). Everything is returned
+        as flat arrays/lists so that it can be stored and memory-mapped.
+        """
+        df = self.df_addr_optimized
+        n_rows = len(df)
+        full_addresses = df['full_address'].tolist()
+        ngram_keys, ngram_offsets, ngram_positions = _build_postings(_ngram_keys(a) for a in full_addresses)
+
+        # Components are scored once per distinct stripped value; rows refer to
+        # them by code (-1 when the component is empty or too short to score).
+        stripped = pd.concat([df[f'{level_col}_stripped'].astype(object) for level_col in LEVEL_COLUMNS], ignore_index=True)
+        scorable = pd.concat([df[f'{level_col}_stripped_len'] > 1 for level_col in LEVEL_COLUMNS], ignore_index=True)
+        codes, components = pd.factorize(stripped.where(scorable))
+        components = components.tolist()
+        component_codes = codes.astype(np.int32).reshape(len(LEVEL_COLUMNS), n_rows)
+
+        # Stage 2 only needs to prefilter the components occurring in the lv0
+        # partition: their codes per partition, in _lv0_partitions order
+        partition_codes = []
+        for rows in df.groupby('lv0', observed=True, sort=False).indices.values():
+            partition = np.unique(component_codes[:, rows])
+            partition_codes.append(partition[partition >= 0])
+        partition_offsets = np.zeros(len(partition_codes) + 1, dtype=np.int64)
+        np.cumsum([len(partition) for partition in partition_codes], out=partition_offsets[1:])
+
+        return {
+            'full_lengths': np.fromiter((len(a) for a in full_addresses), dtype=np.int32, count=n_rows),
+            'ngram_keys': ngram_keys,
+            'ngram_offsets': ngram_offsets,
+            'ngram_positions': ngram_positions,
+            'component_codes': component_codes,
+            'partition_offsets': partition_offsets,
+            'partition_codes': np.concatenate(partition_codes + [np.zeros(0, dtype=np.int32)]).astype(np.int32),
+            'components': components,
+            'processed_components': [fuzz_utils.full_process(c, force_ascii=True) for c in components],
+        }
+
+    def _load_index(self, index: dict) -> None:
+        """
+        Sets up the matcher from an index built by _build_index. Arrays are
+        used in place (views into memory-mapped files stay zero-copy); the
+        lv0 partitions are derived from the table.
+        """
+        df = self.df_addr_optimized
+        self._index = index
+        self._n_rows = len(df)
+        self._lv0_values = df['lv0'].to_numpy(dtype=object)
+        self._unique_lv0s = list(df['lv0'].unique())
+        self._lv0_partitions = {
+            lv0: _as_slice(positions)
+            for lv0, positions in df.groupby('lv0', observed=True, sort=False).indices.items()
+        }
+        self._all_rows = slice(0, self._n_rows)
+
+        self._full_addresses = df['full_address'].tolist()
+        # np.asarray drops the np.memmap subclass (and its per-slice overhead), not the mapping
+        self._full_lengths = np.asarray(index['full_lengths'])
+        self._ngram_keys = np.asarray(index['ngram_keys'])
+        self._ngram_offsets = np.asarray(index['ngram_offsets'])
+        self._ngram_positions = np.asarray(index['ngram_positions'])
+
+        self._component_codes = list(np.asarray(index['component_codes']))
+        self._components = list(index['components'])
+        self._component_lengths = [len(c) for c in self._components]
+        self._processed_components = list(index['processed_components'])
+        partition_slices = _csr_slices(
+            np.asarray(index['partition_offsets']), np.asarray(index['partition_codes']),
+            np.arange(len(self._lv0_partitions))
+        )
+        self._partition_codes = dict(zip(self._lv0_partitions, partition_slices))
+        self._partition_components = {} # lv0 -> (codes, processed components), filled on first use
+
+    def export_index(self) -> dict:
+        """
+        Returns the matcher indices (see _build_index) for storing alongside the table.
+        """
+        return self._index
+
+    def _target_rows(self, identified_lv0: str | None) -> slice | np.ndarray:
+        """
+        Returns the rows of the identified lv0 partition (a slice when the
+        partition is contiguous), or all rows if no lv0 was identified.
+        """
+        if identified_lv0 and identified_lv0 in self._lv0_partitions:
+            return self._lv0_partitions[identified_lv0]
+        return self._all_rows # Fallback if filter results in no rows
+
+    def _row_positions(self, rows: slice | np.ndarray) -> np.ndarray:
+        if isinstance(rows, slice):
+            return np.arange(rows.start, rows.stop)
+        return rows
+
+    def _postings(self, text: str) -> list[np.ndarray]:
+        """
+        Returns the (sorted) row positions of each n-gram key of text found
+        in the index.
+        """
+        keys = np.asarray(_ngram_keys(text), dtype=np.int64)
+        if not len(keys) or not len(self._ngram_keys):
+            return []
+        slots = np.minimum(np.searchsorted(self._ngram_keys, keys), len(self._ngram_keys) - 1)
+        found = slots[self._ngram_keys[slots] == keys]
+        return _csr_slices(self._ngram_offsets, self._ngram_positions, found)
+
+    def _full_match_candidates(self, rag_address: str, rows: slice | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the positions of rows whose full_address could reach
+        FUZZY_MATCH_THRESHOLD in fuzz.ratio, using the length and q-gram count
+        filters: d indel edits destroy at most NGRAM_SIZE * d shared n-grams.
+        Also returns an upper bound of fuzz.ratio for each of them, from the
+        fewest indel edits those filters allow.
+        """
+        query_len = len(rag_address)
+        postings = self._postings(rag_address)
+        positions = self._row_positions(rows)
+
+        if not postings:
+            shared = np.zeros(len(positions), dtype=np.int64)
+        elif isinstance(rows, slice):
+            # Postings are sorted, so the partition's part of each is a sub-slice
+            shared = np.bincount(
+                np.concatenate([
+                    posting[np.searchsorted(posting, rows.start):np.searchsorted(posting, rows.stop)]
+                    for posting in postings
+                ]) - rows.start,
+                minlength=rows.stop - rows.start
+            )
+        else:
+            shared = np.bincount(np.concatenate(postings), minlength=self._n_rows)[rows]
+
+        full_lengths = self._full_lengths[rows]
+        total_lengths = query_len + full_lengths
+        max_edits = np.floor(total_lengths * MAX_EDIT_FRACTION)
+        length_edits = np.abs(full_lengths - query_len)
+        missing_ngrams = np.maximum(query_len, full_lengths) - NGRAM_SIZE + 1 - shared
+        mask = (length_edits <= max_edits) & (missing_ngrams <= NGRAM_SIZE * max_edits)
+
+        min_edits = np.maximum(length_edits[mask], np.ceil(missing_ngrams[mask] / NGRAM_SIZE))
+        similarity = (total_lengths[mask] - min_edits) / total_lengths[mask]
+        return positions[mask], _score_upper_bound(100 * similarity)
+
+    def _prefilter_components(self, identified_lv0: str | None) -> tuple[list[int] | range, list[str]]:
+        """
+        Returns the codes and processed strings of the components the Stage 2
+        prefilter has to score: those of the lv0 partition, or all of them.
+        """
+        if identified_lv0 in self._partition_codes:
+            partition = self._partition_components.get(identified_lv0)
+            if partition is None:
+                codes = self._partition_codes[identified_lv0].tolist()
+                partition = (codes, [self._processed_components[code] for code in codes])
+                self._partition_components[identified_lv0] = partition
+            return partition
+        return range(len(self._processed_components)), self._processed_components
+
+    def _component_candidates(self, normalized_rag_addr: str, identified_lv0: str | None) -> dict[int, float]:
+        """
+        Returns {component code: rapidfuzz WRatio} for the components passing
+        the rapidfuzz WRatio prefilter, among those of the lv0 partition (all
+        components if no lv0 was identified).
+        """
+        processed_query = fuzz_utils.full_process(normalized_rag_addr, force_ascii=True)
+        codes, processed_components = self._prefilter_components(identified_lv0)
+        candidates = process.extract(
+            processed_query, processed_components,
+            scorer=rf_fuzz.WRatio,
+            processor=None,
+            score_cutoff=COMPONENT_PREFILTER_CUTOFF,
+            limit=None
+        )
+        return {codes[i]: score for _, score, i in candidates}
+
+    def _top_full_matches(self, rag_address: str, candidate_positions: np.ndarray, upper_bounds: np.ndarray, k: int) -> list[tuple[int, int]]:
+        """
+        Stage 1: the k best (fuzz.ratio, position) among the candidate rows,
+        best first (ties: first row first). Rows are scored in decreasing order
+        of their upper bound, so scoring stops once no remaining row can enter
+        the top k. Unless some row reaches STRONG_FULL_MATCH_THRESHOLD, Stage 1
+        results are not used, so rows that cannot reach it are only scored
+        after a strong match was found.
+        """
+        top = []
+        order = np.lexsort((candidate_positions, -upper_bounds))
+        for upper_bound, position in zip(upper_bounds[order].tolist(), candidate_positions[order].tolist()):
+            cutoff = FUZZY_MATCH_THRESHOLD if top and top[0][0] >= STRONG_FULL_MATCH_THRESHOLD else STRONG_FULL_MATCH_THRESHOLD
+            if upper_bound < cutoff or (len(top) >= k and upper_bound < top[k - 1][0]):
+                break
+            score = fuzz.ratio(rag_address, self._full_addresses[position])
+            if score >= FUZZY_MATCH_THRESHOLD:
+                top.append((score, position))
+                top.sort(key=lambda item: (-item[0], item[1]))
+                del top[k:]
+        return top
+
+    def _top_composite_matches(self, rag_address: str, identified_lv0: str | None, rows: slice | np.ndarray, k: int, component_candidates: dict[int, float] | None = None, normalized_rag_addr: str | None = None) -> list[tuple[float, int, dict]]:
+        """
+        Stage 2: the k best (composite score, position, breakdown) over the
+        target rows, best first (ties: first row first).
+
+        Each candidate component's contribution is bounded by its rapidfuzz
+        prefilter score (plus the prefilter slack), weighted by its length, plus
+        the exact-match bonus if it occurs in the address. Rows are scored in
+        decreasing order of their bound (lv0 bonus + bounds of their
+        components), and fuzz.WRatio is only computed for the components of
+        rows actually scored, until no remaining row can enter the top k.
+        """
+        normalized_rag_addr_for_partial = normalized_rag_addr if normalized_rag_addr is not None else self._normalize(rag_address)
+        query_len = len(normalized_rag_addr_for_partial)
+        if component_candidates is None:
+            component_candidates = self._component_candidates(normalized_rag_addr_for_partial, identified_lv0)
+        positions = self._row_positions(rows)
+        lv0_bonus = LV0_COMPOSITE_BONUS if identified_lv0 else 0
+
+        top = []
+        if component_candidates and query_len:
+            # Index -1 (no component) reads the trailing 0
+            component_bounds = np.zeros(len(self._components) + 1)
+            for code, prefilter_score in component_candidates.items():
+                normalized_component = self._components[code]
+                component_bounds[code] = min(100, prefilter_score + COMPONENT_PREFILTER_SLACK) * (len(normalized_component) / query_len)
+                if normalized_component in normalized_rag_addr_for_partial:
+                    component_bounds[code] += EXACT_WORD_MATCH_BONUS
+            row_bounds = sum(component_bounds[codes[rows]] for codes in self._component_codes)
+            candidate_mask = row_bounds > 0
+            candidate_positions = positions[candidate_mask]
+            upper_bounds = row_bounds[candidate_mask]
+            if identified_lv0:
+                upper_bounds = upper_bounds + np.where(self._lv0_values[candidate_positions] == identified_lv0, LV0_COMPOSITE_BONUS, 0)
+
+            matches = {} # component code -> (WRatio score, exact substring), or None below threshold
+            order = np.lexsort((candidate_positions, -upper_bounds))
+            for upper_bound, position in zip(upper_bounds[order].tolist(), candidate_positions[order].tolist()):
+                if len(top) >= k and upper_bound < top[k - 1][0] - BOUND_TOLERANCE:
+                    break
+                composite_score = 0
+                breakdown = {'lv0_bonus': 0, 'components': {}}
+
+                # Score for lv0 match (already used for filtering, but can contribute to composite score)
+                if identified_lv0 and self._lv0_values[position] == identified_lv0:
+                    composite_score += LV0_COMPOSITE_BONUS
+                    breakdown['lv0_bonus'] = LV0_COMPOSITE_BONUS
+
+                for level_col, codes in zip(LEVEL_COLUMNS, self._component_codes):
+                    code = int(codes[position])
+                    if code not in component_candidates:
+                        continue
+                    if code not in matches:
+                        normalized_component = self._components[code]
+                        component_score = fuzz.WRatio(normalized_component, normalized_rag_addr_for_partial)
+                        matches[code] = (component_score, normalized_component in normalized_rag_addr_for_partial) if component_score >= FUZZY_MATCH_THRESHOLD else None
+                    if matches[code] is None:
+                        continue
+                    component_score, is_exact = matches[code]
+                    # Add score, weighted by length to prioritize more specific matches
+                    weighted_score = component_score * (self._component_lengths[code] / query_len)
+                    composite_score += weighted_score
+                    # Add a bonus for exact word matches (using a simpler check for now)
+                    exact_bonus = EXACT_WORD_MATCH_BONUS if is_exact else 0
+                    if is_exact:
+                        composite_score += EXACT_WORD_MATCH_BONUS
+                    breakdown['components'][level_col] = {
+                        'component': self._components[code], 'score': component_score,
+                        'weighted_score': weighted_score, 'exact_bonus': exact_bonus
+                    }
+
+                # Rows without a matching component are ranked with the lv0-only rows below
+                if breakdown['components']:
+                    top.append((composite_score, position, breakdown))
+                    top.sort(key=lambda item: (-item[0], item[1]))
+                    del top[k:]
+
+        # Rows without any matching component tie on the lv0 bonus; the first
+        # ones win, as in an exhaustive scan.
+        if len(top) < k and lv0_bonus:
+            taken = {position for _, position, _ in top}
+            for position in positions.tolist():
+                if len(top) >= k:
+                    break
+                if position not in taken and self._lv0_values[position] == identified_lv0:
+                    top.append((LV0_COMPOSITE_BONUS, position, {'lv0_bonus': LV0_COMPOSITE_BONUS, 'components': {}}))
+
+        return top
+
+    def _top_k(self, rag_address: str, identified_lv0: str | None, rows: slice | np.ndarray, full_candidates: np.ndarray, full_bounds: np.ndarray, k: int, component_candidates: dict[int, float] | None = None, normalized_rag_addr: str | None = None) -> list[MatchCandidate]:
+        full_matches = self._top_full_matches(rag_address, full_candidates, full_bounds, k)
+
+        # If a strong full match is found, rank the full matches
+        if full_matches and full_matches[0][0] >= STRONG_FULL_MATCH_THRESHOLD:
+            return [
+                MatchCandidate(self._full_addresses[position], score, 'full', position, self.df_addr_optimized.iloc[position], {'full_ratio': score})
+                for score, position in full_matches
+            ]
+
+        return [
+            MatchCandidate(self._full_addresses[position], score, 'composite', position, self.df_addr_optimized.iloc[position], breakdown)
+            for score, position, breakdown in self._top_composite_matches(rag_address, identified_lv0, rows, k, component_candidates, normalized_rag_addr)
+        ]
+
+    def _record_outcome(self, outcome: str) -> None:
+        with self._outcome_lock:
+            self.match_outcomes[outcome] += 1
+
+    def match_stats(self) -> dict:
+        """
+        Returns how many matches ended as a strong full match, a composite
+        match or no match.
+        """
+        with self._outcome_lock:
+            return dict(self.match_outcomes)
+
+    def _match(self, rag_address: str, identified_lv0: str | None, rows: slice | np.ndarray, full_candidates: np.ndarray, full_bounds: np.ndarray, component_candidates: dict[int, float] | None = None, normalized_rag_addr: str | None = None) -> tuple[str | None, float, pd.Series | None]:
+        top = self._top_k(rag_address, identified_lv0, rows, full_candidates, full_bounds, 1, component_candidates, normalized_rag_addr)
+        if not top:
+            result, outcome = (None, 0, None), 'none'
+        else:
+            best = top[0]
+            if best.stage == 'full':
+                logging.debug("  Strong full match found: '%s' with score %s", best.full_address, best.score)
+                outcome = 'strong_full'
+            else:
+                logging.debug("  Best composite match found: '%s' with score %s", best.full_address, best.score)
+                outcome = 'composite'
+            result = (best.full_address, best.score, best.row)
+        self._match_cache.put(rag_address, (result, outcome))
+        self._record_outcome(outcome)
+        return result
+
+    def _cached_match(self, rag_address: str) -> tuple[bool, tuple[str | None, float, pd.Series | None] | None]:
+        """
+        Returns (found, result) from the match cache; a hit counts towards
+        match_stats like a computed match.
+        """
+        found, cached = self._match_cache.get(rag_address)
+        if not found:
+            return False, None
+        result, outcome = cached
+        self._record_outcome(outcome)
+        return True, result
 
     def find_matching_address(self, rag_address: str) -> tuple[str | None, float, pd.Series | None]:
-        logging.debug(f"Entering find_matching_address function with rag_address: '{rag_address}'")
+        logging.debug("Entering find_matching_address function with rag_address: '%s'", rag_address)
+        found, result = self._cached_match(rag_address)
+        if found:
+            return result
 
         # --- Hierarchical Search Logic ---
-        target_df = self.df_addr_optimized.copy()
-        identified_lv0 = extract_lv0_from_rag_address(rag_address, self.df_addr_optimized, FUZZY_MATCH_THRESHOLD)
+        identified_lv0 = self._identify_lv0(rag_address)
+        rows = self._target_rows(identified_lv0)
+        # --- End Hierarchical Search Logic ---
+
+        full_candidates, full_bounds = self._full_match_candidates(rag_address, rows)
+        return self._match(rag_address, identified_lv0, rows, full_candidates, full_bounds)
+
+    def top_k(self, rag_address: str, k: int = 5) -> list[MatchCandidate]:
+        """
+        Ranks the k best matching rows for review or disambiguation. Follows
+        find_matching_address: if a full match reaches
+        STRONG_FULL_MATCH_THRESHOLD, the best full matches (fuzz.ratio) are
+        ranked, otherwise the best composite matches. top_k(a, 1)[0] is the
+        row find_matching_address(a) returns.
+
+        Args:
+            rag_address (str): Normalized extracted address.
+            k (int, optional): Number of candidates. Defaults to 5.
+
+        Returns:
+            list[MatchCandidate]: Up to k candidates, best first, each with its
+            score breakdown ('full_ratio', or 'lv0_bonus' and the per-level
+            'components').
+        """
+        identified_lv0 = self._identify_lv0(rag_address)
+        rows = self._target_rows(identified_lv0)
+        full_candidates, full_bounds = self._full_match_candidates(rag_address, rows)
+        return self._top_k(rag_address, identified_lv0, rows, full_candidates, full_bounds, k)
+
+    def match_many(self, rag_addresses: list[str]) -> list[tuple[str | None, float, pd.Series | None]]:
+        """
+        Batch version of find_matching_address.
+
+        Distinct addresses are matched once, and addresses found in the match
+        cache not at all. Each block of addresses is scored
+        against every full_address (Stage 1) with one rapidfuzz cdist call, and
+        the addresses of each lv0 against that partition's distinct components
+        (Stage 2) with one more (C-backed, multi-threaded); only the cells above
+        the prefilter cutoffs are re-scored with fuzzywuzzy, so results equal
+        find_matching_address.
+
+        Args:
+            rag_addresses (list[str]): Normalized extracted addresses.
+
+        Returns:
+            list[tuple]: One (best_match, score, matched_row) per input address.
+        """
+        results = {}
+        unique_addresses = []
+        for rag_address in dict.fromkeys(rag_addresses):
+            found, result = self._cached_match(rag_address)
+            if found:
+                results[rag_address] = result
+            else:
+                unique_addresses.append(rag_address)
 
+        for block_start in range(0, len(unique_addresses), MATCH_MANY_BLOCK_SIZE):
+            block = unique_addresses[block_start:block_start + MATCH_MANY_BLOCK_SIZE]
+            full_scores = process.cdist(
+                block, self._full_addresses,
+                scorer=rf_fuzz.ratio,
+                score_cutoff=FULL_MATCH_PREFILTER_CUTOFF,
+                dtype=np.float32,
+                workers=-1
+            )
+            identified_lv0s = [self._identify_lv0(rag_address) for rag_address in block]
+            normalized_addrs = [self._normalize(rag_address) for rag_address in block]
+
+            component_candidates = {}
+            by_lv0 = {}
+            for i, identified_lv0 in enumerate(identified_lv0s):
+                by_lv0.setdefault(identified_lv0, []).append(i)
+            for identified_lv0, block_ids in by_lv0.items():
+                codes, processed_components = self._prefilter_components(identified_lv0)
+                component_scores = process.cdist(
+                    [fuzz_utils.full_process(normalized_addrs[i], force_ascii=True) for i in block_ids],
+                    processed_components,
+                    scorer=rf_fuzz.WRatio,
+                    processor=None,
+                    score_cutoff=COMPONENT_PREFILTER_CUTOFF,
+                    dtype=np.float32,
+                    workers=-1
+                )
+                for i, row_component_scores in zip(block_ids, component_scores):
+                    hits = np.flatnonzero(row_component_scores >= COMPONENT_PREFILTER_CUTOFF).tolist()
+                    component_candidates[i] = {codes[hit]: float(row_component_scores[hit]) for hit in hits}
+
+            for i, (rag_address, identified_lv0, normalized_addr, row_full_scores) in enumerate(zip(block, identified_lv0s, normalized_addrs, full_scores)):
+                rows = self._target_rows(identified_lv0)
+                positions = self._row_positions(rows)
+                target_full_scores = row_full_scores[rows]
+                full_mask = target_full_scores >= FULL_MATCH_PREFILTER_CUTOFF
+                results[rag_address] = self._match(
+                    rag_address, identified_lv0, rows,
+                    positions[full_mask], _score_upper_bound(target_full_scores[full_mask]), component_candidates[i], normalized_addr
+                )
+
+        return [results[rag_address] for rag_address in rag_addresses]
+
+    def _find_matching_address_exhaustive(self, rag_address: str) -> tuple[str | None, float, pd.Series | None]:
+        """
+        Reference implementation scanning every row of the lv0 partition.
+        find_matching_address must return the same result; kept for verifying
+        the index-backed path.
+        """
+        target_df = self.df_addr_optimized
+        identified_lv0 = extract_lv0_from_rag_address(rag_address, self.df_addr_optimized, FUZZY_MATCH_THRESHOLD, self._unique_lv0s)
         if identified_lv0:
-            target_df = self.df_addr_optimized[self.df_addr_optimized['lv0'] == identified_lv0].copy()
+            target_df = self.df_addr_optimized[self.df_addr_optimized['lv0'] == identified_lv0]
             if target_df.empty:
-                target_df = self.df_addr_optimized.copy() # Fallback if filter results in empty DF
-        # --- End Hierarchical Search Logic ---
+                target_df = self.df_addr_optimized
 
         best_match = None
         best_score = 0
         matched_row = None
 
-        # Stage 1: Initial Full Fuzzy Match Attempt
         for index, row in target_df.iterrows():
-            current_full_address = row['full_address']
-            score = fuzz.ratio(rag_address, current_full_address)
+            score = fuzz.ratio(rag_address, row['full_address'])
             if score > best_score and score >= FUZZY_MATCH_THRESHOLD:
                 best_score = score
-                best_match = current_full_address
+                best_match = row['full_address']
                 matched_row = row
-        
-        # If a strong full match is found, return it immediately
+
         if best_score >= STRONG_FULL_MATCH_THRESHOLD:
-            logging.debug(f"  Strong full match found: '{best_match}' with score {best_score}")
             return best_match, best_score, matched_row
 
-        # Stage 2: Component-wise Matching and Composite Scoring (if no strong full match)
-        # Reset best_score and related variables for composite scoring
-        best_score = 0 
+        best_score = 0
         best_match = None
         matched_row = None
 
@@ -60,40 +716,26 @@ class AddressMatcher:
 
         for index, row in target_df.iterrows():
             composite_score = 0
-            current_full_address = row['full_address'] # For logging/return if this becomes the best
-
-            # Score for lv0 match (already used for filtering, but can contribute to composite score)
-            # If lv0 was identified and matched, give it a base score
             if identified_lv0 and row['lv0'] == identified_lv0:
                 composite_score += LV0_COMPOSITE_BONUS
 
-            # Iterate through lv1 to lv4 components
-            for level_col in ['lv1', 'lv2', 'lv3', 'lv4']:
+            for level_col in LEVEL_COLUMNS:
                 component = row[level_col]
                 if pd.notna(component) and component:
                     normalized_component = strip_address_postfixes(component)
-                    
                     if len(normalized_component) > 1:
-                        # Use fuzz.WRatio for more robust component matching
                         component_score = fuzz.WRatio(normalized_component, normalized_rag_addr_for_partial)
-                        
-                        # If component matches well, add to composite score, prioritizing longer matches
                         if component_score >= FUZZY_MATCH_THRESHOLD:
-                            # Add score, weighted by length to prioritize more specific matches
                             composite_score += component_score * (len(normalized_component) / len(normalized_rag_addr_for_partial))
-                            
-                            # Add a bonus for exact word matches (using a simpler check for now)
                             if normalized_component in normalized_rag_addr_for_partial:
                                 composite_score += EXACT_WORD_MATCH_BONUS
 
-            # Update best composite score
             if composite_score > best_score:
                 best_score = composite_score
-                best_match = current_full_address
+                best_match = row['full_address']
                 matched_row = row
 
         if best_match:
-            logging.debug(f"  Best composite match found: '{best_match}' with score {best_score}")
             return best_match, best_score, matched_row
 
-        return None, 0, None
\ No newline at end of file
+        return None, 0, None
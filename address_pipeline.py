@@ -0,0 +1,280 @@
+# Standard library imports
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Hashable, Iterable, Iterator
+
+# Local application imports
+from address_processor import AddressProcessor
+from llm_extractor import DEFAULT_BATCH_SIZE, DEFAULT_MAX_CONCURRENCY
+
+# --- Constants ---
+DEFAULT_QUEUE_SIZE = 16
+_STOP = object() # Queue sentinel: one per downstream worker
+# --- End Constants ---
+
+class StageStats:
+    """
+    Counters for one pipeline stage. Queue depth is sampled every time an
+    item is put on the stage's input queue.
+    """
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.queue_depth_max = 0
+        self._queue_depth_total = 0
+        self._queue_samples = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.busy_seconds += seconds
+            if failed:
+                self.failed += 1
+            else:
+                self.processed += 1
+
+    def sample_queue(self, depth: int) -> None:
+        with self._lock:
+            self.queue_depth_max = max(self.queue_depth_max, depth)
+            self._queue_depth_total += depth
+            self._queue_samples += 1
+
+    def summary(self, elapsed: float) -> dict:
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'throughput_per_s': self.processed / elapsed if elapsed > 0 else 0.0,
+            'busy_seconds': self.busy_seconds,
+            'queue_depth_max': self.queue_depth_max,
+            'queue_depth_mean': self._queue_depth_total / self._queue_samples if self._queue_samples else 0.0,
+        }
+
+class AddressPipeline:
+    """
+    Runs AddressProcessor's extract -> match -> geocode stages concurrently.
+
+    Each stage has a bounded input queue, so article N+1 can be extracted
+    while article N is matched and article N-1 is geocoded; a full queue
+    blocks the stage before it (backpressure). The extract stage is one
+    thread running LLMExtractor.aextract_many, with up to llm_concurrency
+    requests in flight, each carrying up to llm_batch_size articles; match
+    and geocode have their own worker threads. Result dicts have the same
+    schema as AddressProcessor.process_text, plus the article 'index'.
+    Articles whose stage raises are logged and dropped; if the extract stage
+    itself stops, the input is no longer read and the run ends once the
+    articles already extracted are through.
+    """
+
+    def __init__(
+        self,
+        processor: AddressProcessor,
+        llm_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        llm_batch_size: int = DEFAULT_BATCH_SIZE,
+        match_workers: int = 1,
+        geocode_workers: int = 1,
+        queue_size: int = DEFAULT_QUEUE_SIZE
+    ):
+        self.processor = processor
+        self.llm_batch_size = llm_batch_size
+        self.queue_size = queue_size
+        # The extract stage's "workers" are its in-flight LLM requests
+        self.workers = {'extract': llm_concurrency, 'match': match_workers, 'geocode': geocode_workers}
+        self.stages = {name: StageStats(name, n) for name, n in self.workers.items()}
+        self._started_at = None
+        self._finished_at = None
+
+    def _finish_extract(self, result_dict: dict, rag_json: dict | None, started: float, stats: StageStats, out_queue: queue.Queue, out_stats: StageStats) -> None:
+        try:
+            normalized_rag_addrs = self.processor.finish_extract(result_dict, rag_json)
+        except Exception as e:
+            stats.record(time.perf_counter() - started, failed=True)
+            logging.error("Pipeline stage 'extract' failed: %r", e)
+            return
+        elapsed = time.perf_counter() - started
+        stats.record(elapsed)
+        self.processor.metrics.observe('stage_latency', elapsed, stage='extract')
+        self._put(out_queue, (result_dict, normalized_rag_addrs), out_stats)
+
+    async def _extract_all(self, stats: StageStats, in_queue: queue.Queue, out_queue: queue.Queue, out_stats: StageStats) -> None:
+        """
+        Takes articles off in_queue until _STOP. Those the pre-filter or the
+        dictionary pass settle go straight to out_queue; the rest are
+        extracted by aextract_many and passed on as their requests complete.
+        """
+        loop = asyncio.get_running_loop()
+        waiting = {} # sequence number -> (result_dict, started, sent to the LLM)
+
+        async def llm_items():
+            sequence = 0
+            while True:
+                # Waiting for input must not block the requests in flight
+                item = await loop.run_in_executor(None, in_queue.get)
+                if item is _STOP:
+                    return
+                index, text = item
+                started = time.perf_counter()
+                try:
+                    result_dict, rag_json, needs_llm = self.processor.prepare_extract(text)
+                except Exception as e:
+                    stats.record(time.perf_counter() - started, failed=True)
+                    logging.error("Pipeline stage 'extract' failed: %r", e)
+                    continue
+                result_dict['index'] = index
+                if not needs_llm:
+                    self._finish_extract(result_dict, rag_json, started, stats, out_queue, out_stats)
+                    continue
+                waiting[sequence] = (result_dict, started, time.perf_counter())
+                yield sequence, text
+                sequence += 1
+
+        results = self.processor.llm_extractor.aextract_many(llm_items(), max_concurrency=stats.workers, batch_size=self.llm_batch_size)
+        async for sequence, rag_json in results:
+            result_dict, started, sent = waiting.pop(sequence)
+            self.processor.metrics.observe('stage_latency', time.perf_counter() - sent, stage='llm')
+            self._finish_extract(result_dict, rag_json, started, stats, out_queue, out_stats)
+
+    def _match(self, item: tuple) -> dict:
+        result_dict, normalized_rag_addrs = item
+        self.processor.match_stage(result_dict, normalized_rag_addrs)
+        return result_dict
+
+    def _geocode(self, result_dict: dict) -> dict:
+        self.processor.geocode_stage(result_dict)
+        return result_dict
+
+    def _put(self, out_queue: queue.Queue, item, stats: StageStats | None) -> None:
+        out_queue.put(item)
+        if stats is not None:
+            stats.sample_queue(out_queue.qsize())
+
+    def _start_stage(
+        self,
+        stats: StageStats,
+        func: Callable,
+        in_queue: queue.Queue,
+        out_queue: queue.Queue,
+        out_stats: StageStats | None
+    ) -> list[threading.Thread]:
+        remaining = [stats.workers]
+        lock = threading.Lock()
+
+        def worker() -> None:
+            while True:
+                item = in_queue.get()
+                if item is _STOP:
+                    break
+                started = time.perf_counter()
+                try:
+                    result = func(item)
+                except Exception as e:
+                    stats.record(time.perf_counter() - started, failed=True)
+                    logging.error("Pipeline stage '%s' failed: %r", stats.name, e)
+                    continue
+                stats.record(time.perf_counter() - started)
+                self._put(out_queue, result, out_stats)
+
+            # The last worker to finish tells every downstream worker to stop
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(out_stats.workers if out_stats is not None else 1):
+                    out_queue.put(_STOP)
+
+        threads = [threading.Thread(target=worker, name=f"{stats.name}-{i}", daemon=True) for i in range(stats.workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _start_extract_stage(
+        self,
+        stats: StageStats,
+        in_queue: queue.Queue,
+        out_queue: queue.Queue,
+        out_stats: StageStats,
+        stopped: threading.Event
+    ) -> threading.Thread:
+        def worker() -> None:
+            try:
+                asyncio.run(self._extract_all(stats, in_queue, out_queue, out_stats))
+            except Exception as e:
+                logging.error("Pipeline stage 'extract' stopped: %r", e)
+                # Tell the feeder to stop, and make room for a put it may be blocked in
+                stopped.set()
+                while True:
+                    try:
+                        in_queue.get_nowait()
+                    except queue.Empty:
+                        break
+            finally:
+                for _ in range(out_stats.workers):
+                    out_queue.put(_STOP)
+
+        thread = threading.Thread(target=worker, name="extract", daemon=True)
+        thread.start()
+        return thread
+
+    def run(self, items: Iterable[tuple[Hashable, str]]) -> Iterator[dict]:
+        """
+        Processes (article index, cleaned text) pairs and yields result dicts
+        in completion order.
+        """
+        extract_queue = queue.Queue(self.queue_size)
+        match_queue = queue.Queue(self.queue_size)
+        geocode_queue = queue.Queue(self.queue_size)
+        output_queue = queue.Queue(self.queue_size)
+
+        self.stages = {name: StageStats(name, n) for name, n in self.workers.items()}
+        extract_stats = self.stages['extract']
+        match_stats = self.stages['match']
+        geocode_stats = self.stages['geocode']
+
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+        # Set when the extract stage stops before the end of its input
+        extract_stopped = threading.Event()
+        self._start_extract_stage(extract_stats, extract_queue, match_queue, match_stats, extract_stopped)
+        self._start_stage(match_stats, self._match, match_queue, geocode_queue, geocode_stats)
+        self._start_stage(geocode_stats, self._geocode, geocode_queue, output_queue, None)
+
+        def feed() -> None:
+            try:
+                for item in items:
+                    if extract_stopped.is_set():
+                        break
+                    self._put(extract_queue, item, extract_stats)
+            except Exception as e:
+                logging.error("Pipeline input failed: %r", e)
+            finally:
+                if not extract_stopped.is_set():
+                    extract_queue.put(_STOP)
+
+        threading.Thread(target=feed, name="feeder", daemon=True).start()
+
+        while True:
+            result_dict = output_queue.get()
+            if result_dict is _STOP:
+                break
+            yield result_dict
+        self._finished_at = time.perf_counter()
+
+    def stats(self) -> dict:
+        """
+        Returns per-stage throughput and queue depth for the current/last run.
+        """
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+        return {
+            'elapsed_seconds': elapsed,
+            'stages': {name: stage.summary(elapsed) for name, stage in self.stages.items()},
+        }
@@ -4,84 +4,383 @@ from geopy.geocoders import Nominatim
 
 from address_utils import (
     normalize_address_df,
-    normalize_rag_address,
     strip_address_postfixes
 )
 from llm_extractor import LLMExtractor
-from address_matcher import AddressMatcher
+from address_matcher import AddressMatcher, DEFAULT_CACHE_SIZE
+from geocoder import CachedGeocoder, GeocodeCache, OfflineGeocoder
+from gazetteer import Gazetteer, NO_CANDIDATE
+from dictionary_extractor import DictionaryExtractor
+from context_builder import ContextBuilder, DEFAULT_TOKEN_BUDGET
+from address_store import AddressStore
+from metrics import MetricsRegistry
+from address_splitter import AddressSplitter
+
+# --- Constants ---
+# 'llm': LLM only; 'dictionary': DictionaryExtractor only; 'hybrid': the
+# dictionary first, the LLM only when it is ambiguous or finds nothing
+EXTRACTOR_MODES = ('llm', 'dictionary', 'hybrid')
+# Per-address fields, kept for every address in result_dict['addresses']; the
+# top-level fields repeat those of the first matched address
+MATCH_FIELDS = (
+    'matched_address_display', 'match_score', 'matched_full_address_df',
+    'matched_lv0', 'matched_lv1', 'matched_lv2', 'matched_lv3', 'matched_lv4'
+)
+GEOCODE_FIELDS = ('latitude', 'longitude', 'geocoded_address')
+# --- End Constants ---
 
 class AddressProcessor:
-    def __init__(self, df_addr: pd.DataFrame, llm_model: str = 'gemma3:1b'):
-        self.llm_extractor = LLMExtractor(model=llm_model)
-        self.df_addr_optimized = normalize_address_df(df_addr)
-        self.address_matcher = AddressMatcher(self.df_addr_optimized)
-        self.geolocator = Nominatim(user_agent="my_geocoder")
+    def __init__(
+        self,
+        df_addr: pd.DataFrame | None,
+        llm_model: str = 'gemma3:1b',
+        llm_cache_dir: str | None = None,
+        geocode_cache_dir: str | None = None,
+        df_coords: pd.DataFrame | None = None,
+        offline_geocoding: bool = False,
+        use_gazetteer: bool = True,
+        extractor_mode: str = 'llm',
+        context_token_budget: int = DEFAULT_TOKEN_BUDGET,
+        address_store: AddressStore | None = None,
+        metrics: MetricsRegistry | None = None,
+        match_cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        if extractor_mode not in EXTRACTOR_MODES:
+            raise ValueError(f"extractor_mode must be one of {EXTRACTOR_MODES}, got '{extractor_mode}'")
+        self.extractor_mode = extractor_mode
+        # Per-stage latency histograms and outcome counters (see collect_metrics)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        if address_store is not None:
+            # Prebuilt by address_store.build_address_store: attach instead of re-normalizing/indexing
+            self.df_addr_optimized = address_store.df_addr_optimized
+            self.address_matcher = AddressMatcher(self.df_addr_optimized, address_store.matcher_index, cache_size=match_cache_size)
+            splitter_tables, patterns = address_store.splitter_tables, address_store.gazetteer_patterns
+        else:
+            self.df_addr_optimized = normalize_address_df(df_addr)
+            self.address_matcher = AddressMatcher(self.df_addr_optimized, cache_size=match_cache_size)
+            splitter_tables, patterns = None, None
 
-    def process_text(self, text_content: str) -> dict:
-        result_dict = {
-            'original_text': text_content,
+        # The address table's place names: the LLM pre-filter (articles
+        # mentioning none of them skip the LLM), the dictionary extractor and
+        # the ranking of sentences kept in the LLM context
+        gazetteer = Gazetteer(self.df_addr_optimized, patterns=patterns)
+        # Splits an extracted value holding several addresses into them
+        self.address_splitter = AddressSplitter(self.df_addr_optimized, tables=splitter_tables)
+        self.gazetteer = gazetteer if use_gazetteer else None
+        self.dictionary_extractor = (
+            DictionaryExtractor(self.df_addr_optimized, gazetteer=gazetteer)
+            if extractor_mode != 'llm' else None
+        )
+        self.llm_extractor = LLMExtractor(
+            model=llm_model,
+            cache_dir=llm_cache_dir,
+            context_builder=ContextBuilder(gazetteer, token_budget=context_token_budget)
+        )
+
+        # Geocoding: local lat/lon table first (by matched full address), then
+        # the persistent cache, and only then Nominatim (unless offline).
+        self.offline_geocoder = OfflineGeocoder(df_coords, self.df_addr_optimized) if df_coords is not None else None
+        geocode_cache = GeocodeCache(geocode_cache_dir) if geocode_cache_dir else None
+        self.geolocator = CachedGeocoder(
+            None if offline_geocoding else Nominatim(user_agent="my_geocoder"),
+            geocode_cache
+        )
+
+    def _new_result_dict(self, text_content: str) -> dict:
+        return {
+            'original_text': text_content, 'prefilter': None, 'extraction_source': None,
             'address': None, 'who': None, 'when': None, 'where': None, 'what': None, 'other': None,
             'matched_address_display': None, 'match_score': None, 'matched_full_address_df': None,
             'matched_lv0': None, 'matched_lv1': None, 'matched_lv2': None, 'matched_lv3': None, 'matched_lv4': None,
-            'latitude': None, 'longitude': None, 'geocoded_address': None
+            'latitude': None, 'longitude': None, 'geocoded_address': None,
+            'addresses': []
         }
 
+    def _new_address_entry(self, normalized_rag_addr: str) -> dict:
+        return {'address': normalized_rag_addr, **dict.fromkeys(MATCH_FIELDS), **dict.fromkeys(GEOCODE_FIELDS)}
+
+    def _apply_rag_json(self, result_dict: dict, rag_json: dict | None) -> list[str]:
+        """
+        Copies the extracted fields into result_dict and returns the normalized
+        addresses to match (split and deduplicated, see AddressSplitter).
+        """
+        if not rag_json:
+            return []
+
+        address = rag_json.get('address')
+        result_dict['address'] = ', '.join(map(str, address)) if isinstance(address, list) else address
+        result_dict['who'] = rag_json.get('who')
+        result_dict['when'] = rag_json.get('when')
+        result_dict['where'] = rag_json.get('where')
+        result_dict['what'] = rag_json.get('what')
+        result_dict['other'] = rag_json.get('other')
+
+        return self.address_splitter.split(address)
+
+    def _apply_match(self, result_dict: dict, normalized_rag_addr: str, best_match: str | None, score: float, matched_row: pd.Series | None) -> None:
+        """
+        Fills the MATCH_FIELDS of result_dict (an address entry).
+        """
+        if not best_match:
+            return
+
+        result_dict['match_score'] = score
+        result_dict['matched_full_address_df'] = matched_row['full_address']
+        result_dict['matched_lv0'] = matched_row['lv0']
+        result_dict['matched_lv1'] = matched_row['lv1']
+        result_dict['matched_lv2'] = matched_row['lv2']
+        result_dict['matched_lv3'] = matched_row['lv3']
+        result_dict['matched_lv4'] = matched_row['lv4']
+
+        # Determine matched levels and construct the best_match_display string
+        best_match_display_components = []
+        lv0_added = False
+
+        for i, level_col in enumerate(['lv0', 'lv1', 'lv2', 'lv3', 'lv4']):
+            component = matched_row[level_col]
+            if pd.notna(component) and component:
+                # lv1-lv4 were stripped once per distinct value by normalize_address_df
+                normalized_component = strip_address_postfixes(component) if level_col == 'lv0' else matched_row[f'{level_col}_stripped']
+                if normalized_component in normalized_rag_addr:
+                    if level_col == 'lv0':
+                        best_match_display_components.append(component)
+                        lv0_added = True
+                    elif level_col == 'lv1':
+                        if lv0_added and best_match_display_components and best_match_display_components[-1] == normalized_component:
+                            best_match_display_components[-1] = component
+                        else:
+                            best_match_display_components.append(component)
+                    else:
+                        best_match_display_components.append(component)
+
+        best_match_display = " ".join(best_match_display_components)
+        if not best_match_display:
+            best_match_display = best_match
+        result_dict['matched_address_display'] = best_match_display
+
+    def _apply_matches(self, result_dict: dict, normalized_rag_addrs: list[str], matches: list[tuple]) -> None:
+        """
+        Adds one entry per address to result_dict['addresses'] (an address
+        matching the same row as an earlier one is dropped) and copies the
+        first matched entry's fields to the top level.
+        """
+        matched_rows = set()
+        for normalized_rag_addr, (best_match, score, matched_row) in zip(normalized_rag_addrs, matches):
+            if best_match:
+                if matched_row.name in matched_rows:
+                    continue
+                matched_rows.add(matched_row.name)
+            entry = self._new_address_entry(normalized_rag_addr)
+            self._apply_match(entry, normalized_rag_addr, best_match, score, matched_row)
+            result_dict['addresses'].append(entry)
+        self._copy_primary(result_dict, MATCH_FIELDS)
+
+    def _copy_primary(self, result_dict: dict, fields: tuple[str, ...]) -> None:
+        for entry in result_dict['addresses']:
+            if entry['matched_address_display']:
+                for field in fields:
+                    result_dict[field] = entry[field]
+                return
+
+    def _prefilter(self, result_dict: dict) -> bool:
+        """
+        Runs the gazetteer on the article and records the outcome in
+        result_dict['prefilter']. Returns False if the LLM should be skipped.
+        """
+        if self.gazetteer is None:
+            return True
+        with self.metrics.timer('stage_latency', stage='prefilter'):
+            result_dict['prefilter'] = self.gazetteer.check(result_dict['original_text'])
+        self.metrics.inc('prefilter', outcome=result_dict['prefilter'])
+        return result_dict['prefilter'] != NO_CANDIDATE
+
+    def _dictionary_extract(self, result_dict: dict) -> dict | None:
+        """
+        Runs the dictionary pass (unless in 'llm' mode). Returns its result, or
+        None if the LLM should decide (or, in 'dictionary' mode, nobody).
+        """
+        if self.dictionary_extractor is None:
+            return None
+        with self.metrics.timer('stage_latency', stage='dictionary'):
+            rag_json = self.dictionary_extractor.extract_info(result_dict['original_text'])
+        if rag_json is not None:
+            result_dict['extraction_source'] = 'dictionary'
+        return rag_json
+
+    def _needs_llm(self, result_dict: dict) -> bool:
+        return self.extractor_mode != 'dictionary' and result_dict['extraction_source'] is None
+
+    def _record_extraction(self, result_dict: dict) -> None:
+        self.metrics.inc('extraction_source', source=result_dict['extraction_source'] or 'none')
+
+    # --- Pipeline stages (see address_pipeline.AddressPipeline) ---
+    def prepare_extract(self, text_content: str) -> tuple[dict, dict | None, bool]:
+        """
+        First half of extract_stage, before the LLM: runs the gazetteer
+        pre-filter and the dictionary pass on a new result_dict.
+
+        Returns:
+            tuple: (result_dict, the dictionary's result or None, whether the
+            article still needs the LLM).
+        """
+        result_dict = self._new_result_dict(text_content)
+        if not self._prefilter(result_dict):
+            return result_dict, None, False
+        rag_json = self._dictionary_extract(result_dict)
+        needs_llm = self._needs_llm(result_dict)
+        if needs_llm:
+            result_dict['extraction_source'] = 'llm'
+        return result_dict, rag_json, needs_llm
+
+    def finish_extract(self, result_dict: dict, rag_json: dict | None) -> list[str]:
+        """
+        Second half of extract_stage: copies the extracted fields into
+        result_dict and returns the normalized addresses to match.
+        """
+        self._record_extraction(result_dict)
+        return self._apply_rag_json(result_dict, rag_json)
+
+    def extract_stage(self, text_content: str) -> tuple[dict, list[str]]:
+        """
+        LLM stage: returns a new result_dict with the extracted fields and the
+        normalized addresses to match (empty if there is nothing to match).
+        Articles without any gazetteer hit are not sent to the LLM, nor are
+        those the dictionary pass resolves (see extractor_mode).
+        """
+        with self.metrics.timer('stage_latency', stage='extract'):
+            result_dict, rag_json, needs_llm = self.prepare_extract(text_content)
+            if needs_llm:
+                with self.metrics.timer('stage_latency', stage='llm'):
+                    rag_json = self.llm_extractor.extract_info(text=text_content)
+            return result_dict, self.finish_extract(result_dict, rag_json)
+
+    def match_stage(self, result_dict: dict, normalized_rag_addrs: list[str]) -> None:
+        """
+        Matching stage: matches all of the article's addresses in one
+        AddressMatcher.match_many call and fills result_dict['addresses'] and
+        the top-level matched_* fields.
+        """
+        if normalized_rag_addrs:
+            with self.metrics.timer('stage_latency', stage='match'):
+                matches = self.address_matcher.match_many(normalized_rag_addrs)
+            self._apply_matches(result_dict, normalized_rag_addrs, matches)
+
+    def _geocode(self, matched_full_address: str | None, best_match_display: str):
+        with self.metrics.timer('stage_latency', stage='geocode'):
+            location = None
+            outcome = 'offline'
+            if self.offline_geocoder is not None and matched_full_address:
+                location = self.offline_geocoder.geocode(matched_full_address)
+            if location is None:
+                location = self.geolocator.geocode(best_match_display)
+                outcome = 'geocoder' if location else 'miss'
+        self.metrics.inc('geocode', outcome=outcome)
+        return location
+
+    def geocode_stage(self, result_dict: dict) -> None:
+        """
+        Geocoding stage: fills latitude/longitude for each matched display
+        address (each distinct one is geocoded once) and copies the first
+        matched address's coordinates to the top level.
+        """
+        locations = {}
+        for entry in result_dict['addresses']:
+            best_match_display = entry['matched_address_display']
+            if not best_match_display:
+                continue
+            key = (entry['matched_full_address_df'], best_match_display)
+            if key not in locations:
+                locations[key] = self._geocode(*key)
+            location = locations[key]
+            if location:
+                entry['latitude'] = location.latitude
+                entry['longitude'] = location.longitude
+                entry['geocoded_address'] = location.address
+        self._copy_primary(result_dict, GEOCODE_FIELDS)
+    # --- End Pipeline stages ---
+
+    def process_text(self, text_content: str) -> dict:
         text = text_content # Assuming sa.clean_text is not needed here or handled elsewhere
 
-        rag_json = self.llm_extractor.extract_info(text=text)
-
-        if rag_json:
-            result_dict['address'] = rag_json.get('address')
-            result_dict['who'] = rag_json.get('who')
-            result_dict['when'] = rag_json.get('when')
-            result_dict['where'] = rag_json.get('where')
-            result_dict['what'] = rag_json.get('what')
-            result_dict['other'] = rag_json.get('other')
-
-            if 'address' in rag_json and rag_json['address']:
-                rag_address = rag_json['address']
-                normalized_rag_addr = normalize_rag_address(rag_address)
-
-                best_match, score, matched_row = self.address_matcher.find_matching_address(normalized_rag_addr)
-
-                if best_match:
-                    result_dict['match_score'] = score
-                    result_dict['matched_full_address_df'] = matched_row['full_address']
-                    result_dict['matched_lv0'] = matched_row['lv0']
-                    result_dict['matched_lv1'] = matched_row['lv1']
-                    result_dict['matched_lv2'] = matched_row['lv2']
-                    result_dict['matched_lv3'] = matched_row['lv3']
-                    result_dict['matched_lv4'] = matched_row['lv4']
-
-                    # Determine matched levels and construct the best_match_display string
-                    best_match_display_components = []
-                    lv0_added = False
-
-                    for i, level_col in enumerate(['lv0', 'lv1', 'lv2', 'lv3', 'lv4']):
-                        component = matched_row[level_col]
-                        if pd.notna(component) and component:
-                            normalized_component = strip_address_postfixes(component)
-                            if normalized_component in normalized_rag_addr:
-                                if level_col == 'lv0':
-                                    best_match_display_components.append(component)
-                                    lv0_added = True
-                                elif level_col == 'lv1':
-                                    if lv0_added and best_match_display_components and best_match_display_components[-1] == strip_address_postfixes(component):
-                                        best_match_display_components[-1] = component
-                                    else:
-                                        best_match_display_components.append(component)
-                                else:
-                                    best_match_display_components.append(component)
-                    
-                    best_match_display = " ".join(best_match_display_components)
-                    if not best_match_display:
-                        best_match_display = best_match
-                    result_dict['matched_address_display'] = best_match_display
-
-                    location = self.geolocator.geocode(best_match_display)
-                    if location:
-                        result_dict['latitude'] = location.latitude
-                        result_dict['longitude'] = location.longitude
-                        result_dict['geocoded_address'] = location.address
-        
-        return result_dict
\ No newline at end of file
+        with self.metrics.timer('article_latency'):
+            result_dict, normalized_rag_addrs = self.extract_stage(text)
+            self.match_stage(result_dict, normalized_rag_addrs)
+            self.geocode_stage(result_dict)
+
+        return result_dict
+
+    def process_texts(self, text_contents: list[str], llm_concurrency: int = 1, llm_batch_size: int = 1) -> list[dict]:
+        """
+        Processes a chunk of articles: extracts them with the LLM (with up to
+        llm_concurrency requests in flight, each carrying up to
+        llm_batch_size articles), then matches all extracted
+        addresses of all articles in one AddressMatcher.match_many call. Articles without any
+        gazetteer hit are not sent to the LLM, nor are those the dictionary
+        pass resolves (see extractor_mode).
+
+        Returns:
+            list[dict]: One result_dict per article, same schema as process_text.
+        """
+        result_dicts = []
+        dictionary_jsons = {}
+        to_extract = []
+        for i, text_content in enumerate(text_contents):
+            result_dict, dictionary_jsons[i], needs_llm = self.prepare_extract(text_content)
+            result_dicts.append(result_dict)
+            if needs_llm:
+                to_extract.append((i, text_content))
+
+        # Batched stages are timed per chunk ('chunk_latency'), not per article
+        with self.metrics.timer('chunk_latency', stage='llm'):
+            if llm_concurrency > 1 or llm_batch_size > 1:
+                rag_jsons = self.llm_extractor.extract_many(to_extract, max_concurrency=llm_concurrency, batch_size=llm_batch_size)
+            else:
+                rag_jsons = {i: self.llm_extractor.extract_info(text=text) for i, text in to_extract}
+        rag_jsons = {**dictionary_jsons, **rag_jsons}
+
+        normalized_rag_addrs = [self.finish_extract(result_dict, rag_jsons.get(i)) for i, result_dict in enumerate(result_dicts)]
+
+        # All addresses of the chunk in one match_many call
+        with self.metrics.timer('chunk_latency', stage='match'):
+            matches = self.address_matcher.match_many([addr for addrs in normalized_rag_addrs for addr in addrs])
+        offset = 0
+        for result_dict, addrs in zip(result_dicts, normalized_rag_addrs):
+            self._apply_matches(result_dict, addrs, matches[offset:offset + len(addrs)])
+            offset += len(addrs)
+
+        for result_dict in result_dicts:
+            self.geocode_stage(result_dict)
+
+        return result_dicts
+
+    def collect_metrics(self) -> MetricsRegistry:
+        """
+        Copies the totals kept by the components (match outcomes, LLM parse
+        failures, cache hits, network calls) into self.metrics and returns it.
+        Call at the end of a run, before exporting.
+        """
+        metrics = self.metrics
+        for outcome, count in self.address_matcher.match_stats().items():
+            metrics.set_counter('match_outcome', count, outcome=outcome)
+        for cache_name, cache_stats in self.address_matcher.cache_stats().items():
+            metrics.set_counter('cache_lookups', cache_stats['hits'], cache=f'matcher_{cache_name}', result='hit')
+            metrics.set_counter('cache_lookups', cache_stats['misses'], cache=f'matcher_{cache_name}', result='miss')
+        prompt_stats = self.llm_extractor.prompt_stats()
+        metrics.set_counter('llm_prompts', prompt_stats['prompts'])
+        metrics.set_counter('llm_parse_failures', prompt_stats['parse_failures'])
+        if self.llm_extractor.cache is not None:
+            cache_stats = self.llm_extractor.cache.stats()
+            metrics.set_counter('cache_lookups', cache_stats['hits'], cache='llm', result='hit')
+            metrics.set_counter('cache_lookups', cache_stats['misses'], cache='llm', result='miss')
+        geocode_stats = self.geolocator.stats()
+        metrics.set_counter('geocode_network_calls', geocode_stats['network_calls'])
+        if 'cache' in geocode_stats:
+            cache_stats = geocode_stats['cache']
+            metrics.set_counter('cache_lookups', cache_stats['hits'], cache='geocode', result='hit')
+            metrics.set_counter('cache_lookups', cache_stats['negative_hits'], cache='geocode', result='negative_hit')
+            metrics.set_counter('cache_lookups', cache_stats['misses'], cache='geocode', result='miss')
+        if self.offline_geocoder is not None:
+            offline_stats = self.offline_geocoder.stats()
+            metrics.set_counter('cache_lookups', offline_stats['hits'], cache='offline_geocode', result='hit')
+            metrics.set_counter('cache_lookups', offline_stats['misses'], cache='offline_geocode', result='miss')
+        return metrics
@@ -0,0 +1,170 @@
+# Standard library imports
+import re
+from itertools import groupby
+from operator import itemgetter
+
+# Third-party library imports
+import pandas as pd
+
+# Local application imports
+from address_utils import normalize_rag_address, strip_address_postfixes
+
+# --- Constants ---
+# Address hierarchy slots: lv0/lv1 both name the province ('서울', '서울특별시')
+SLOTS = [('lv0', 'lv1'), ('lv2',), ('lv3',), ('lv4',)]
+# Explicit separators between addresses in one extracted value
+SEPARATOR_PATTERN = re.compile(r'\s*(?:[,;/|·\n]|\s(?:및|그리고)\s)\s*')
+# --- End Constants ---
+
+class AddressSplitter:
+    """
+    Splits the extracted 'address' value of an article into its addresses.
+
+    The value may be a list (one entry per address) or a string holding
+    several addresses. Strings are split at explicit separators, then
+    wherever the address hierarchy starts over: a token naming a province,
+    city, dong or ri at the same or a higher level than the token before it
+    ('서울 강남구 부산 해운대구' -> '서울 강남구', '부산 해운대구'). Tokens of one
+    multi-word component ('천안시 동남구') and a province's short and full
+    names ('서울 서울특별시') never split, nor does a name that continues the
+    segment's province at a lower level, in full or short form ('경기 광주
+    오포읍': 광주시 in 경기, not 광주광역시). Unknown tokens (numbers,
+    particles) stay with the address before them.
+    """
+
+    def __init__(self, df: pd.DataFrame | None, tables: dict | None = None):
+        """
+        Args:
+            df (pd.DataFrame | None): Address table with lv0-lv4 (e.g. the
+                output of normalize_address_df); only read when tables is None.
+            tables (dict | None, optional): Tables from export_tables (e.g.
+                loaded by address_store), built from df when None.
+        """
+        if tables is None:
+            self._build_tables(df)
+        else:
+            self._load_tables(tables)
+
+    def _build_tables(self, df: pd.DataFrame) -> None:
+        # Each distinct name once: the tables only depend on the distinct values
+        # per column and the distinct (lv1, name) pairs, not on the rows
+        values = {column: df[column].dropna().astype(str).unique() for columns in SLOTS for column in columns}
+        forms = {value: self._forms(value.split()) for column_values in values.values() for value in column_values}
+
+        self.token_slots = {}
+        self.continuations = set()
+        for slot, columns in enumerate(SLOTS):
+            for column in columns:
+                for value in values[column]:
+                    for form in forms[value]:
+                        # Slots are visited in order, so the first one is the highest
+                        self.token_slots.setdefault(form, slot)
+                    tokens = value.split()
+                    # '천안시 동남구' and '천안 동남구'
+                    for a, b in zip(tokens, tokens[1:]):
+                        self.continuations.update({(a, b), (strip_address_postfixes(a), b)})
+        provinces = df[['lv0', 'lv1']].dropna().drop_duplicates().astype(str)
+        for lv0, lv1 in provinces.itertuples(index=False):
+            self.continuations.update({(lv0, lv1), (lv1, lv0), (strip_address_postfixes(lv1), lv1)})
+
+        # Province name (any form) -> {lower-level name form: its highest slot in that province}
+        lv1_slots = {}
+        for slot, (column,) in enumerate(SLOTS[1:], start=1):
+            pairs = df[['lv1', column]].dropna().drop_duplicates().astype(str)
+            for lv1, value in zip(pairs['lv1'], pairs[column]):
+                slots = lv1_slots.setdefault(lv1, {})
+                for form in forms[value]:
+                    slots.setdefault(form, slot)
+        self.province_slots = {}
+        for lv0, lv1 in provinces.itertuples(index=False):
+            for province in {lv0, lv1, strip_address_postfixes(lv1)}:
+                if province not in self.province_slots:
+                    self.province_slots[province] = dict(lv1_slots.get(lv1, {}))
+                    continue
+                slots = self.province_slots[province]
+                for form, slot in lv1_slots.get(lv1, {}).items():
+                    slots[form] = min(slot, slots.get(form, slot))
+
+    def _load_tables(self, tables: dict) -> None:
+        columns = tables['token_slots']
+        self.token_slots = dict(zip(columns['form'], columns['slot']))
+        columns = tables['continuations']
+        self.continuations = set(zip(columns['first'], columns['second']))
+        # Rows are grouped by province (see export_tables)
+        columns = tables['province_slots']
+        self.province_slots = {
+            province: {form: slot for _, form, slot in rows}
+            for province, rows in groupby(zip(columns['province'], columns['form'], columns['slot']), key=itemgetter(0))
+        }
+
+    def export_tables(self) -> dict[str, dict[str, list]]:
+        """
+        Returns the splitter tables as columns ({table: {column: values}})
+        for storing alongside the address table.
+        """
+        return {
+            'token_slots': {'form': list(self.token_slots), 'slot': list(self.token_slots.values())},
+            'continuations': {
+                'first': [first for first, _ in self.continuations],
+                'second': [second for _, second in self.continuations],
+            },
+            'province_slots': {
+                'province': [province for province, slots in self.province_slots.items() for _ in slots],
+                'form': [form for slots in self.province_slots.values() for form in slots],
+                'slot': [slot for slots in self.province_slots.values() for slot in slots.values()],
+            },
+        }
+
+    @staticmethod
+    def _forms(tokens: list[str]) -> set[str]:
+        """
+        Returns tokens together with their postfix-stripped forms.
+        """
+        return {form for token in tokens for form in (token, strip_address_postfixes(token)) if form}
+
+    def _split_hierarchy(self, text: str) -> list[str]:
+        segments = []
+        current = []
+        previous_slot = None
+        province = None
+        for token in text.split():
+            slot = self.token_slots.get(token)
+            if (
+                slot is not None and previous_slot is not None and current
+                and (slot < previous_slot or (slot == previous_slot and (current[-1], token) not in self.continuations))
+            ):
+                lower_slot = self.province_slots.get(province, {}).get(token)
+                if lower_slot is not None and lower_slot > previous_slot:
+                    slot = lower_slot
+                else:
+                    segments.append(' '.join(current))
+                    current = []
+                    province = None
+            current.append(token)
+            if slot is not None:
+                previous_slot = slot
+                if slot == 0 and province is None:
+                    province = token
+        if current:
+            segments.append(' '.join(current))
+        return segments
+
+    def split(self, address: str | list | None) -> list[str]:
+        """
+        Returns the normalized addresses (see normalize_rag_address) in
+        address, in order and without repeats.
+        """
+        if not address:
+            return []
+        values = address if isinstance(address, list) else [address]
+
+        addresses = []
+        for value in values:
+            if not isinstance(value, str):
+                continue
+            for part in SEPARATOR_PATTERN.split(value):
+                for segment in self._split_hierarchy(part):
+                    normalized = normalize_rag_address(segment)
+                    if normalized:
+                        addresses.append(normalized)
+        return list(dict.fromkeys(addresses))
@@ -0,0 +1,183 @@
+# Standard library imports
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import NamedTuple
+
+# Third-party library imports
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Local application imports
+from address_utils import normalize_address_df
+from address_matcher import AddressMatcher, CODEPOINT_BITS, LEVEL_COLUMNS, NGRAM_SIZE, OCCURRENCE_BITS
+from address_splitter import SLOTS, AddressSplitter
+from gazetteer import MIN_PATTERN_LENGTH, gazetteer_patterns
+
+# --- Constants ---
+STORE_VERSION = 2
+TABLE_FILENAME = 'table.arrow' # Normalized address table, uncompressed Arrow IPC
+META_FILENAME = 'meta.json'
+# Matcher index entries stored as .npy (memory-mapped, with their dtype) vs. in Arrow IPC files
+ARRAY_ENTRIES = {
+    'full_lengths': 'int32',
+    'ngram_keys': 'int64',
+    'ngram_offsets': 'int64',
+    'ngram_positions': 'int32',
+    'component_codes': 'int32',
+    'partition_offsets': 'int64',
+    'partition_codes': 'int32',
+}
+STRING_ENTRIES = {'components': 'components.arrow', 'processed_components': 'components.arrow'}
+# Tables the processor derives from the address table (see AddressSplitter.export_tables
+# and gazetteer_patterns), stored so that workers load them instead of rebuilding them
+SPLITTER_TABLES = ['token_slots', 'continuations', 'province_slots']
+SPLITTER_FILENAME = 'splitter_{table}.arrow'
+GAZETTEER_FILENAME = 'gazetteer.arrow'
+# --- End Constants ---
+
+class AddressStore(NamedTuple):
+    """
+    A loaded address store: the normalized table (as normalize_address_df
+    returns it), the AddressMatcher index (see AddressMatcher.export_index),
+    the AddressSplitter tables (see AddressSplitter.export_tables) and the
+    gazetteer patterns (see gazetteer_patterns).
+    """
+    df_addr_optimized: pd.DataFrame
+    matcher_index: dict
+    splitter_tables: dict | None = None
+    gazetteer_patterns: list[str] | None = None
+
+def _source_signature(address_path: str) -> dict:
+    stat = os.stat(address_path)
+    return {'path': os.path.abspath(address_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def _store_format() -> str:
+    """
+    Returns a hash of the store layout and of the parameters the stored
+    index and tables depend on, so that a store written in another format
+    is rebuilt even when STORE_VERSION was not bumped.
+    """
+    layout = {
+        'version': STORE_VERSION,
+        'arrays': ARRAY_ENTRIES,
+        'strings': STRING_ENTRIES,
+        'splitter_tables': SPLITTER_TABLES,
+        'ngram': [NGRAM_SIZE, CODEPOINT_BITS, OCCURRENCE_BITS],
+        'level_columns': LEVEL_COLUMNS,
+        'splitter_slots': SLOTS,
+        'min_pattern_length': MIN_PATTERN_LENGTH,
+    }
+    return hashlib.sha256(json.dumps(layout, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _write_arrow(table: pa.Table, path: str) -> None:
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def _read_arrow(path: str) -> pa.Table:
+    # Record batches reference the memory map directly (zero-copy)
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+def build_address_store(address_path: str, store_dir: str) -> str:
+    """
+    Normalizes the address table, builds the AddressMatcher index, the
+    AddressSplitter tables and the gazetteer patterns and writes them to
+    store_dir: the table as an uncompressed Arrow IPC file, numeric index
+    arrays as .npy files and string lists and tables as Arrow IPC files. The
+    store is written to a temporary directory first and then moved into place.
+
+    Args:
+        address_path (str): Source table, e.g. 'data/address.parquet.gzip'.
+        store_dir (str): Output directory, e.g. 'data/address_store/'.
+
+    Returns:
+        str: store_dir.
+    """
+    df_addr_optimized = normalize_address_df(pd.read_parquet(address_path))
+    index = AddressMatcher(df_addr_optimized).export_index()
+
+    store_dir = store_dir.rstrip('/')
+    tmp_dir = f"{store_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    _write_arrow(pa.Table.from_pandas(df_addr_optimized, preserve_index=False), os.path.join(tmp_dir, TABLE_FILENAME))
+    for name, dtype in ARRAY_ENTRIES.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(index[name], dtype=dtype))
+    _write_arrow(
+        pa.table({'components': index['components'], 'processed_components': index['processed_components']}),
+        os.path.join(tmp_dir, STRING_ENTRIES['components'])
+    )
+    splitter_tables = AddressSplitter(df_addr_optimized).export_tables()
+    for table in SPLITTER_TABLES:
+        _write_arrow(pa.table(splitter_tables[table]), os.path.join(tmp_dir, SPLITTER_FILENAME.format(table=table)))
+    _write_arrow(pa.table({'pattern': sorted(gazetteer_patterns(df_addr_optimized))}), os.path.join(tmp_dir, GAZETTEER_FILENAME))
+    with open(os.path.join(tmp_dir, META_FILENAME), 'w', encoding='utf-8') as f:
+        meta = {
+            'version': STORE_VERSION,
+            'format': _store_format(),
+            'source': _source_signature(address_path),
+            'rows': len(df_addr_optimized),
+        }
+        json.dump(meta, f, indent=4)
+
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+    logging.debug("Built address store '%s' from '%s'", store_dir, address_path)
+    return store_dir
+
+def is_store_current(address_path: str, store_dir: str) -> bool:
+    """
+    Returns True if store_dir holds a store of this version and format
+    (see _store_format) built from the current address_path (same size and
+    modification time).
+    """
+    meta_path = os.path.join(store_dir, META_FILENAME)
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    source = _source_signature(address_path)
+    return (
+        meta.get('version') == STORE_VERSION
+        and meta.get('format') == _store_format()
+        and all(meta['source'].get(key) == source[key] for key in ('size', 'mtime'))
+    )
+
+def ensure_address_store(address_path: str, store_dir: str) -> str:
+    """
+    Builds the store unless an up-to-date one already exists. Call this once
+    before starting worker processes, which then only load_address_store.
+    """
+    if not is_store_current(address_path, store_dir):
+        build_address_store(address_path, store_dir)
+    return store_dir
+
+def load_address_store(store_dir: str) -> AddressStore:
+    """
+    Attaches to a store written by build_address_store. Index arrays are
+    memory-mapped read-only and used in place, so every process attached to
+    the same store shares their pages through the OS page cache; nothing is
+    re-normalized, re-indexed or re-derived.
+
+    Args:
+        store_dir (str): Directory written by build_address_store.
+
+    Returns:
+        AddressStore: The normalized table, the matcher index, the splitter
+            tables and the gazetteer patterns.
+    """
+    df_addr_optimized = _read_arrow(os.path.join(store_dir, TABLE_FILENAME)).to_pandas()
+    index = {name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode='r') for name in ARRAY_ENTRIES}
+    # The scorers need Python strings, so only the (few) distinct components are converted
+    components = _read_arrow(os.path.join(store_dir, STRING_ENTRIES['components']))
+    index['components'] = components.column('components').to_pylist()
+    index['processed_components'] = components.column('processed_components').to_pylist()
+    splitter_tables = {
+        table: _read_arrow(os.path.join(store_dir, SPLITTER_FILENAME.format(table=table))).to_pydict()
+        for table in SPLITTER_TABLES
+    }
+    patterns = _read_arrow(os.path.join(store_dir, GAZETTEER_FILENAME)).column('pattern').to_pylist()
+    return AddressStore(df_addr_optimized, index, splitter_tables, patterns)
@@ -1,8 +1,9 @@
 import re
-import json
 import pandas as pd
 from fuzzywuzzy import fuzz
 
+from text_utils import extract_json
+
 # --- Constants ---
 # ADDRESS_POSTFIXES = ['특별시', '광역시', '도', '시', '군', '구', '읍', '면', '동', '가', '리', '로']
 ADDRESS_POSTFIXES = ['특별시', '광역시', '시', '경찰서', '지법']
@@ -10,8 +11,8 @@ ADDRESS_POSTFIXES = ['특별시', '광역시', '시', '경찰서', '지법']
 
 def get_json(json_text: str, verbose: bool = False) -> dict:
     """Parse JSON text into a Python dictionary.
-    Strips markdown code block indicators if present, and attempts to extract
-    the first valid JSON object from the string.
+    Returns the first JSON object in the string (see text_utils.extract_json),
+    so markdown code fences and text around it are ignored.
 
     Args:
         json_text (str): JSON text to parse.
@@ -23,33 +24,7 @@ def get_json(json_text: str, verbose: bool = False) -> dict:
     if verbose:
         print("Input JSON text:")
         print(json_text)
-
-    # Strip markdown code block indicators if present
-    if json_text.strip().startswith('```json') and json_text.strip().endswith('```'):
-        json_text = json_text.strip()[len('```json'):-len('```')].strip()
-    elif json_text.strip().startswith('```') and json_text.strip().endswith('```'):
-        json_text = json_text.strip()[len('```'):-len('```')].strip()
-
-    # Attempt to find and extract the first JSON object using a non-greedy regex
-    # This handles cases where there's extra text before or after the JSON,
-    # or if the LLM outputs multiple JSON-like structures.
-    match = re.search(r'\{(.*?)\}', json_text, re.DOTALL)
-    if not match:
-        print("Error: No JSON object found in the text.")
-        return None
-    
-    json_candidate = match.group(0)
-
-    try:
-        json_data = json.loads(json_candidate)
-    except json.JSONDecodeError as e:
-        print(f"Error loading JSON from candidate '{json_candidate[:100]}...': {e}")
-        return None
-    except Exception as e:
-        print("An unknown error occurred:", e)
-        return None
-
-    return json_data
+    return extract_json(json_text)
 
 def strip_address_postfixes(address_string: str) -> str:
     """
@@ -64,7 +39,9 @@ def normalize_address_df(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normalizes address columns in the DataFrame for better matching.
     Drops 'lv5' and converts 'object' columns to 'category'.
-    Creates a 'full_address' column by concatenating lv1-lv4.
+    Creates a 'full_address' column by concatenating lv1-lv4, and for each
+    of lv1-lv4 a '<lv>_stripped' column (postfixes removed, as used by the
+    matcher) with its length in '<lv>_stripped_len'.
     """
     df_copy = df.copy()
 
@@ -85,9 +62,16 @@ def normalize_address_df(df: pd.DataFrame) -> pd.DataFrame:
     # Create a 'full_address' column
     df_copy['full_address'] = df_copy[['lv1', 'lv2', 'lv3', 'lv4']].agg(' '.join, axis=1).str.strip().str.replace(r'\s+', ' ', regex=True)
 
+    # Precompute the stripped components once per distinct value
+    for col in ['lv1', 'lv2', 'lv3', 'lv4']:
+        if col in df_copy.columns:
+            stripped_by_component = {c: strip_address_postfixes(c) for c in df_copy[col].unique()}
+            df_copy[f'{col}_stripped'] = df_copy[col].map(stripped_by_component)
+            df_copy[f'{col}_stripped_len'] = df_copy[f'{col}_stripped'].str.len().astype('int16')
+
     # Convert object columns to category dtype for memory efficiency
     # Now, if '' was introduced by fillna, it will be a category
-    for col in ['lv0', 'lv1', 'lv2', 'lv3', 'lv4']:
+    for col in ['lv0', 'lv1', 'lv2', 'lv3', 'lv4', 'lv1_stripped', 'lv2_stripped', 'lv3_stripped', 'lv4_stripped']:
         if col in df_copy.columns and df_copy[col].dtype == 'object': # Check dtype again in case it changed
             df_copy[col] = df_copy[col].astype('category')
 
@@ -104,12 +88,14 @@ def normalize_rag_address(rag_address_string: str) -> str:
     normalized_address = re.sub(r'\s+', ' ', stripped_address.strip())
     return normalized_address
 
-def extract_lv0_from_rag_address(rag_address: str, df_addr_normalized: pd.DataFrame, threshold: int) -> str | None:
+def extract_lv0_from_rag_address(rag_address: str, df_addr_normalized: pd.DataFrame, threshold: int, unique_lv0s: list[str] | None = None) -> str | None:
     """
     Attempts to extract a matching lv0 (province/city) from the rag_address
     by comparing it against unique lv0 values in df_addr_normalized.
+    Callers matching many addresses can pass the precomputed unique_lv0s.
     """
-    unique_lv0s = df_addr_normalized['lv0'].unique()
+    if unique_lv0s is None:
+        unique_lv0s = df_addr_normalized['lv0'].unique()
     
     best_lv0_match = None
     best_lv0_score = 0
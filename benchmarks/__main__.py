@@ -0,0 +1,55 @@
+# Standard library imports
+import argparse
+
+# Third-party library imports
+import pandas as pd
+
+# Local application imports
+from benchmarks.micro import DEFAULT_REPEAT, run_micro_benchmarks
+from benchmarks.pipeline import DEFAULT_ARTICLES, run_pipeline_benchmarks
+from benchmarks.results import compare_results, save_results
+
+# --- Constants ---
+ADDRESS_PATH = 'data/address.parquet.gzip'
+# --- End Constants ---
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description="Offline benchmarks (stub LLM and geocoder); results are written as JSON."
+    )
+    parser.add_argument('--only', choices=['micro', 'pipeline'], help="Run one part only.")
+    parser.add_argument('--quick', action='store_true', help="Smallest input sizes and 60 articles only.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f"Runs per micro-benchmark (default: {DEFAULT_REPEAT}).")
+    parser.add_argument('--articles', type=int, default=DEFAULT_ARTICLES, help=f"Articles in the pipeline benchmark (default: {DEFAULT_ARTICLES}).")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Seconds the stub LLM waits per request (default: 0).")
+    parser.add_argument('--geocode-latency', type=float, default=0.0, help="Seconds the stub geocoder waits per request (default: 0).")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/benchmark_<timestamp>.json).")
+
+    subparsers = parser.add_subparsers(dest='command')
+    compare_parser = subparsers.add_parser('compare', help="Compare two results files.")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    return parser
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+
+    if args.command == 'compare':
+        print(f"{'benchmark':<34} {'size':>8} {'baseline_s':>12} {'candidate_s':>12} {'ratio':>7}")
+        for row in compare_results(args.baseline, args.candidate):
+            print(f"{row['benchmark']:<34} {row['size']:>8} {row['baseline_s']:>12.4f} {row['candidate_s']:>12.4f} {row['ratio']:>7.2f}")
+        raise SystemExit(0)
+
+    df_addr = pd.read_parquet(ADDRESS_PATH)
+    articles = min(args.articles, 60) if args.quick else args.articles
+    results = []
+    if args.only in (None, 'micro'):
+        results += run_micro_benchmarks(df_addr, repeat=args.repeat, quick=args.quick)
+    if args.only in (None, 'pipeline'):
+        results += run_pipeline_benchmarks(df_addr, articles, args.llm_latency, args.geocode_latency)
+
+    for result in results:
+        print(f"{result['benchmark']:<34} {result['size']:>8} {result['unit']:<8} {result['seconds_median']:>10.4f}s {result['per_item_us']:>12.3f}us/item")
+    settings = {key: value for key, value in vars(args).items() if key not in ('command', 'output')}
+    print(f"\nResults saved to {save_results(results, args.output, settings)}")
@@ -0,0 +1,113 @@
+# Standard library imports
+import asyncio
+import json
+import random
+import re
+import time
+import zlib
+
+# Third-party library imports
+import pandas as pd
+
+# Local application imports
+from geocoder import GeocodeResult
+
+# --- Constants ---
+ADDRESS_SENTENCE = "사건이 일어난 곳의 주소는 {address}이다."
+ADDRESS_PATTERN = re.compile(r'주소는 (.+?)이다')
+FILLER_SENTENCES = [
+    "관계자는 정확한 경위를 조사하고 있다고 밝혔다.",
+    "이번 일로 인한 인명 피해는 확인되지 않았다.",
+    "주민들은 재발 방지 대책을 요구하고 있다.",
+    "당국은 다음 주 중 결과를 발표할 예정이다.",
+    "현장에는 많은 취재진이 몰렸다.",
+]
+NO_PLACE_SENTENCES = [
+    "오늘 주식시장은 상승 마감했다.",
+    "투자자들은 관망세를 보였다.",
+    "거래량은 전날보다 줄었다.",
+]
+# --- End Constants ---
+
+class FakeLLM:
+    """
+    Deterministic stand-in for OllamaLLM (invoke/ainvoke). Answers with the
+    addresses written into the article by make_articles, in the JSON shape the
+    extraction prompt asks for; batch prompts get one record per article id.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def _record(self, context: str) -> dict:
+        return {"address": ADDRESS_PATTERN.findall(context), "who": "", "when": "", "where": "", "what": "", "other": ""}
+
+    def _answer(self, prompt: str) -> str:
+        articles = re.split(r'\[기사 (\d+)\]', prompt)
+        if len(articles) > 1:
+            records = [{"id": int(batch_id), **self._record(context)} for batch_id, context in zip(articles[1::2], articles[2::2])]
+            return "```json\n" + json.dumps(records, ensure_ascii=False) + "\n```"
+        return "```json\n" + json.dumps(self._record(prompt), ensure_ascii=False) + "\n```"
+
+    def invoke(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def ainvoke(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+class FakeGeocoder:
+    """
+    Deterministic stand-in for Nominatim: coordinates derived from the query.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def geocode(self, query: str) -> GeocodeResult:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        digest = zlib.crc32(query.encode('utf-8'))
+        return GeocodeResult(33.0 + (digest % 5000) / 1000, 124.5 + (digest // 5000 % 7000) / 1000, query)
+
+def sample_addresses(df_addr: pd.DataFrame, n: int, seed: int = 0, typo_rate: float = 0.3) -> list[str]:
+    """
+    Builds n address strings from random table rows: a random subset of
+    their lv0-lv4 names, with a dropped character in typo_rate of them.
+    """
+    rng = random.Random(seed)
+    rows = df_addr.sample(n, replace=n > len(df_addr), random_state=seed)
+    addresses = []
+    for _, row in rows.iterrows():
+        parts = [str(row[col]) for col in ['lv0', 'lv1', 'lv2', 'lv3', 'lv4'] if pd.notna(row[col]) and row[col]]
+        address = " ".join(sorted(rng.sample(parts, rng.randint(1, len(parts))), key=parts.index))
+        if rng.random() < typo_rate and len(address) > 3:
+            cut = rng.randrange(len(address))
+            address = address[:cut] + address[cut + 1:]
+        addresses.append(address)
+    return addresses
+
+def make_articles(df_addr: pd.DataFrame, n: int, seed: int = 0, no_place_rate: float = 0.3, sentences: int = 8) -> list[str]:
+    """
+    Builds n synthetic articles: most contain one address sentence (read by
+    FakeLLM) among filler sentences, no_place_rate of them mention no place.
+    """
+    rng = random.Random(seed)
+    addresses = sample_addresses(df_addr, n, seed, typo_rate=0.0)
+    articles = []
+    for address in addresses:
+        if rng.random() < no_place_rate:
+            body = [rng.choice(NO_PLACE_SENTENCES) for _ in range(sentences)]
+        else:
+            body = [rng.choice(FILLER_SENTENCES) for _ in range(sentences - 1)]
+            body.insert(rng.randrange(sentences), ADDRESS_SENTENCE.format(address=address))
+        articles.append(" ".join(body))
+    return articles
@@ -0,0 +1,167 @@
+# Standard library imports
+import json
+import random
+import re
+import statistics
+import time
+from typing import Callable
+
+# Third-party library imports
+import pandas as pd
+
+# Local application imports
+from address_matcher import AddressMatcher, FUZZY_MATCH_THRESHOLD
+from address_utils import extract_lv0_from_rag_address, normalize_address_df, normalize_rag_address
+from llm_extractor import LLMExtractor
+from text_utils import clean_many, clean_text
+from benchmarks.fakes import FakeLLM, sample_addresses
+
+# --- Constants ---
+DEFAULT_REPEAT = 3
+QUERY_SIZES = [10, 50, 200]
+TABLE_SIZES = [1_000, 10_000, 30_000]
+TEXT_SIZES = [1_000, 10_000, 100_000] # Characters
+TOP_K = 5
+CLEAN_MANY_BATCH = 100 # Texts per clean_many call
+# --- End Constants ---
+
+def measure(func: Callable[[], object], repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Runs func repeat times and returns the median and minimum wall time.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {'seconds_median': statistics.median(timings), 'seconds_min': min(timings), 'repeat': repeat}
+
+def _result(name: str, size: int, unit: str, timing: dict) -> dict:
+    return {
+        'benchmark': name,
+        'size': size,
+        'unit': unit,
+        **timing,
+        'per_item_us': timing['seconds_median'] / size * 1e6 if size else 0.0,
+    }
+
+def _messy_text(n_chars: int, seed: int = 0) -> str:
+    """
+    Korean-looking text with runs of spaces and blank lines, as clean_text sees in scraped articles.
+    """
+    rng = random.Random(seed)
+    pieces = []
+    length = 0
+    while length < n_chars:
+        piece = "".join(chr(0xAC00 + rng.randrange(400)) for _ in range(rng.randint(1, 8)))
+        piece += rng.choice([" ", "  ", "   ", "\n", "\n\n", "\n\n\n"])
+        pieces.append(piece)
+        length += len(piece)
+    return "".join(pieces)[:n_chars]
+
+def _indented_text(n_chars: int, seed: int = 0) -> str:
+    """
+    Whitespace-heavy text as scraped from HTML: indented lines between runs of blank lines.
+    """
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < n_chars:
+        line = " " * rng.randrange(0, 48, 4) + "".join(chr(0xAC00 + rng.randrange(400)) for _ in range(rng.randint(0, 30)))
+        line += "\n" * rng.randint(1, 6)
+        lines.append(line)
+        length += len(line)
+    return "".join(lines)[:n_chars]
+
+def _legacy_clean_text(text: str) -> str:
+    """
+    clean_text before the single-pass version, kept as the benchmark baseline.
+    """
+    flag = True
+    while flag:
+        flag_space = True if '  ' in text else False
+        flag_linefeed = True if '\n\n' in text else False
+        if flag_space or flag_linefeed:
+            if flag_space:
+                text = text.replace('  ', ' ')
+            if flag_linefeed:
+                text = text.replace('\n\n', '\n')
+        else:
+            flag = False
+    return text.strip()
+
+def _legacy_get_json(json_text: str) -> dict | None:
+    """
+    get_json before the shared extractor (fence stripping + non-greedy
+    regex), kept as the benchmark baseline.
+    """
+    if json_text.strip().startswith('```json') and json_text.strip().endswith('```'):
+        json_text = json_text.strip()[len('```json'):-len('```')].strip()
+    elif json_text.strip().startswith('```') and json_text.strip().endswith('```'):
+        json_text = json_text.strip()[len('```'):-len('```')].strip()
+    match = re.search(r'\{(.*?)\}', json_text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+
+def _llm_answer(n_chars: int) -> str:
+    record = json.dumps({"address": ["충청남도 천안시 동남구 대흥동"], "who": "경찰", "when": "3일", "where": "주택", "what": "화재", "other": ""}, ensure_ascii=False)
+    padding = "다음은 요청하신 정보입니다. " * max(1, (n_chars - len(record)) // 17)
+    return f"{padding}\n```json\n{record}\n```\n{padding}"
+
+def run_micro_benchmarks(df_addr: pd.DataFrame, repeat: int = DEFAULT_REPEAT, quick: bool = False) -> list[dict]:
+    """
+    Times the hot functions on synthetic inputs of increasing size.
+
+    Args:
+        df_addr (pd.DataFrame): Raw address table (as in address.parquet.gzip).
+        repeat (int, optional): Runs per measurement. Defaults to DEFAULT_REPEAT.
+        quick (bool, optional): Only the smallest size of each benchmark. Defaults to False.
+
+    Returns:
+        list[dict]: One result per (benchmark, size).
+    """
+    sizes = (lambda values: values[:1]) if quick else (lambda values: values)
+    results = []
+
+    for size in sizes(TABLE_SIZES):
+        table = df_addr.sample(size, replace=size > len(df_addr), random_state=0).reset_index(drop=True)
+        results.append(_result('normalize_address_df', size, 'rows', measure(lambda: normalize_address_df(table), repeat)))
+
+    df_addr_optimized = normalize_address_df(df_addr)
+    # Repeated runs would only measure cache hits; cached_matcher measures those
+    matcher = AddressMatcher(df_addr_optimized, cache_size=0)
+    cached_matcher = AddressMatcher(df_addr_optimized)
+    unique_lv0s = list(df_addr_optimized['lv0'].unique())
+    for size in sizes(QUERY_SIZES):
+        queries = [normalize_rag_address(address) for address in sample_addresses(df_addr, size, seed=size)]
+        results.append(_result('find_matching_address', size, 'queries',
+                               measure(lambda: [matcher.find_matching_address(q) for q in queries], repeat)))
+        results.append(_result('match_many', size, 'queries', measure(lambda: matcher.match_many(queries), repeat)))
+        cached_matcher.match_many(queries)
+        results.append(_result('find_matching_address[cached]', size, 'queries',
+                               measure(lambda: [cached_matcher.find_matching_address(q) for q in queries], repeat)))
+        results.append(_result(f'top_k[k={TOP_K}]', size, 'queries', measure(lambda: [matcher.top_k(q, TOP_K) for q in queries], repeat)))
+        results.append(_result('extract_lv0_from_rag_address', size, 'queries', measure(
+            lambda: [extract_lv0_from_rag_address(q, df_addr_optimized, FUZZY_MATCH_THRESHOLD, unique_lv0s) for q in queries],
+            repeat
+        )))
+
+    extractor = LLMExtractor(llm=FakeLLM())
+    for size in sizes(TEXT_SIZES):
+        text = _messy_text(size)
+        results.append(_result('clean_text', size, 'chars', measure(lambda: clean_text(text), repeat)))
+        results.append(_result('clean_text[legacy]', size, 'chars', measure(lambda: _legacy_clean_text(text), repeat)))
+        indented = _indented_text(size)
+        results.append(_result('clean_text[indented]', size, 'chars', measure(lambda: clean_text(indented), repeat)))
+        results.append(_result('clean_text[indented,legacy]', size, 'chars', measure(lambda: _legacy_clean_text(indented), repeat)))
+        texts = [_messy_text(size // CLEAN_MANY_BATCH + 1, seed) for seed in range(CLEAN_MANY_BATCH)]
+        results.append(_result(f'clean_many[{CLEAN_MANY_BATCH} texts]', size, 'chars', measure(lambda: clean_many(texts), repeat)))
+        answer = _llm_answer(size)
+        results.append(_result('_get_json', size, 'chars', measure(lambda: extractor._get_json(answer), repeat)))
+        results.append(_result('_get_json[legacy]', size, 'chars', measure(lambda: _legacy_get_json(answer), repeat)))
+
+    return results
@@ -0,0 +1,81 @@
+# Standard library imports
+import time
+
+# Third-party library imports
+import pandas as pd
+
+# Local application imports
+from address_pipeline import AddressPipeline
+from address_processor import AddressProcessor
+from geocoder import CachedGeocoder
+from text_utils import clean_many
+from benchmarks.fakes import FakeGeocoder, FakeLLM, make_articles
+
+# --- Constants ---
+DEFAULT_ARTICLES = 200
+# --- End Constants ---
+
+def build_fake_processor(df_addr: pd.DataFrame, llm_latency: float = 0.0, geocode_latency: float = 0.0, **kwargs) -> AddressProcessor:
+    """
+    AddressProcessor with FakeLLM and FakeGeocoder and no on-disk caches,
+    so that it runs offline and every run does the same work.
+    """
+    processor = AddressProcessor(df_addr, offline_geocoding=True, **kwargs)
+    processor.llm_extractor.llm = FakeLLM(llm_latency)
+    processor.geolocator = CachedGeocoder(FakeGeocoder(geocode_latency))
+    return processor
+
+def _result(name: str, articles: int, seconds: float, processor: AddressProcessor, results: list[dict]) -> dict:
+    return {
+        'benchmark': name,
+        'size': articles,
+        'unit': 'articles',
+        'seconds_median': seconds,
+        'seconds_min': seconds,
+        'repeat': 1,
+        'per_item_us': seconds / articles * 1e6 if articles else 0.0,
+        'articles_per_s': articles / seconds if seconds > 0 else 0.0,
+        'matched': sum(1 for result_dict in results if result_dict['matched_full_address_df']),
+        'llm_calls': processor.llm_extractor.llm.calls,
+        'geocoder_calls': processor.geolocator.geolocator.calls,
+    }
+
+def run_pipeline_benchmarks(
+    df_addr: pd.DataFrame,
+    articles: int = DEFAULT_ARTICLES,
+    llm_latency: float = 0.0,
+    geocode_latency: float = 0.0
+) -> list[dict]:
+    """
+    Runs the same synthetic articles through AddressProcessor.process_text
+    one by one, AddressProcessor.process_texts, and AddressPipeline, each
+    with a fresh processor (FakeLLM/FakeGeocoder with the given latencies).
+
+    Returns:
+        list[dict]: One result per mode, with throughput and match counts.
+    """
+    texts = clean_many(make_articles(df_addr, articles))
+    results = []
+
+    processor = build_fake_processor(df_addr, llm_latency, geocode_latency)
+    started = time.perf_counter()
+    outputs = [processor.process_text(text) for text in texts]
+    results.append(_result('pipeline/process_text', articles, time.perf_counter() - started, processor, outputs))
+
+    processor = build_fake_processor(df_addr, llm_latency, geocode_latency)
+    started = time.perf_counter()
+    outputs = processor.process_texts(texts, llm_concurrency=4)
+    results.append(_result('pipeline/process_texts', articles, time.perf_counter() - started, processor, outputs))
+
+    processor = build_fake_processor(df_addr, llm_latency, geocode_latency)
+    pipeline = AddressPipeline(processor)
+    started = time.perf_counter()
+    outputs = list(pipeline.run(enumerate(texts)))
+    results.append(_result('pipeline/AddressPipeline', articles, time.perf_counter() - started, processor, outputs))
+
+    processor = build_fake_processor(df_addr, llm_latency, geocode_latency, extractor_mode='hybrid')
+    started = time.perf_counter()
+    outputs = [processor.process_text(text) for text in texts]
+    results.append(_result('pipeline/process_text[hybrid]', articles, time.perf_counter() - started, processor, outputs))
+
+    return results
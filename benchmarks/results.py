@@ -0,0 +1,74 @@
+# Standard library imports
+import json
+import os
+import platform
+import subprocess
+import sys
+
+# Local application imports
+from text_utils import get_timestamp
+
+# --- Constants ---
+RESULTS_DIRECTORY = 'benchmarks/results/'
+# --- End Constants ---
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(results: list[dict], output_path: str | None = None, settings: dict | None = None) -> str:
+    """
+    Writes benchmark results with the commit and environment they were
+    measured on, so that files from different commits can be compared.
+
+    Returns:
+        str: Path of the written JSON file.
+    """
+    timestamp = get_timestamp()
+    if output_path is None:
+        os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIRECTORY, f"benchmark_{timestamp}.json")
+    document = {
+        'meta': {
+            'timestamp': timestamp,
+            'git_commit': _git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'settings': settings or {},
+        },
+        'results': results,
+    }
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=4, ensure_ascii=False)
+    return output_path
+
+def load_results(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def compare_results(baseline_path: str, candidate_path: str) -> list[dict]:
+    """
+    Pairs up the (benchmark, size) entries of two result files.
+
+    Returns:
+        list[dict]: Per entry, both median times and candidate/baseline
+        ratio (below 1 means the candidate is faster).
+    """
+    baseline = {(r['benchmark'], r['size']): r for r in load_results(baseline_path)['results']}
+    rows = []
+    for result in load_results(candidate_path)['results']:
+        key = (result['benchmark'], result['size'])
+        if key not in baseline:
+            continue
+        before = baseline[key]['seconds_median']
+        after = result['seconds_median']
+        rows.append({
+            'benchmark': key[0],
+            'size': key[1],
+            'baseline_s': before,
+            'candidate_s': after,
+            'ratio': after / before if before > 0 else float('inf'),
+        })
+    return rows
@@ -0,0 +1,99 @@
+# Standard library imports
+import glob
+import json
+import logging
+import os
+from typing import Hashable
+
+# Third-party library imports
+import pandas as pd
+
+# --- Constants ---
+SEGMENT_PATTERN = 'segment_*.jsonl'
+# --- End Constants ---
+
+def _to_json_value(value):
+    """
+    json.dumps fallback for numpy/pandas scalars found in result dicts.
+    """
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class CheckpointWriter:
+    """
+    Append-only checkpoint: every result is written once, as one JSON line,
+    to a new segment file in checkpoint_dir. Checkpoint cost is O(new
+    results) instead of re-serializing everything accumulated so far.
+    """
+
+    def __init__(self, checkpoint_dir: str, segment_name: str):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.path = os.path.join(checkpoint_dir, f"segment_{segment_name}.jsonl")
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.written = 0
+
+    def append(self, result_dict: dict) -> None:
+        self._file.write(json.dumps(result_dict, ensure_ascii=False, default=_to_json_value))
+        self._file.write('\n')
+        self.written += 1
+
+    def flush(self) -> None:
+        """
+        Pushes buffered lines to disk (called at each checkpoint).
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def load_checkpoint(checkpoint_dir: str) -> dict[Hashable, dict]:
+    """
+    Reads every segment in checkpoint_dir and returns the results keyed by
+    article index (later segments win). A truncated last line, left by a
+    crash mid-write, is skipped.
+
+    Args:
+        checkpoint_dir: Directory holding segment_*.jsonl files.
+
+    Returns:
+        Results keyed by their 'index' value; empty if there is no checkpoint.
+    """
+    results = {}
+    for segment_path in sorted(glob.glob(os.path.join(checkpoint_dir, SEGMENT_PATTERN))):
+        with open(segment_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    result_dict = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning("Skipping unreadable line %d in '%s'", line_number, segment_path)
+                    continue
+                results[result_dict['index']] = result_dict
+    return results
+
+def merge_checkpoint(checkpoint_dir: str, output_path: str) -> pd.DataFrame:
+    """
+    Merges all checkpoint segments into one parquet file sorted by index.
+
+    Args:
+        checkpoint_dir: Directory holding segment_*.jsonl files.
+        output_path: Destination parquet file (gzip-compressed).
+
+    Returns:
+        The merged results DataFrame.
+    """
+    results = load_checkpoint(checkpoint_dir)
+    results_df = pd.DataFrame([results[index] for index in sorted(results)])
+    results_df.to_parquet(output_path, compression='gzip')
+    return results_df
@@ -0,0 +1,87 @@
+# Standard library imports
+import math
+import re
+from typing import Callable
+
+# Local application imports
+from gazetteer import Gazetteer
+
+# --- Constants ---
+DEFAULT_TOKEN_BUDGET = 512
+CHARS_PER_TOKEN = 1.5 # Rough average for Korean news text with Gemma's tokenizer
+# Words that tend to sit next to an address in Korean news
+LOCATION_KEYWORDS = ['주소', '소재', '위치', '일대', '인근', '부근', '현장', '발생', '에서']
+PLACE_WEIGHT = 2 # Score per place name found in a sentence
+KEYWORD_WEIGHT = 1 # Score per location keyword found in a sentence
+LEAD_BONUS = 1 # The lead sentence usually carries who/when/what
+SENTENCE_PATTERN = re.compile(r'[^\n.!?]+(?:[.!?]+|\n|$)')
+# --- End Constants ---
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximates the number of LLM tokens in text without a tokenizer.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Splits text at sentence-final punctuation and line breaks.
+    """
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.findall(text) if sentence.strip()]
+
+class ContextBuilder:
+    """
+    Builds the LLM context from the sentences most likely to hold location
+    information, within a token budget.
+
+    Sentences are ranked by the place names they mention (from the address
+    table's gazetteer, if given) and by LOCATION_KEYWORDS; the best ones are
+    kept until token_budget is used up and joined in their original order.
+    Articles that already fit the budget are passed through unchanged.
+    """
+
+    def __init__(
+        self,
+        gazetteer: Gazetteer | None = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        keywords: list[str] | None = None,
+        token_counter: Callable[[str], int] = estimate_tokens
+    ):
+        self.gazetteer = gazetteer
+        self.token_budget = token_budget
+        self.keywords = LOCATION_KEYWORDS if keywords is None else keywords
+        self.token_counter = token_counter
+
+    def _score(self, sentence: str) -> int:
+        score = sum(KEYWORD_WEIGHT for keyword in self.keywords if keyword in sentence)
+        if self.gazetteer is not None:
+            score += PLACE_WEIGHT * len(self.gazetteer.find(sentence))
+        return score
+
+    def build(self, text: str) -> str:
+        """
+        Returns the context for text: text itself if it fits the token
+        budget, otherwise its highest-ranked sentences that fit.
+        """
+        if self.token_counter(text) <= self.token_budget:
+            return text
+
+        sentences = split_sentences(text)
+        scores = [self._score(sentence) for sentence in sentences]
+        if scores:
+            scores[0] += LEAD_BONUS
+
+        # Best score first, earlier sentence first among equals
+        selected = []
+        used = 0
+        for position in sorted(range(len(sentences)), key=lambda i: (-scores[i], i)):
+            tokens = self.token_counter(sentences[position])
+            if used + tokens > self.token_budget:
+                continue
+            selected.append(position)
+            used += tokens
+
+        if not selected:
+            # Not even one sentence fits: keep the start of the article
+            return text[:int(self.token_budget * CHARS_PER_TOKEN)]
+        return "\n".join(sentences[position] for position in sorted(selected))
@@ -0,0 +1,93 @@
+# Standard library imports
+from typing import Hashable, Iterator
+
+# Third-party library imports
+import pyarrow.parquet as pq
+
+# --- Constants ---
+DEFAULT_BATCH_SIZE = 1024
+# --- End Constants ---
+
+def corpus_length(path: str) -> int:
+    """
+    Returns the number of rows in a parquet file from its footer metadata.
+    """
+    return pq.ParquetFile(path).metadata.num_rows
+
+def _index_spec(parquet_file: pq.ParquetFile) -> str | dict | None:
+    """
+    Returns how the pandas index was stored: a column name, a RangeIndex
+    description (dict with start/step), or None if there is no pandas metadata.
+    """
+    pandas_metadata = parquet_file.schema_arrow.pandas_metadata
+    if not pandas_metadata or len(pandas_metadata.get('index_columns', [])) != 1:
+        return None
+    return pandas_metadata['index_columns'][0]
+
+def iter_corpus(
+    path: str,
+    start_index: int = 0,
+    end_index: int | None = None,
+    column: str = 'content',
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[tuple[Hashable, str | None]]:
+    """
+    Streams (index, text) pairs for rows [start_index, end_index) of a parquet
+    corpus without loading it into memory.
+
+    Only the text column (and the stored pandas index, if any) is read, and
+    only from the row groups overlapping the requested range, in record
+    batches of batch_size rows, so memory use does not depend on corpus size.
+
+    Args:
+        path (str): Parquet file, e.g. 'data/sample.parquet.gzip'.
+        start_index (int, optional): First row position. Defaults to 0.
+        end_index (int | None, optional): Row position to stop before. Defaults to the end of the file.
+        column (str, optional): Text column to read. Defaults to 'content'.
+        batch_size (int, optional): Rows per record batch. Defaults to DEFAULT_BATCH_SIZE.
+
+    Yields:
+        tuple: (index label, text or None).
+    """
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    end_index = metadata.num_rows if end_index is None else min(end_index, metadata.num_rows)
+    if start_index >= end_index:
+        return
+
+    index_spec = _index_spec(parquet_file)
+    columns = [column]
+    if isinstance(index_spec, str):
+        columns.append(index_spec)
+
+    # Locate the row groups overlapping [start_index, end_index)
+    row_groups = []
+    first_row = None
+    offset = 0
+    for i in range(metadata.num_row_groups):
+        num_rows = metadata.row_group(i).num_rows
+        if offset + num_rows > start_index and offset < end_index:
+            row_groups.append(i)
+            if first_row is None:
+                first_row = offset
+        offset += num_rows
+
+    position = first_row
+    for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=columns):
+        batch_start = max(start_index - position, 0)
+        batch_stop = min(end_index - position, batch.num_rows)
+        if batch_stop > batch_start:
+            texts = batch.column(column).slice(batch_start, batch_stop - batch_start).to_pylist()
+            if isinstance(index_spec, str):
+                labels = batch.column(index_spec).slice(batch_start, batch_stop - batch_start).to_pylist()
+            elif isinstance(index_spec, dict) and index_spec.get('kind') == 'range':
+                first = position + batch_start
+                labels = range(index_spec['start'] + first * index_spec['step'],
+                               index_spec['start'] + (first + len(texts)) * index_spec['step'],
+                               index_spec['step'])
+            else:
+                labels = range(position + batch_start, position + batch_stop)
+            yield from zip(labels, texts)
+        position += batch.num_rows
+        if position >= end_index:
+            break
@@ -0,0 +1,136 @@
+# Standard library imports
+import threading
+from collections import defaultdict
+
+# Third-party library imports
+import numpy as np
+import pandas as pd
+
+# Local application imports
+from address_utils import strip_address_postfixes
+from gazetteer import AhoCorasick, Gazetteer, MIN_PATTERN_LENGTH
+
+# --- Constants ---
+# Hierarchy slots: lv0 and lv1 name the same province ('충남' / '충청남도')
+SLOTS = [('lv0', 'lv1'), ('lv2',), ('lv3',), ('lv4',)]
+DEFAULT_MIN_LEVELS = 2 # A lone name (e.g. '중구') is left to the LLM
+FOUND = 'found'
+AMBIGUOUS = 'ambiguous'
+NOT_FOUND = 'not_found'
+EMPTY_RESULT = {"address": None, "who": None, "when": None, "where": None, "what": None, "other": None}
+# --- End Constants ---
+
+class DictionaryExtractor:
+    """
+    Finds hierarchical lv0->lv4 mentions directly in the article text, with
+    the address table's names in an Aho-Corasick automaton, as a fast
+    alternative to LLMExtractor.
+
+    Every table row is scored by how many hierarchy levels (see SLOTS) it has
+    mentioned in the text. The best rows must reach min_levels and agree on
+    all mentioned levels; the result is then the table's names for those
+    levels, e.g. '충청남도 천안시 동남구 대흥동', in LLMExtractor's JSON shape.
+    """
+
+    def __init__(
+        self,
+        df_addr_optimized: pd.DataFrame,
+        gazetteer: Gazetteer | None = None,
+        min_levels: int = DEFAULT_MIN_LEVELS
+    ):
+        self.min_levels = min_levels
+        self._columns = [col for slot in SLOTS for col in slot if col in df_addr_optimized.columns]
+
+        # Per column: integer code of each row, the distinct values, and the
+        # codes each name (value, token or stripped form) refers to
+        self._codes = {}
+        self._values = {}
+        self._names = defaultdict(list) # name -> [(column, code), ...]
+        for col in self._columns:
+            codes, values = pd.factorize(df_addr_optimized[col].astype(object).fillna(''))
+            self._codes[col] = codes.astype(np.int32)
+            self._values[col] = [str(value) for value in values]
+            for code, value in enumerate(self._values[col]):
+                value = value.strip()
+                if not value:
+                    continue
+                names = set()
+                for name in [value] + value.split():
+                    names.add(name)
+                    names.add(strip_address_postfixes(name))
+                for name in names:
+                    if len(name) >= MIN_PATTERN_LENGTH:
+                        self._names[name].append((col, code))
+
+        if gazetteer is not None and set(self._names) <= gazetteer.patterns:
+            self.automaton = gazetteer.automaton
+        else:
+            self.automaton = AhoCorasick(sorted(self._names))
+
+        self.counts = {FOUND: 0, AMBIGUOUS: 0, NOT_FOUND: 0}
+        self._lock = threading.Lock()
+
+    def _mentions(self, text: str) -> dict[str, set[int]]:
+        """
+        Returns the mentioned codes per column. A name only counts when it
+        starts a word, so '남구' inside '강남구' or '삼동' inside '역삼동' is ignored.
+        """
+        mentioned = defaultdict(set)
+        for end, name in self.automaton.iter_matches(text):
+            start = end - len(name) + 1
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            for col, code in self._names.get(name, ()):
+                mentioned[col].add(code)
+        return mentioned
+
+    def extract(self, text: str) -> tuple[str, dict | None]:
+        """
+        Returns (status, result) where status is FOUND, AMBIGUOUS or NOT_FOUND
+        and result is {"address": ..., ...} (only set when FOUND).
+        """
+        mentioned = self._mentions(text)
+        status, address = NOT_FOUND, None
+        if mentioned:
+            # Which slots each row has mentioned, and how many
+            slot_masks = []
+            for slot in SLOTS:
+                mask = None
+                for col in slot:
+                    if col in mentioned:
+                        col_mask = np.isin(self._codes[col], list(mentioned[col]))
+                        mask = col_mask if mask is None else mask | col_mask
+                slot_masks.append(mask)
+            scores = sum(mask.astype(np.int8) for mask in slot_masks if mask is not None)
+            best_score = int(scores.max())
+
+            if best_score >= self.min_levels:
+                best_rows = np.flatnonzero(scores == best_score)
+                # Each best row names its mentioned levels with its own values
+                # (the full name of the slot, e.g. lv1 for the province); -1
+                # marks a level the row does not have mentioned
+                named = np.stack([
+                    np.where(mask[best_rows], self._codes[slot[-1]][best_rows], -1)
+                    for slot, mask in zip(SLOTS, slot_masks) if mask is not None
+                ], axis=1)
+                distinct = np.unique(named, axis=0)
+                if len(distinct) == 1:
+                    mentioned_slots = [slot for slot, mask in zip(SLOTS, slot_masks) if mask is not None]
+                    parts = [self._values[slot[-1]][code] for slot, code in zip(mentioned_slots, distinct[0]) if code >= 0]
+                    status, address = FOUND, " ".join(part for part in parts if part)
+                else:
+                    status = AMBIGUOUS
+
+        with self._lock:
+            self.counts[status] += 1
+        return status, ({**EMPTY_RESULT, "address": address} if status == FOUND else None)
+
+    def extract_info(self, text: str) -> dict | None:
+        """
+        Same contract as LLMExtractor.extract_info: parsed JSON data, or None.
+        """
+        return self.extract(text)[1]
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        return {**self.counts, 'found_rate': self.counts[FOUND] / total if total else 0.0}
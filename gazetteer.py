@@ -0,0 +1,248 @@
+# Standard library imports
+import threading
+from collections import deque
+from typing import Iterable
+
+# Third-party library imports
+import pandas as pd
+
+# Local application imports
+from address_utils import strip_address_postfixes
+
+# --- Constants ---
+LEVEL_COLUMNS = ['lv0', 'lv1', 'lv2', 'lv3', 'lv4']
+MIN_PATTERN_LENGTH = 2 # Single syllables (e.g. '동') would match almost every article
+NO_CANDIDATE = 'no_candidate'
+CANDIDATE = 'candidate'
+# --- End Constants ---
+
+def gazetteer_patterns(df_addr_optimized: pd.DataFrame, min_length: int = MIN_PATTERN_LENGTH) -> set[str]:
+    """
+    Collects the place names to scan for: every lv0-lv4 value, each
+    space-separated token of it (e.g. '천안시 동남구' -> '천안시', '동남구'),
+    and the postfix-stripped form the matcher uses (e.g. '서울특별시' -> '서울').
+
+    Args:
+        df_addr_optimized (pd.DataFrame): Output of normalize_address_df.
+        min_length (int, optional): Shorter names are dropped. Defaults to MIN_PATTERN_LENGTH.
+
+    Returns:
+        set[str]: Distinct patterns.
+    """
+    patterns = set()
+    for col in LEVEL_COLUMNS:
+        if col not in df_addr_optimized.columns:
+            continue
+        for value in df_addr_optimized[col].dropna().unique():
+            value = str(value).strip()
+            if not value:
+                continue
+            for name in [value] + value.split():
+                patterns.add(name)
+                patterns.add(strip_address_postfixes(name))
+    return {pattern for pattern in patterns if len(pattern) >= min_length}
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton: finds every occurrence of a fixed set of
+    patterns in one left-to-right pass over the text, in O(len(text) +
+    number of matches) regardless of how many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        # Node 0 is the root; each node has goto transitions, a failure link
+        # and the patterns ending at it (including those inherited through
+        # its failure link).
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern: str) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] = self._output[node] + (pattern,)
+
+    def _build_failure_links(self) -> None:
+        # Breadth-first, so every failure target is final before it is used;
+        # depth-1 nodes keep their failure link to the root.
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+                pending.append(child)
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter_matches(self, text: str):
+        """
+        Yields (end position, pattern) for every occurrence in text.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern in output[node]:
+                yield position, pattern
+
+    def contains_any(self, text: str) -> bool:
+        """
+        Returns True as soon as any pattern occurs in text.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                return True
+        return False
+
+class Gazetteer:
+    """
+    Dictionary pre-filter for the LLM: an article that mentions none of the
+    place names in the address table cannot yield a matchable address, so
+    the (slow) LLM call is skipped and the article is recorded as NO_CANDIDATE.
+    """
+
+    def __init__(
+        self,
+        df_addr_optimized: pd.DataFrame | None,
+        min_length: int = MIN_PATTERN_LENGTH,
+        patterns: Iterable[str] | None = None
+    ):
+        """
+        Args:
+            df_addr_optimized (pd.DataFrame | None): Output of
+                normalize_address_df; only read when patterns is None.
+            min_length (int, optional): See gazetteer_patterns. Defaults to MIN_PATTERN_LENGTH.
+            patterns (Iterable[str] | None, optional): Prebuilt
+                gazetteer_patterns (e.g. loaded by address_store), collected
+                from df_addr_optimized when None.
+        """
+        self.patterns = set(patterns) if patterns is not None else gazetteer_patterns(df_addr_optimized, min_length)
+        self.automaton = AhoCorasick(sorted(self.patterns))
+        self.scanned = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def find(self, text: str) -> list[str]:
+        """
+        Returns the distinct place names found in text, in order of appearance.
+        """
+        return list(dict.fromkeys(pattern for _, pattern in self.automaton.iter_matches(text)))
+
+    def has_candidate(self, text: str) -> bool:
+        return self.automaton.contains_any(text)
+
+    def check(self, text: str) -> str:
+        """
+        Classifies text as CANDIDATE or NO_CANDIDATE and counts it towards the skip rate.
+        """
+        candidate = self.has_candidate(text)
+        with self._lock:
+            self.scanned += 1
+            if not candidate:
+                self.skipped += 1
+        return CANDIDATE if candidate else NO_CANDIDATE
+
+    def stats(self) -> dict:
+        return {
+            'patterns': len(self.patterns),
+            'scanned': self.scanned,
+            'skipped': self.skipped,
+            'skip_rate': self.skipped / self.scanned if self.scanned else 0.0,
+        }
+
+def evaluate_recall(gazetteer: Gazetteer, labeled_results: Iterable[dict], label_field: str = 'matched_full_address_df') -> dict:
+    """
+    Compares the pre-filter's decisions with full LLM runs. Each labeled
+    result is a result_dict produced without the pre-filter (e.g. from
+    checkpoint.load_checkpoint); it is positive when label_field is set,
+    i.e. the LLM found an address that matched the table.
+
+    Args:
+        gazetteer (Gazetteer): Pre-filter to evaluate (its skip counters are not touched).
+        labeled_results (Iterable[dict]): Result dicts with 'original_text' and label_field.
+        label_field (str, optional): Field whose presence marks a positive. Defaults to 'matched_full_address_df'.
+
+    Returns:
+        dict: Recall on positives, overall skip rate, and the indices of missed positives.
+    """
+    total = positives = kept_positives = skipped = 0
+    missed = []
+    for position, result_dict in enumerate(labeled_results):
+        total += 1
+        candidate = gazetteer.has_candidate(result_dict['original_text'] or '')
+        if not candidate:
+            skipped += 1
+        if pd.notna(result_dict.get(label_field)) and result_dict.get(label_field):
+            positives += 1
+            if candidate:
+                kept_positives += 1
+            else:
+                missed.append(result_dict.get('index', position))
+    return {
+        'samples': total,
+        'positives': positives,
+        'recall': kept_positives / positives if positives else 1.0,
+        'skip_rate': skipped / total if total else 0.0,
+        'missed_indices': missed,
+    }
+
+def compare_runs(labeled_results: dict, prefiltered_results: dict, label_field: str = 'matched_full_address_df') -> dict:
+    """
+    Compares a run with the pre-filter against a full LLM run of the same
+    articles (both keyed by article index, e.g. from checkpoint.load_checkpoint).
+    Unlike evaluate_recall, the pre-filter's recorded decisions are used, so
+    the two runs may have used different address tables or patterns.
+
+    Args:
+        labeled_results (dict): Result dicts of the run without the pre-filter.
+        prefiltered_results (dict): Result dicts of the run with it ('prefilter' set).
+        label_field (str, optional): Field whose presence marks a positive. Defaults to 'matched_full_address_df'.
+
+    Returns:
+        dict: Articles in both runs, recall on positives, skip rate, and the
+            indices of missed positives.
+    """
+    total = positives = kept_positives = skipped = 0
+    missed = []
+    for index in sorted(labeled_results.keys() & prefiltered_results.keys(), key=str):
+        total += 1
+        candidate = prefiltered_results[index].get('prefilter') != NO_CANDIDATE
+        if not candidate:
+            skipped += 1
+        label = labeled_results[index].get(label_field)
+        if pd.notna(label) and label:
+            positives += 1
+            if candidate:
+                kept_positives += 1
+            else:
+                missed.append(index)
+    return {
+        'samples': total,
+        'positives': positives,
+        'recall': kept_positives / positives if positives else 1.0,
+        'skip_rate': skipped / total if total else 0.0,
+        'missed_indices': missed,
+    }
@@ -0,0 +1,163 @@
+# Standard library imports
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+# Third-party library imports
+import pandas as pd
+
+# --- Constants ---
+CACHE_FILENAME = 'geocodes.sqlite3'
+DEFAULT_NEGATIVE_TTL = 30 * 24 * 3600 # Seconds before a cached miss is retried
+# --- End Constants ---
+
+class GeocodeResult(NamedTuple):
+    """
+    Minimal stand-in for geopy's Location (latitude, longitude, address).
+    """
+    latitude: float
+    longitude: float
+    address: str
+
+class GeocodeCache:
+    """
+    Persistent geocode cache keyed on the query (display) string.
+
+    Misses are cached too (negative caching) and expire after negative_ttl
+    seconds so that they are eventually retried; hits never expire.
+    """
+
+    def __init__(self, cache_dir: str = 'cache/', negative_ttl: float | None = DEFAULT_NEGATIVE_TTL):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILENAME)
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocodes ("
+                "query TEXT PRIMARY KEY, latitude REAL, longitude REAL, address TEXT, "
+                "created_at REAL NOT NULL)"
+            )
+
+    def get(self, query: str) -> tuple[bool, GeocodeResult | None]:
+        """
+        Returns (found, result). found is False when the query has never been
+        resolved (or its cached miss expired); result is None for a cached miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT latitude, longitude, address, created_at FROM geocodes WHERE query = ?", (query,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            latitude, longitude, address, created_at = row
+            if latitude is None:
+                if self.negative_ttl is not None and time.time() - created_at > self.negative_ttl:
+                    self.misses += 1
+                    return False, None
+                self.negative_hits += 1
+                return True, None
+            self.hits += 1
+        return True, GeocodeResult(latitude, longitude, address)
+
+    def put(self, query: str, result) -> None:
+        """
+        Stores a geocode result (anything with latitude/longitude/address), or
+        a miss when result is None.
+        """
+        if result is None:
+            values = (query, None, None, None, time.time())
+        else:
+            values = (query, result.latitude, result.longitude, result.address, time.time())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocodes (query, latitude, longitude, address, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                values
+            )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+class OfflineGeocoder:
+    """
+    Resolves coordinates from a local lat/lon table without any network call.
+
+    df_coords holds lv0-lv4 plus 'latitude' and 'longitude' columns; it is
+    joined to the normalized address table on lv0-lv4, and lookups are by
+    the resulting 'full_address'.
+    """
+
+    def __init__(self, df_coords: pd.DataFrame, df_addr_optimized: pd.DataFrame):
+        level_cols = ['lv0', 'lv1', 'lv2', 'lv3', 'lv4']
+        left = df_addr_optimized[level_cols + ['full_address']].astype({col: str for col in level_cols})
+        right = df_coords[level_cols + ['latitude', 'longitude']].fillna({col: '' for col in level_cols})
+        right = right.astype({col: str for col in level_cols}).dropna(subset=['latitude', 'longitude'])
+        joined = left.merge(right, on=level_cols, how='inner').drop_duplicates('full_address')
+        self._coords = {
+            full_address: GeocodeResult(float(latitude), float(longitude), full_address)
+            for full_address, latitude, longitude in zip(joined['full_address'], joined['latitude'], joined['longitude'])
+        }
+        self.hits = 0
+        self.misses = 0
+        logging.debug("OfflineGeocoder loaded %d coordinates", len(self._coords))
+
+    def geocode(self, full_address: str) -> GeocodeResult | None:
+        result = self._coords.get(full_address)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def stats(self) -> dict:
+        return {'entries': len(self._coords), 'hits': self.hits, 'misses': self.misses}
+
+class CachedGeocoder:
+    """
+    Wraps a geopy-style geocoder with a GeocodeCache; only cache misses hit
+    the network. geolocator may be None for offline runs (misses then stay
+    unresolved and are not cached).
+    """
+
+    def __init__(self, geolocator, cache: GeocodeCache | None = None):
+        self.geolocator = geolocator
+        self.cache = cache
+        self.network_calls = 0
+
+    def geocode(self, query: str):
+        if self.cache is not None:
+            found, result = self.cache.get(query)
+            if found:
+                return result
+        if self.geolocator is None:
+            return None
+
+        self.network_calls += 1
+        location = self.geolocator.geocode(query)
+        if self.cache is not None:
+            self.cache.put(query, location)
+        return location
+
+    def stats(self) -> dict:
+        stats = {'network_calls': self.network_calls}
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
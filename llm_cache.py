@@ -0,0 +1,104 @@
+# Standard library imports
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- Constants ---
+CACHE_FILENAME = 'llm_results.sqlite3'
+DEFAULT_MAX_ENTRIES = 100_000
+EVICTION_FRACTION = 0.1 # Share of max_entries evicted at once when full
+# --- End Constants ---
+
+class LLMResultCache:
+    """
+    Persistent, size-bounded cache of parsed LLM extraction results.
+
+    Entries live in a SQLite database under cache_dir and are evicted least
+    recently used first once max_entries is exceeded. Keys are content hashes
+    built with make_key, so a changed model or prompt never hits old entries.
+    """
+
+    def __init__(self, cache_dir: str = 'cache/', max_entries: int = DEFAULT_MAX_ENTRIES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILENAME)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, prompt_template: str, question: str, text: str) -> str:
+        """
+        Returns the SHA-256 hex digest identifying one extraction request.
+        """
+        digest = hashlib.sha256()
+        for part in (model, prompt_template, question, text):
+            encoded = part.encode('utf-8')
+            # Length-prefix each part so that part boundaries are unambiguous
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        """
+        Returns the cached result for key, or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict) -> None:
+        """
+        Stores value under key, evicting the least recently used entries if
+        the cache grows beyond max_entries.
+        """
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock, self._conn:
+            exists = self._conn.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, last_access) VALUES (?, ?, ?)",
+                (key, serialized, time.time())
+            )
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                n_evict = self._count - self.max_entries + int(self.max_entries * EVICTION_FRACTION)
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY last_access LIMIT ?)",
+                    (n_evict,)
+                )
+                self._count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current number of entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self._count,
+            'max_entries': self.max_entries,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
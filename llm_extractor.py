@@ -1,17 +1,56 @@
 # Standard library imports
-import json
-import re
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Hashable, Iterable
 
 # Langchain specific imports
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_ollama import OllamaLLM
 from langchain_core.prompts import PromptTemplate
 
+# Local application imports
+from llm_cache import LLMResultCache, DEFAULT_MAX_ENTRIES
+from context_builder import ContextBuilder
+from text_utils import extract_json, extract_json_array
+
+# --- Constants ---
+DEFAULT_MAX_CONCURRENCY = 4 # In-flight requests to the Ollama server
+DEFAULT_REQUEST_TIMEOUT = 120 # Seconds per LLM request
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 1.0 # Doubled after every failed attempt
+DEFAULT_BATCH_SIZE = 1 # Articles per prompt; 1 disables batching
+# --- End Constants ---
+
+_EXHAUSTED = object() # anext default marking the end of the items
+
+async def _aiter_items(items: Iterable | AsyncIterable) -> AsyncIterator:
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
 class LLMExtractor:
-    def __init__(self, model: str = 'gemma3:1b'):
+    def __init__(
+        self,
+        model: str = 'gemma3:1b',
+        cache_dir: str | None = None,
+        cache_max_entries: int = DEFAULT_MAX_ENTRIES,
+        llm=None,
+        context_builder: ContextBuilder | None = None
+    ):
         self.model = model
-        self.llm = OllamaLLM(model=self.model)
+        # Any LangChain-style LLM (invoke/ainvoke) can be injected, e.g. a local stub
+        self.llm = llm if llm is not None else OllamaLLM(model=self.model)
+        # Optional on-disk cache of parsed results (disabled when cache_dir is None)
+        self.cache = LLMResultCache(cache_dir, cache_max_entries) if cache_dir else None
+        # Trims each article to its most location-relevant sentences within a token budget
+        self.context_builder = context_builder if context_builder is not None else ContextBuilder()
+        self._prompt_counts = {'prompts': 0, 'articles': 0, 'tokens_before': 0, 'tokens_after': 0, 'chars_before': 0, 'chars_after': 0, 'parse_failures': 0}
+        self._prompt_lock = threading.Lock()
         self.prompt_template = PromptTemplate(
             template="""<s>[INST] Given the context - {context} </s>[INST] [INST] Answer the following question - {question}[/INST]""",
             input_variables=["context", "question"]
@@ -21,31 +60,332 @@ class LLMExtractor:
 - 기타 모든 지역 정보를 찾을 것.
 - 가장 중요한 정보는 '주소' 정보를 찾는 것.
 - 주소명과 주소명 사이는 띄어서 표시할 것.
-- 주소가 여러개일 경우 한칸 띄어서 표시할 것.
+- 주소가 여러개일 경우 주소마다 따로 "address" 리스트에 담을 것.
 - 다음과 같은 json 포맷으로 답할 것.
-- {"address": "", "who": "", "when": "", "where": "", "what": "", "other": ""}
+- {"address": [""], "who": "", "when": "", "where": "", "what": "", "other": ""}
+"""
+        # Several articles per prompt (see extract_batch)
+        self.batch_ret_prompt = """
+- 여러 기사가 [기사 번호]로 구분되어 있음.
+- 기사마다 '주소', '누가', '언제', '어디서', '무엇을' 정보를 찾을 것.
+- 기타 모든 지역 정보를 찾을 것.
+- 가장 중요한 정보는 '주소' 정보를 찾는 것.
+- 주소명과 주소명 사이는 띄어서 표시할 것.
+- 주소가 여러개일 경우 주소마다 따로 "address" 리스트에 담을 것.
+- 기사마다 하나씩, 기사 번호를 "id"로 하는 다음과 같은 json 배열로 답할 것.
+- [{"id": 0, "address": [""], "who": "", "when": "", "where": "", "what": "", "other": ""}]
 """
 
-    def extract_info(self, text: str) -> dict | None:
-        doc = Document(page_content=text, metadata={"source": "local"})
+    def _cache_key(self, context: str) -> str:
+        # Keyed on the built context: articles trimmed to the same sentences share an entry
+        return LLMResultCache.make_key(self.model, self.prompt_template.template, self.ret_prompt, context)
+
+    def _batch_cache_key(self, context: str) -> str:
+        return LLMResultCache.make_key(self.model, self.prompt_template.template, self.batch_ret_prompt, context)
+
+    def _record_prompt(self, prompt: str, texts: list[str], contexts: list[str]) -> None:
+        """
+        Records the size of prompt against the prompt the untrimmed texts
+        would have produced.
+        """
+        counter = self.context_builder.token_counter
+        tokens_after = counter(prompt)
+        with self._prompt_lock:
+            self._prompt_counts['prompts'] += 1
+            self._prompt_counts['articles'] += len(texts)
+            self._prompt_counts['chars_before'] += len(prompt) - sum(map(len, contexts)) + sum(map(len, texts))
+            self._prompt_counts['chars_after'] += len(prompt)
+            self._prompt_counts['tokens_before'] += tokens_after - sum(map(counter, contexts)) + sum(map(counter, texts))
+            self._prompt_counts['tokens_after'] += tokens_after
+
+    def _record_parse_failures(self, count: int) -> None:
+        if count:
+            with self._prompt_lock:
+                self._prompt_counts['parse_failures'] += count
+
+    def _build_prompt(self, text: str, context: str) -> str:
+        prompt = self.prompt_template.format(context=context, question=self.ret_prompt)
+        self._record_prompt(prompt, [text], [context])
+        return prompt
+
+    def _build_batch_prompt(self, pending: list[tuple]) -> str:
+        """
+        Packs the pending (index, text, context, cache_key) articles into one
+        prompt; within it, articles are numbered by their position in pending.
+        """
+        context = "\n\n".join(f"[기사 {batch_id}]\n{article_context}" for batch_id, (_, _, article_context, _) in enumerate(pending))
+        prompt = self.prompt_template.format(context=context, question=self.batch_ret_prompt)
+        self._record_prompt(prompt, [text for _, text, _, _ in pending], [article_context for _, _, article_context, _ in pending])
+        return prompt
+
+    def prompt_stats(self) -> dict:
+        """
+        Returns the total prompt size sent to the LLM, before and after
+        context trimming (tokens are estimates), and the number of answers
+        (or batch records) that could not be parsed as JSON.
+        """
+        with self._prompt_lock:
+            counts = dict(self._prompt_counts)
+        counts['token_reduction'] = 1 - counts['tokens_after'] / counts['tokens_before'] if counts['tokens_before'] else 0.0
+        return counts
+
+    def _prepare_batch(self, items: list[tuple[Hashable, str]]) -> tuple[dict, list[tuple]]:
+        """
+        Returns the cached results keyed by article index, and the
+        (index, text, context, cache_key) tuples still to be extracted.
+        """
+        results = {}
+        pending = []
+        for index, text in items:
+            context = self.context_builder.build(text)
+            cache_key = self._batch_cache_key(context) if self.cache is not None else None
+            cached = self.cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, text, context, cache_key))
+        return results, pending
+
+    def _finish_batch(self, raw_result: str, pending: list[tuple]) -> tuple[dict, list[tuple[Hashable, str]]]:
+        """
+        Maps the records of a batch answer back to their articles by id.
+
+        Returns:
+            tuple: (results keyed by article index, (index, text) of the
+            articles whose record is missing or unusable).
+        """
+        records_by_id = {}
+        for record in self._get_json_array(raw_result) or []:
+            if isinstance(record, dict) and 'id' in record:
+                records_by_id.setdefault(str(record['id']).strip(), record)
+
+        results = {}
+        failed = []
+        for batch_id, (index, text, _, cache_key) in enumerate(pending):
+            record = records_by_id.get(str(batch_id))
+            if record is None:
+                failed.append((index, text))
+                continue
+            json_data = {key: value for key, value in record.items() if key != 'id'}
+            if cache_key is not None:
+                self.cache.put(cache_key, json_data)
+            results[index] = json_data
+        self._record_parse_failures(len(failed))
+        return results, failed
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, chunk_overlap=50)
-        texts = text_splitter.split_documents([doc])
+    def _parse_and_cache(self, raw_result: str, cache_key: str | None) -> dict | None:
+        json_data = self._get_json(raw_result)
+        if json_data is None:
+            self._record_parse_failures(1)
 
-        # Combine the texts into a single context string
-        context = "\n\n".join([t.page_content for t in texts])
+        # Parse failures are not cached so that they are retried on the next run
+        if cache_key is not None and json_data is not None:
+            self.cache.put(cache_key, json_data)
+        return json_data
+
+    def _lookup_cache(self, context: str) -> tuple[str | None, dict | None]:
+        if self.cache is None:
+            return None, None
+        cache_key = self._cache_key(context)
+        return cache_key, self.cache.get(cache_key)
 
-        # Format the prompt with the context and question
-        formatted_prompt = self.prompt_template.format(context=context, question=self.ret_prompt)
+    def extract_info(self, text: str) -> dict | None:
+        context = self.context_builder.build(text)
+        cache_key, cached = self._lookup_cache(context)
+        if cached is not None:
+            return cached
 
+        formatted_prompt = self._build_prompt(text, context)
         raw_result = self.llm.invoke(formatted_prompt)
-        return self._get_json(raw_result)
+        return self._parse_and_cache(raw_result, cache_key)
+
+    async def aextract_info(self, text: str, timeout: float | None = DEFAULT_REQUEST_TIMEOUT, retries: int = DEFAULT_RETRIES) -> dict | None:
+        """Async version of extract_info using the LLM's ainvoke.
+
+        Each attempt is bounded by timeout; failed or timed-out attempts are
+        retried with exponential backoff.
+
+        Args:
+            text (str): Cleaned article text.
+            timeout (float | None, optional): Seconds per attempt. Defaults to DEFAULT_REQUEST_TIMEOUT.
+            retries (int, optional): Extra attempts after the first. Defaults to DEFAULT_RETRIES.
+
+        Returns:
+            dict: Parsed JSON data, or None if every attempt failed.
+        """
+        context = self.context_builder.build(text)
+        cache_key, cached = self._lookup_cache(context)
+        if cached is not None:
+            return cached
+
+        formatted_prompt = self._build_prompt(text, context)
+        for attempt in range(retries + 1):
+            try:
+                raw_result = await asyncio.wait_for(self.llm.ainvoke(formatted_prompt), timeout)
+                return self._parse_and_cache(raw_result, cache_key)
+            except Exception as e: # Includes asyncio.TimeoutError
+                logging.warning("LLM request failed (attempt %d/%d): %r", attempt + 1, retries + 1, e)
+                if attempt < retries:
+                    await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        return None
+
+    def extract_batch(self, items: Iterable[tuple[Hashable, str]]) -> dict[Hashable, dict | None]:
+        """Extracts several articles with one prompt asking for a JSON array
+        with one record per article id.
+
+        Articles whose record is missing or unusable are retried one at a
+        time with extract_info.
+
+        Args:
+            items (Iterable[tuple[Hashable, str]]): (article index, cleaned text) pairs.
+
+        Returns:
+            dict: Parsed JSON data (or None) keyed by article index, in input order.
+        """
+        items = list(items)
+        if len(items) == 1:
+            return {index: self.extract_info(text) for index, text in items}
+
+        results, pending = self._prepare_batch(items)
+        if pending:
+            raw_result = self.llm.invoke(self._build_batch_prompt(pending))
+            batch_results, failed = self._finish_batch(raw_result, pending)
+            results.update(batch_results)
+            if failed:
+                logging.debug("Batch of %d: retrying %d articles one at a time", len(pending), len(failed))
+            for index, text in failed:
+                results[index] = self.extract_info(text)
+        return {index: results[index] for index, _ in items}
+
+    async def aextract_batch(
+        self,
+        items: Iterable[tuple[Hashable, str]],
+        timeout: float | None = DEFAULT_REQUEST_TIMEOUT,
+        retries: int = DEFAULT_RETRIES
+    ) -> dict[Hashable, dict | None]:
+        """Async version of extract_batch.
+
+        The batch request is retried like aextract_info; if it keeps failing,
+        every article falls back to its own request, one at a time.
+
+        Returns:
+            dict: Parsed JSON data (or None) keyed by article index, in input order.
+        """
+        items = list(items)
+        if len(items) == 1:
+            return {index: await self.aextract_info(text, timeout=timeout, retries=retries) for index, text in items}
+
+        results, pending = self._prepare_batch(items)
+        if pending:
+            failed = [(index, text) for index, text, _, _ in pending]
+            formatted_prompt = self._build_batch_prompt(pending)
+            for attempt in range(retries + 1):
+                try:
+                    raw_result = await asyncio.wait_for(self.llm.ainvoke(formatted_prompt), timeout)
+                except Exception as e: # Includes asyncio.TimeoutError
+                    logging.warning("LLM batch request failed (attempt %d/%d): %r", attempt + 1, retries + 1, e)
+                    if attempt < retries:
+                        await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                    continue
+                batch_results, failed = self._finish_batch(raw_result, pending)
+                results.update(batch_results)
+                break
+
+            if failed:
+                logging.debug("Batch of %d: retrying %d articles one at a time", len(pending), len(failed))
+            for index, text in failed:
+                results[index] = await self.aextract_info(text, timeout=timeout, retries=retries)
+        return {index: results[index] for index, _ in items}
+
+    async def aextract_many(
+        self,
+        items: Iterable[tuple[Hashable, str]] | AsyncIterable[tuple[Hashable, str]],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float | None = DEFAULT_REQUEST_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[tuple[Hashable, dict | None]]:
+        """Extracts many articles with at most max_concurrency requests in flight.
+
+        items is consumed lazily: a new article is only taken once a request
+        slot frees up, so a slow server applies backpressure to the reader.
+        items may be an async iterable (e.g. reading a queue without blocking
+        the event loop, see AddressPipeline).
+        Results are yielded in completion order, tagged with their index.
+        With batch_size > 1, each request carries up to batch_size articles
+        (see aextract_batch).
+
+        Args:
+            items (Iterable | AsyncIterable): (article index, cleaned text) pairs.
+            max_concurrency (int, optional): Maximum in-flight requests. Defaults to DEFAULT_MAX_CONCURRENCY.
+            timeout (float | None, optional): Seconds per attempt. Defaults to DEFAULT_REQUEST_TIMEOUT.
+            retries (int, optional): Extra attempts per article. Defaults to DEFAULT_RETRIES.
+            batch_size (int, optional): Articles per prompt. Defaults to DEFAULT_BATCH_SIZE.
+
+        Yields:
+            tuple: (article index, parsed JSON data or None).
+        """
+        async def run(batch: list[tuple[Hashable, str]]) -> dict[Hashable, dict | None]:
+            return await self.aextract_batch(batch, timeout=timeout, retries=retries)
+
+        iterator = _aiter_items(items)
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_concurrency:
+                batch = []
+                while len(batch) < batch_size:
+                    item = await anext(iterator, _EXHAUSTED)
+                    if item is _EXHAUSTED:
+                        exhausted = True
+                        break
+                    batch.append(item)
+                if not batch:
+                    break
+                pending.add(asyncio.ensure_future(run(batch)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for index, result in task.result().items():
+                    yield index, result
+
+    def extract_many(
+        self,
+        items: Iterable[tuple[Hashable, str]],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float | None = DEFAULT_REQUEST_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> dict[Hashable, dict | None]:
+        """Blocking wrapper around aextract_many.
+
+        When called while an event loop is running (e.g. in a Jupyter
+        notebook), the requests run in their own loop on a worker thread;
+        async code should await aextract_many instead.
+
+        Returns:
+            dict: Parsed JSON data (or None) keyed by article index, in input order.
+        """
+        items = list(items)
+
+        async def collect() -> dict:
+            return {index: result async for index, result in self.aextract_many(items, max_concurrency, timeout, retries, batch_size)}
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError: # No running loop
+            results = asyncio.run(collect())
+        else:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                results = executor.submit(asyncio.run, collect()).result()
+        return {index: results[index] for index, _ in items}
 
     def _get_json(self, json_text: str, verbose: bool = False) -> dict | None:
         """Parse JSON text into a Python dictionary.
-        Strips markdown code block indicators if present, and attempts to extract
-        the first valid JSON object from the string.
+        Returns the first JSON object in the answer (see
+        text_utils.extract_json), so markdown code fences and text around it
+        are ignored and nested objects are parsed whole.
 
         Args:
             json_text (str): JSON text to parse.
@@ -57,30 +397,55 @@ class LLMExtractor:
         if verbose:
             print("Input JSON text:")
             print(json_text)
+        return extract_json(json_text)
 
-        # Strip markdown code block indicators if present
-        if json_text.strip().startswith('```json') and json_text.strip().endswith('```'):
-            json_text = json_text.strip()[len('```json'):-len('```')].strip()
-        elif json_text.strip().startswith('```') and json_text.strip().endswith('```'):
-            json_text = json_text.strip()[len('```'):-len('```')].strip()
-
-        # Attempt to find and extract the first JSON object using a non-greedy regex
-        # This handles cases where there's extra text before or after the JSON,
-        # or if the LLM outputs multiple JSON-like structures.
-        match = re.search(r'\{(.*?)\}', json_text, re.DOTALL)
-        if not match:
-            print("Error: No JSON object found in the text.")
-            return None
-        
-        json_candidate = match.group(0)
+    def _get_json_array(self, json_text: str) -> list | None:
+        """Parse a batch answer into a list of records.
+        Takes the first JSON array in the answer; if there is none (e.g. the
+        array was cut off), every JSON object in it instead (see
+        text_utils.extract_json_array).
 
-        try:
-            json_data = json.loads(json_candidate)
-        except json.JSONDecodeError as e:
-            print(f"Error loading JSON from candidate '{json_candidate[:100]}...': {e}")
-            return None
-        except Exception as e:
-            print("An unknown error occurred:", e)
-            return None
+        Args:
+            json_text (str): Raw LLM output.
 
-        return json_data
+        Returns:
+            list: Parsed records, or None if nothing could be parsed.
+        """
+        return extract_json_array(json_text)
+
+def benchmark_batch_sizes(
+    extractor: LLMExtractor,
+    texts: list[str],
+    batch_sizes: Iterable[int] = (1, 2, 4, 8),
+    max_concurrency: int = 1,
+    timeout: float | None = DEFAULT_REQUEST_TIMEOUT,
+    retries: int = DEFAULT_RETRIES
+) -> list[dict]:
+    """
+    Measures extraction throughput for each batch size on the same texts.
+    Use an extractor without cache_dir, otherwise later sizes only hit the cache.
+
+    Args:
+        extractor (LLMExtractor): Extractor to measure.
+        texts (list[str]): Cleaned articles.
+        batch_sizes (Iterable[int], optional): Batch sizes to try. Defaults to (1, 2, 4, 8).
+        max_concurrency (int, optional): In-flight requests. Defaults to 1.
+
+    Returns:
+        list[dict]: Per batch size: seconds, articles/s, prompts sent and parsed results.
+    """
+    rows = []
+    for batch_size in batch_sizes:
+        prompts_before = extractor.prompt_stats()['prompts']
+        started = time.perf_counter()
+        results = extractor.extract_many(enumerate(texts), max_concurrency, timeout, retries, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        rows.append({
+            'batch_size': batch_size,
+            'articles': len(texts),
+            'seconds': elapsed,
+            'articles_per_s': len(texts) / elapsed if elapsed > 0 else 0.0,
+            'prompts': extractor.prompt_stats()['prompts'] - prompts_before,
+            'parsed': sum(result is not None for result in results.values()),
+        })
+    return rows
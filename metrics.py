@@ -0,0 +1,176 @@
+# Standard library imports
+import json
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# --- Constants ---
+# Histogram bucket upper bounds in seconds (Prometheus 'le' labels)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+MAX_SAMPLES = 10_000 # Reservoir size for quantiles; exact below this many observations
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_PROMETHEUS_PREFIX = 'darkmap_'
+# --- End Constants ---
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+def _quantile(sorted_samples: list[float], q: float) -> float:
+    """
+    Linear-interpolated quantile of already sorted samples.
+    """
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+class Histogram:
+    """
+    Latency histogram: cumulative buckets (for Prometheus), count/sum/min/max,
+    and a reservoir sample for p50/p95/p99.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, max_samples: int = MAX_SAMPLES):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.max_samples = max_samples
+        self._samples = []
+        self._random = random.Random(0)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+        # Reservoir sampling keeps a uniform sample of all observations
+        if len(self._samples) < self.max_samples:
+            self._samples.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.max_samples:
+                self._samples[slot] = value
+
+    def summary(self) -> dict:
+        samples = sorted(self._samples)
+        summary = {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+        }
+        for q in QUANTILES:
+            summary[f'p{round(q * 100)}'] = _quantile(samples, q)
+        return summary
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of labelled counters and latency histograms, with
+    JSON and Prometheus text export.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: int = 1, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_counter(self, name: str, value: int, **labels) -> None:
+        """
+        Sets a counter to a total kept elsewhere (e.g. a cache's own hit count).
+        """
+        with self._lock:
+            self._counters[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """
+        Observes the wall time of the with-block in histogram name (seconds).
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter(self, name: str, **labels) -> int:
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def summary(self) -> dict:
+        """
+        Returns {'counters': {...}, 'histograms': {...}}, keyed by name plus
+        labels in Prometheus notation, e.g. 'match_outcome{outcome="none"}'.
+        """
+        with self._lock:
+            counters = {f"{name}{_format_labels(label_key)}": value for (name, label_key), value in sorted(self._counters.items())}
+            histograms = {f"{name}{_format_labels(label_key)}": histogram.summary() for (name, label_key), histogram in sorted(self._histograms.items())}
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=4, ensure_ascii=False)
+
+    def to_prometheus(self, prefix: str = DEFAULT_PROMETHEUS_PREFIX) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format
+        (counters as <name>_total, histograms in seconds).
+        """
+        lines = []
+        with self._lock:
+            counter_names = sorted({name for name, _ in self._counters})
+            for name in counter_names:
+                lines.append(f"# TYPE {prefix}{name}_total counter")
+                for (counter_name, label_key), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{prefix}{name}_total{_format_labels(label_key)} {value}")
+
+            histogram_names = sorted({name for name, _ in self._histograms})
+            for name in histogram_names:
+                lines.append(f"# TYPE {prefix}{name}_seconds histogram")
+                for (histogram_name, label_key), histogram in sorted(self._histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                        cumulative += bucket_count
+                        lines.append(f"{prefix}{name}_seconds_bucket{_format_labels(label_key, (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{prefix}{name}_seconds_bucket{_format_labels(label_key, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{prefix}{name}_seconds_sum{_format_labels(label_key)} {histogram.sum}")
+                    lines.append(f"{prefix}{name}_seconds_count{_format_labels(label_key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = DEFAULT_PROMETHEUS_PREFIX) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(prefix))
@@ -0,0 +1,180 @@
+# Standard library imports
+import re
+import threading
+import zlib
+from collections import defaultdict
+from typing import Hashable, Iterable, Iterator
+
+# Third-party library imports
+import numpy as np
+
+# --- Constants ---
+DEFAULT_THRESHOLD = 0.8 # Estimated Jaccard similarity of shingle sets
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5 # Characters per shingle
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+# Per-article fields that stay with the duplicate instead of being copied
+OWN_FIELDS = ('original_text', 'index', 'duplicate_of')
+# --- End Constants ---
+
+def _lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """
+    Picks (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1/bands)^(1/rows) is the highest one not above threshold. Erring low
+    favours recall; candidates are verified against threshold anyway.
+    """
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    below = [option for option in options if (1 / option[0]) ** (1 / option[1]) <= threshold]
+    return max(below or options[-1:], key=lambda option: (1 / option[0]) ** (1 / option[1]))
+
+class MinHashLSH:
+    """
+    Streaming near-duplicate index: MinHash signatures of character
+    shingles, bucketed by LSH bands. Only group representatives are indexed.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = 1
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        text = re.sub(r'\s+', ' ', text).strip()
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        # Universal hashing (a * x + b) mod p per permutation; uint64 wraps around on overflow
+        permuted = (hashes[:, None] * self._a + self._b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def query(self, signature: np.ndarray) -> tuple[Hashable | None, float]:
+        """
+        Returns the most similar indexed key with estimated similarity at or
+        above threshold, and that similarity; (None, 0.0) if there is none.
+        """
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(band_key, ()))
+        best_key, best_similarity = None, 0.0
+        for key in candidates:
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= self.threshold and similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+        return best_key, best_similarity
+
+    def insert(self, key: Hashable, signature: np.ndarray) -> None:
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets[band_key].append(key)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+class NearDuplicateFilter:
+    """
+    Groups near-duplicate articles in a stream so that only one
+    representative per group is processed.
+
+    representatives() passes through the first article of each group and
+    holds back the rest. Each representative's result_dict goes back through
+    expand(), which returns it together with copies for its duplicates: every
+    extracted/matched field is copied, while 'original_text' and 'index'
+    stay the duplicate's own and 'duplicate_of' names the representative.
+    Duplicates arriving after their representative's result are returned by
+    drain(). Works across chunks: state is kept between calls.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE
+    ):
+        self.lsh = MinHashLSH(threshold, num_perm, shingle_size)
+        self.seen = 0
+        self.duplicates = 0
+        self._results = {} # representative index -> its fields to copy
+        self._waiting = defaultdict(list) # representative index -> [(index, text)]
+        self._ready = []
+        self._lock = threading.Lock()
+
+    def _copy(self, fields: dict, index: Hashable, text: str, representative: Hashable) -> dict:
+        return {**fields, 'original_text': text, 'index': index, 'duplicate_of': representative}
+
+    def representatives(self, items: Iterable[tuple[Hashable, str]]) -> Iterator[tuple[Hashable, str]]:
+        """
+        Yields the (index, text) pairs that start a new group.
+        """
+        for index, text in items:
+            signature = self.lsh.signature(text)
+            with self._lock:
+                self.seen += 1
+                representative, _ = self.lsh.query(signature)
+                if representative is None:
+                    self.lsh.insert(index, signature)
+                else:
+                    self.duplicates += 1
+                    if representative in self._results:
+                        self._ready.append(self._copy(self._results[representative], index, text, representative))
+                    else:
+                        self._waiting[representative].append((index, text))
+            if representative is None:
+                yield index, text
+
+    def expand(self, result_dict: dict) -> list[dict]:
+        """
+        Takes a representative's result_dict (with its 'index') and returns
+        it followed by copies for the duplicates held back so far.
+        """
+        result_dict['duplicate_of'] = None
+        representative = result_dict['index']
+        fields = {key: value for key, value in result_dict.items() if key not in OWN_FIELDS}
+        with self._lock:
+            self._results[representative] = fields
+            waiting = self._waiting.pop(representative, [])
+        return [result_dict] + [self._copy(fields, index, text, representative) for index, text in waiting]
+
+    def drain(self) -> list[dict]:
+        """
+        Returns (and forgets) the copies made for duplicates whose
+        representative had already been expanded.
+        """
+        with self._lock:
+            ready, self._ready = self._ready, []
+        return ready
+
+    def unresolved(self) -> list[tuple[Hashable, str]]:
+        """
+        Returns (and forgets) the duplicates whose representative never
+        produced a result (e.g. it failed), so they can be processed themselves.
+        """
+        with self._lock:
+            waiting = [item for items in self._waiting.values() for item in items]
+            self._waiting.clear()
+        return waiting
+
+    def stats(self) -> dict:
+        return {
+            'seen': self.seen,
+            'representatives': len(self.lsh),
+            'duplicates': self.duplicates,
+            'duplicate_rate': self.duplicates / self.seen if self.seen else 0.0,
+            'bands': self.lsh.bands,
+            'rows': self.lsh.rows,
+        }
@@ -1,6 +1,8 @@
 # Standard library imports
-import json
+import argparse
 import logging
+import multiprocessing
+import os
 # from datetime import datetime
 
 # Third-party library imports
@@ -8,87 +10,355 @@ import pandas as pd
 from tqdm import tqdm
 
 # Local application imports
-from text_utils import clean_text, save_json_data, get_timestamp
-from address_processor import AddressProcessor
+from text_utils import clean_text, get_timestamp
+from address_processor import AddressProcessor, EXTRACTOR_MODES
+from context_builder import DEFAULT_TOKEN_BUDGET
+from address_pipeline import AddressPipeline
+from llm_extractor import DEFAULT_BATCH_SIZE, DEFAULT_MAX_CONCURRENCY
+from corpus_reader import corpus_length, iter_corpus
+from checkpoint import CheckpointWriter, load_checkpoint, merge_checkpoint
+from address_store import ensure_address_store, load_address_store
+from gazetteer import Gazetteer, NO_CANDIDATE, compare_runs, evaluate_recall
+from address_matcher import DEFAULT_CACHE_SIZE as DEFAULT_MATCH_CACHE_SIZE
+from near_duplicates import NearDuplicateFilter, DEFAULT_THRESHOLD as DEFAULT_DEDUP_THRESHOLD
 
-# --- Data Loading ---
-df_addr = pd.read_parquet('data/address.parquet.gzip')
-df_text = pd.read_parquet('data/sample.parquet.gzip')
-# --- End Data Loading ---
+# --- Data Paths ---
+ADDRESS_PATH = 'data/address.parquet.gzip'
+TEXT_PATH = 'data/sample.parquet.gzip' # Streamed by corpus_reader, never loaded whole
+ADDRESS_COORDS_PATH = "data/address_coords.parquet.gzip" # Optional lv0-lv4 + latitude/longitude table
+ADDRESS_STORE_DIRECTORY = "data/address_store/" # Normalized table + matcher indices, built from ADDRESS_PATH
+# --- End Data Paths ---
 
-# --- Main Execution ---
-if __name__ == "__main__":
-    # Configure logging
-    timestamp = get_timestamp()
-    log_filename = f"address_matching_{timestamp}.log"
-    log_directory = f"log/"
-    log_path = f"{log_directory}{log_filename}"
+# --- Defaults ---
+DEFAULT_LLM_MODEL = 'gemma3:1b'
+DEFAULT_EXTRACTOR_MODE = 'llm'
+DEFAULT_START_INDEX = 200
+DEFAULT_END_INDEX = 300
+SAVE_FREQUENCY = 10  # Flush the checkpoint every 10 iterations
+LLM_CACHE_DIRECTORY = "cache/" # Parsed LLM results, reused across runs
+GEOCODE_CACHE_DIRECTORY = "cache/" # Geocode results (including misses), reused across runs
+METRICS_FILENAME_PREFIX = "metrics_" # Per-segment metrics, written to the checkpoint directory
+PIPELINE_WORKERS = {'match_workers': 1, 'geocode_workers': 1}
+# --- End Defaults ---
+
+def configure_logging(log_path: str) -> None:
     logging.basicConfig(
         level=logging.DEBUG,
-        format='%(asctime)s - %(levelname)s - %(message)s',
+        format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s',
         filename=log_path,
         filemode='w'
     )
-    logger = logging.getLogger(__name__)
     logging.debug("Logging configured and working!")
 
+def parse_shard(shard: str) -> tuple[int, int]:
+    """
+    Parses a 'i/N' shard spec (0 <= i < N).
+    """
+    try:
+        shard_id, num_shards = (int(part) for part in shard.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{shard}', expected i/N")
+    if num_shards < 1 or not 0 <= shard_id < num_shards:
+        raise argparse.ArgumentTypeError(f"invalid shard '{shard}', expected 0 <= i < N")
+    return shard_id, num_shards
+
+def split_range(start_index: int, end_index: int, num_parts: int) -> list[tuple[int, int]]:
+    """
+    Splits [start_index, end_index) into num_parts contiguous, near-equal ranges.
+    Contiguous ranges keep each part's reads to its own parquet row groups.
+    """
+    total = max(end_index - start_index, 0)
+    bounds = [start_index + total * part // num_parts for part in range(num_parts + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def build_processor(
+    llm_model: str,
+    use_gazetteer: bool = True,
+    extractor_mode: str = DEFAULT_EXTRACTOR_MODE,
+    context_token_budget: int = DEFAULT_TOKEN_BUDGET,
+    match_cache_size: int = DEFAULT_MATCH_CACHE_SIZE
+) -> AddressProcessor:
+    # Attach to the prebuilt store instead of normalizing and indexing the table per process
+    address_store = load_address_store(ensure_address_store(ADDRESS_PATH, ADDRESS_STORE_DIRECTORY))
+    df_coords = pd.read_parquet(ADDRESS_COORDS_PATH) if os.path.exists(ADDRESS_COORDS_PATH) else None
+    return AddressProcessor(
+        df_addr=None,
+        address_store=address_store,
+        llm_model=llm_model,
+        llm_cache_dir=LLM_CACHE_DIRECTORY,
+        geocode_cache_dir=GEOCODE_CACHE_DIRECTORY,
+        df_coords=df_coords,
+        use_gazetteer=use_gazetteer,
+        extractor_mode=extractor_mode,
+        context_token_budget=context_token_budget,
+        match_cache_size=match_cache_size
+    )
+
+def process_range(
+    start_index: int,
+    end_index: int,
+    llm_model: str,
+    checkpoint_dir: str,
+    segment_name: str,
+    save_frequency: int = SAVE_FREQUENCY,
+    use_pipeline: bool = True,
+    log_path: str | None = None,
+    use_gazetteer: bool = True,
+    extractor_mode: str = DEFAULT_EXTRACTOR_MODE,
+    context_token_budget: int = DEFAULT_TOKEN_BUDGET,
+    dedup_threshold: float | None = None,
+    prometheus_metrics: bool = False,
+    llm_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    llm_batch_size: int = DEFAULT_BATCH_SIZE,
+    match_cache_size: int = DEFAULT_MATCH_CACHE_SIZE
+) -> int:
+    """
+    Processes rows [start_index, end_index) of the corpus with its own
+    AddressProcessor, appending results to a segment in checkpoint_dir.
+    Indices already present in checkpoint_dir are skipped. With
+    dedup_threshold, near-duplicate articles reuse their group's result.
+    The pipeline keeps up to llm_concurrency LLM requests in flight, each
+    carrying up to llm_batch_size articles.
+    Metrics are written next to the segment as metrics_<segment_name>.json
+    (and .prom in the Prometheus text format with prometheus_metrics).
+
+    Returns:
+        int: Number of new results written.
+    """
+    if log_path is not None:
+        configure_logging(log_path)
+
     # Initialize Address Processor
-    address_processor = AddressProcessor(df_addr=df_addr, llm_model='gemma3:1b')
-
-    results_list = [] # Initialize list to store results
-
-    # Process a range of indices for testing
-    print(f"TOTAL SAMPLE: {len(df_text)}")
-    start_index = 200
-    # end_index = len(df_text) # Process up to (but not including) 
-    end_index = 300
-    
-    # --- Setup ---
-    SAVE_FREQUENCY = 10  # Save every 10 iterations
-    TEMP_SAVE_FILE = f'temp_results_checkpoint__{timestamp}.json'
-    TEMP_SAVE_DIRECTORY = "tmp/"
-    TEMP_SAVE_PATH = f"{TEMP_SAVE_DIRECTORY}{TEMP_SAVE_FILE}"
-    results_list = []
-    # --- Setup ---
-
-    # for i, (index_iter, text_content) in tqdm(zip(df_text.index[start_index:end_index], df_text.loc[start_index:end_index, 'content']), total=end_index-start_index, desc="Processing texts"):
-    for i, (index_iter, text_content) in tqdm(
-        enumerate(
-            zip(df_text.index[start_index:end_index], 
-                df_text.loc[start_index:end_index, 'content'])), 
-        total=end_index-start_index, 
-        desc="Processing texts"
-):
-        
-        try:
-            if text_content is None:
-                continue
-            text = clean_text(text_content)
-            # print(f"\nProcessing index: {index_iter}")
+    address_processor = build_processor(llm_model, use_gazetteer, extractor_mode, context_token_budget, match_cache_size)
+
+    # Indices already in the checkpoint are skipped when resuming
+    done_indices = set(load_checkpoint(checkpoint_dir))
+    if done_indices:
+        print(f"Resuming from '{checkpoint_dir}': {len(done_indices)} results already done")
 
+    def iter_texts():
+        for index_iter, text_content in iter_corpus(TEXT_PATH, start_index, end_index, column='content'):
+            if text_content is not None and index_iter not in done_indices:
+                yield index_iter, clean_text(text_content)
+
+    # Near-duplicate articles are not processed again: they get a copy of
+    # their group representative's result
+    dedup = NearDuplicateFilter(dedup_threshold) if dedup_threshold else None
+    texts = iter_texts() if dedup is None else dedup.representatives(iter_texts())
+
+    def process_one(index_iter, text):
+        try:
             # Process text using AddressProcessor
             result_dict = address_processor.process_text(text_content=text)
             result_dict['index'] = index_iter # Add index to the result_dict
-
-            results_list.append(result_dict)
-            
+            return result_dict
         except Exception as e:
-            print(f"\nError at index {index_iter}: {e}. Saving accumulated results.")
-            # Save the list before the error happens
-            save_json_data(results_list, TEMP_SAVE_PATH)
-            continue
-        
-        # Check for the checkpoint
-        if (i + 1) % SAVE_FREQUENCY == 0:
-            print(f"\n--- Checkpoint: Saving {len(results_list)} results ---")
-            save_json_data(results_list, TEMP_SAVE_PATH)
+            address_processor.metrics.inc('errors')
+            print(f"\nError at index {index_iter}: {e}. Flushing checkpoint.")
+            checkpoint.flush()
+            return None
+
+    def save(result_dict):
+        results = [result_dict] if dedup is None else dedup.expand(result_dict) + dedup.drain()
+        for result in results:
+            checkpoint.append(result)
+
+            # Check for the checkpoint
+            if checkpoint.written % save_frequency == 0:
+                checkpoint.flush()
+
+    desc = f"Processing texts [{start_index}, {end_index})"
+    with CheckpointWriter(checkpoint_dir, segment_name) as checkpoint:
+        if use_pipeline:
+            pipeline = AddressPipeline(address_processor, llm_concurrency, llm_batch_size, **PIPELINE_WORKERS)
+            for result_dict in tqdm(pipeline.run(texts), total=end_index-start_index, desc=f"{desc} (pipeline)"):
+                save(result_dict)
+            print(f"\nPipeline stats: {pipeline.stats()}")
+        else:
+            for index_iter, text in tqdm(texts, total=end_index-start_index, desc=desc):
+                result_dict = process_one(index_iter, text)
+                if result_dict is not None:
+                    save(result_dict)
+
+        if dedup is not None:
+            for result_dict in dedup.drain():
+                checkpoint.append(result_dict)
+            # Duplicates of failed representatives are processed themselves
+            for index_iter, text in dedup.unresolved():
+                result_dict = process_one(index_iter, text)
+                if result_dict is not None:
+                    result_dict['duplicate_of'] = None
+                    checkpoint.append(result_dict)
+            print(f"\nNear-duplicates: {dedup.stats()}")
 
     # --- End of loop ---
-    
-    save_json_data(results_list, TEMP_SAVE_PATH)
+    print(f"\nCheckpoint: {checkpoint.written} new results in '{checkpoint.path}'")
+
+    if address_processor.gazetteer is not None:
+        print(f"Gazetteer pre-filter: {address_processor.gazetteer.stats()}")
+    if address_processor.dictionary_extractor is not None:
+        print(f"Dictionary extractor: {address_processor.dictionary_extractor.stats()}")
+    print(f"Matcher caches: {address_processor.address_matcher.cache_stats()}")
+    print(f"LLM prompts: {address_processor.llm_extractor.prompt_stats()}")
+    llm_cache = address_processor.llm_extractor.cache
+    if llm_cache is not None:
+        print(f"LLM cache: {llm_cache.stats()}")
+    print(f"Geocoding: {address_processor.geolocator.stats()}")
+    if address_processor.offline_geocoder is not None:
+        print(f"Offline geocoding: {address_processor.offline_geocoder.stats()}")
+
+    metrics = address_processor.collect_metrics()
+    metrics_path = os.path.join(checkpoint_dir, f"{METRICS_FILENAME_PREFIX}{segment_name}")
+    metrics.to_json(f"{metrics_path}.json")
+    if prometheus_metrics:
+        metrics.write_prometheus(f"{metrics_path}.prom")
+    for name, histogram in metrics.summary()['histograms'].items():
+        print(f"{name}: p50={histogram['p50']:.3f}s p95={histogram['p95']:.3f}s p99={histogram['p99']:.3f}s (n={histogram['count']})")
+    print(f"Metrics saved to {metrics_path}.json")
+
+    return checkpoint.written
+
+def merge_outputs(input_paths: list[str], output_path: str) -> pd.DataFrame:
+    """
+    Combines per-shard result parquet files into one, sorted by index.
+    If an index appears in several inputs, the last input wins.
+    """
+    results_df = pd.concat([pd.read_parquet(path) for path in input_paths], ignore_index=True)
+    results_df = results_df.drop_duplicates('index', keep='last').sort_values('index', ignore_index=True)
+    results_df.to_parquet(output_path, compression='gzip')
+    return results_df
+
+def evaluate_prefilter(labeled_dir: str, prefiltered_dir: str | None = None, gazetteer: Gazetteer | None = None) -> dict:
+    """
+    Evaluates the gazetteer pre-filter against the checkpoint of a
+    --no-gazetteer run: the recall and skip rate the current gazetteer would
+    have on its articles (evaluate_recall) and, given the checkpoint of a
+    run of the same articles with the pre-filter, the ones that run had
+    (compare_runs).
+
+    Args:
+        labeled_dir (str): Checkpoint directory of the --no-gazetteer run.
+        prefiltered_dir (str | None, optional): Checkpoint directory of the prefiltered run.
+        gazetteer (Gazetteer | None, optional): Pre-filter to evaluate; the
+            address store's when None.
+
+    Returns:
+        dict: 'gazetteer' and (with prefiltered_dir) 'prefiltered_run' reports.
+    """
+    labeled_results = load_checkpoint(labeled_dir)
+    if any(result_dict.get('prefilter') == NO_CANDIDATE for result_dict in labeled_results.values()):
+        raise ValueError(f"'{labeled_dir}' skipped articles with the gazetteer pre-filter; pass the checkpoint of a --no-gazetteer run")
+    if gazetteer is None:
+        address_store = load_address_store(ensure_address_store(ADDRESS_PATH, ADDRESS_STORE_DIRECTORY))
+        gazetteer = Gazetteer(address_store.df_addr_optimized, patterns=address_store.gazetteer_patterns)
+    report = {'gazetteer': evaluate_recall(gazetteer, labeled_results.values())}
+    if prefiltered_dir is not None:
+        report['prefiltered_run'] = compare_runs(labeled_results, load_checkpoint(prefiltered_dir))
+    return report
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Extract, match and geocode addresses in news articles.")
+    parser.add_argument('--start', type=int, default=DEFAULT_START_INDEX,
+                        help=f"First row position to process (default: {DEFAULT_START_INDEX}).")
+    parser.add_argument('--end', type=int, default=DEFAULT_END_INDEX,
+                        help=f"Row position to stop before; -1 for the end of the corpus (default: {DEFAULT_END_INDEX}).")
+    parser.add_argument('--shard', type=parse_shard, default=(0, 1), metavar='i/N',
+                        help="Process only the i-th of N contiguous parts of [start, end), e.g. one per machine.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes, each with its own AddressProcessor (default: 1).")
+    parser.add_argument('--model', default=DEFAULT_LLM_MODEL,
+                        help=f"Ollama model used for extraction (default: {DEFAULT_LLM_MODEL}).")
+    parser.add_argument('--extractor', choices=EXTRACTOR_MODES, default=DEFAULT_EXTRACTOR_MODE,
+                        help="Address extraction: the LLM, the address-table dictionary, or the dictionary "
+                             f"with LLM fallback when it is ambiguous or finds nothing (default: {DEFAULT_EXTRACTOR_MODE}).")
+    parser.add_argument('--context-tokens', type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help=f"Token budget of the article context sent to the LLM (default: {DEFAULT_TOKEN_BUDGET}).")
+    parser.add_argument('--match-cache-size', type=int, default=DEFAULT_MATCH_CACHE_SIZE,
+                        help=f"Entries in each of the address matcher's LRU caches; 0 disables them (default: {DEFAULT_MATCH_CACHE_SIZE}).")
+    parser.add_argument('--dedup-threshold', type=float, metavar='SIMILARITY',
+                        help="Process one article per group of near-duplicates (MinHash similarity >= SIMILARITY, "
+                             f"e.g. {DEFAULT_DEDUP_THRESHOLD}) and copy its result to the others.")
+    parser.add_argument('--save-frequency', type=int, default=SAVE_FREQUENCY,
+                        help=f"Flush the checkpoint every N results (default: {SAVE_FREQUENCY}).")
+    parser.add_argument('--llm-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f"LLM requests in flight in the pipeline's extract stage (default: {DEFAULT_MAX_CONCURRENCY}).")
+    parser.add_argument('--llm-batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Articles per LLM prompt in the pipeline; 1 disables batching (default: {DEFAULT_BATCH_SIZE}).")
+    parser.add_argument('--no-pipeline', action='store_true',
+                        help="Process articles one at a time instead of with AddressPipeline.")
+    parser.add_argument('--no-gazetteer', action='store_true',
+                        help="Send every article to the LLM, even with no place name from the address table.")
+    parser.add_argument('--prometheus-metrics', action='store_true',
+                        help="Also write each segment's metrics in the Prometheus text format (.prom).")
+    parser.add_argument('--resume', metavar='CHECKPOINT_DIR',
+                        help="Continue a run from its checkpoint directory, skipping finished indices.")
+
+    subparsers = parser.add_subparsers(dest='command')
+    merge_parser = subparsers.add_parser('merge', help="Combine per-shard result parquet files.")
+    merge_parser.add_argument('output', help="Merged parquet file to write.")
+    merge_parser.add_argument('inputs', nargs='+', help="Per-shard parquet files.")
+    recall_parser = subparsers.add_parser('recall', help="Evaluate the gazetteer pre-filter against a --no-gazetteer run.")
+    recall_parser.add_argument('labeled', metavar='NO_GAZETTEER_CHECKPOINT',
+                               help="Checkpoint directory of a run with --no-gazetteer (the labels).")
+    recall_parser.add_argument('prefiltered', metavar='PREFILTERED_CHECKPOINT', nargs='?',
+                               help="Checkpoint directory of a run of the same articles with the pre-filter.")
+    return parser
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+
+    if args.command == 'merge':
+        merged_df = merge_outputs(args.inputs, args.output)
+        print(f"Merged {len(args.inputs)} files ({len(merged_df)} results) into {args.output}")
+        raise SystemExit(0)
+
+    if args.command == 'recall':
+        for name, report in evaluate_prefilter(args.labeled, args.prefiltered).items():
+            print(f"{name}: recall={report['recall']:.3f} of {report['positives']} positives, "
+                  f"skip_rate={report['skip_rate']:.3f} of {report['samples']} articles, missed: {report['missed_indices']}")
+        raise SystemExit(0)
+
+    # Configure logging
+    timestamp = get_timestamp()
+    log_directory = f"log/"
+    log_path = f"{log_directory}address_matching_{timestamp}.log"
+    configure_logging(log_path)
+
+    # Process a range of indices
+    total_sample = corpus_length(TEXT_PATH)
+    print(f"TOTAL SAMPLE: {total_sample}")
+    end_index = total_sample if args.end < 0 else min(args.end, total_sample)
+    shard_id, num_shards = args.shard
+    start_index, end_index = split_range(args.start, end_index, num_shards)[shard_id]
+    print(f"Shard {shard_id}/{num_shards}: rows [{start_index}, {end_index})")
+
+    # Build (or refresh) the address store once, before any worker attaches to it
+    ensure_address_store(ADDRESS_PATH, ADDRESS_STORE_DIRECTORY)
+
+    # All workers append their own segments to one checkpoint directory
+    checkpoint_dir = args.resume or f"tmp/checkpoint__{timestamp}_shard_{shard_id}_of_{num_shards}/"
+    use_pipeline = not args.no_pipeline
+    use_gazetteer = not args.no_gazetteer
+
+    if args.workers > 1:
+        worker_args = [
+            (worker_start, worker_end, args.model, checkpoint_dir, f"{timestamp}_w{worker}",
+             args.save_frequency, use_pipeline, f"{log_directory}address_matching_{timestamp}_w{worker}.log",
+             use_gazetteer, args.extractor, args.context_tokens, args.dedup_threshold, args.prometheus_metrics,
+             args.llm_concurrency, args.llm_batch_size, args.match_cache_size)
+            for worker, (worker_start, worker_end) in enumerate(split_range(start_index, end_index, args.workers))
+        ]
+        with multiprocessing.get_context('spawn').Pool(args.workers) as pool:
+            pool.starmap(process_range, worker_args)
+    else:
+        process_range(start_index, end_index, args.model, checkpoint_dir, timestamp,
+                      args.save_frequency, use_pipeline, use_gazetteer=use_gazetteer, extractor_mode=args.extractor,
+                      context_token_budget=args.context_tokens, dedup_threshold=args.dedup_threshold,
+                      prometheus_metrics=args.prometheus_metrics, llm_concurrency=args.llm_concurrency,
+                      llm_batch_size=args.llm_batch_size, match_cache_size=args.match_cache_size)
 
-    # Convert results to DataFrame and save
-    results_df = pd.DataFrame(results_list)
+    # Merge all checkpoint segments (including resumed ones) and save
     output_filename = f"data/matched_addresses_{timestamp}_idx_{start_index}_to_{end_index}.parquet.gzip"
-    results_df.to_parquet(output_filename, compression='gzip')
+    merge_checkpoint(checkpoint_dir, output_filename)
     print(f"\nResults saved to {output_filename}")
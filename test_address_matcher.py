@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from address_matcher import AddressMatcher
+from address_utils import normalize_address_df, normalize_rag_address
+from benchmarks.fakes import sample_addresses
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+SAMPLE_ROWS = 1500 # Keeps the exhaustive reference path fast
+SAMPLE_QUERIES = 100
+
+
+def _key(result: tuple) -> tuple:
+    best_match, score, matched_row = result
+    return best_match, score, None if matched_row is None else matched_row.name
+
+
+@pytest.fixture(scope='module')
+def df_addr() -> pd.DataFrame:
+    return pd.read_parquet(ADDRESS_PATH).sample(SAMPLE_ROWS, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def matcher(df_addr: pd.DataFrame) -> AddressMatcher:
+    return AddressMatcher(normalize_address_df(df_addr), cache_size=0)
+
+
+@pytest.fixture(scope='module')
+def queries(df_addr: pd.DataFrame) -> list[str]:
+    edge_cases = ['', 'xyz', '제주', '중구', '서울·경기 지역', '부산!! 해운대?']
+    return [normalize_rag_address(q) for q in edge_cases + sample_addresses(df_addr, SAMPLE_QUERIES, seed=7, typo_rate=0.4)]
+
+
+@pytest.fixture(scope='module')
+def expected(matcher: AddressMatcher, queries: list[str]) -> list[tuple]:
+    return [_key(matcher._find_matching_address_exhaustive(q)) for q in queries]
+
+
+def test_find_matching_address_agrees_with_exhaustive(matcher, queries, expected):
+    assert [_key(matcher.find_matching_address(q)) for q in queries] == expected
+
+
+def test_match_many_agrees_with_exhaustive(matcher, queries, expected):
+    assert [_key(result) for result in matcher.match_many(queries)] == expected
+    # The sample must exercise both stages
+    assert matcher.match_stats()['strong_full'] and matcher.match_stats()['composite']
+
+
+def test_top_k_1_agrees_with_exhaustive(matcher, queries, expected):
+    for q, expected_key in zip(queries, expected):
+        top = matcher.top_k(q, 1)
+        actual = (top[0].full_address, top[0].score, top[0].row.name) if top else (None, 0, None)
+        assert actual == expected_key, q
+
+
+def test_top_k_is_ranked(matcher, queries):
+    for q in queries[:20]:
+        scores = [candidate.score for candidate in matcher.top_k(q, 5)]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_cached_matcher_agrees(matcher, queries, expected):
+    cached = AddressMatcher(matcher.df_addr_optimized)
+    assert [_key(cached.find_matching_address(q)) for q in queries + queries] == expected + expected
+    assert cached.cache_stats()['match']['hits'] >= len(queries)
+
+
+def test_match_many_normalizes_each_query_once(matcher, queries):
+    fresh = AddressMatcher(matcher.df_addr_optimized)
+    fresh.match_many(queries)
+    stats = fresh.cache_stats()['normalize']
+    assert stats['hits'] == 0
+    assert stats['misses'] == len(set(queries))
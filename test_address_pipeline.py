@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from address_pipeline import AddressPipeline
+from benchmarks.fakes import make_articles
+from benchmarks.pipeline import build_fake_processor
+from text_utils import clean_many
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+ARTICLES = 24
+COMPARED_FIELDS = ['address', 'prefilter', 'matched_full_address_df', 'match_score', 'latitude', 'longitude']
+STAGE_THREADS = ('feeder', 'extract', 'match-', 'geocode-')
+RUN_TIMEOUT = 60
+
+
+@pytest.fixture(scope='module')
+def df_addr() -> pd.DataFrame:
+    df = pd.read_parquet(ADDRESS_PATH)
+    return df[df['lv0'].isin(['서울', '부산'])].reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def items(df_addr) -> list[tuple[int, str]]:
+    return list(enumerate(clean_many(make_articles(df_addr, ARTICLES, seed=5))))
+
+
+@pytest.fixture
+def processor(df_addr):
+    return build_fake_processor(df_addr)
+
+
+def _run(pipeline: AddressPipeline, items) -> list[dict]:
+    """
+    Consumes pipeline.run(items), failing instead of hanging if it does not
+    shut down, and checks that every stage thread has exited.
+    """
+    results = []
+    consumer = threading.Thread(target=lambda: results.extend(pipeline.run(items)), daemon=True)
+    consumer.start()
+    consumer.join(RUN_TIMEOUT)
+    assert not consumer.is_alive(), "pipeline did not shut down"
+    deadline = time.monotonic() + 5
+    while any(t.name.startswith(STAGE_THREADS) for t in threading.enumerate()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not [t.name for t in threading.enumerate() if t.name.startswith(STAGE_THREADS)]
+    return results
+
+
+def test_results_match_process_text(processor, items):
+    expected = {index: processor.process_text(text) for index, text in items}
+    results = _run(AddressPipeline(processor, llm_concurrency=3, llm_batch_size=2, match_workers=2, geocode_workers=2), items)
+    assert sorted(result_dict['index'] for result_dict in results) == [index for index, _ in items]
+    for result_dict in results:
+        assert {field: result_dict[field] for field in COMPARED_FIELDS} == {field: expected[result_dict['index']][field] for field in COMPARED_FIELDS}
+
+
+def test_stage_error_drops_only_that_article(processor, items):
+    match_stage = processor.match_stage
+
+    def failing_match_stage(result_dict, normalized_rag_addrs):
+        if result_dict['index'] == 3:
+            raise RuntimeError("match failed")
+        match_stage(result_dict, normalized_rag_addrs)
+
+    processor.match_stage = failing_match_stage
+    pipeline = AddressPipeline(processor, match_workers=3, geocode_workers=2)
+    results = _run(pipeline, items)
+    assert sorted(result_dict['index'] for result_dict in results) == [index for index, _ in items if index != 3]
+    stages = pipeline.stats()['stages']
+    assert stages['match']['failed'] == 1
+    assert stages['match']['processed'] == stages['geocode']['processed'] == len(items) - 1
+
+
+def test_extract_stage_crash_shuts_down(processor, items):
+    async def crashing_aextract_many(*args, **kwargs):
+        raise RuntimeError("LLM client crashed")
+        yield
+
+    processor.llm_extractor.aextract_many = crashing_aextract_many
+    consumed = []
+
+    def tracked_items():
+        for item in items * 4:
+            consumed.append(item)
+            yield item
+
+    # A small queue: the feeder is blocked on it when the stage stops
+    results = _run(AddressPipeline(processor, queue_size=2), tracked_items())
+    assert results == []
+    assert len(consumed) < len(items) * 4
+
+
+def test_input_error_ends_the_run(processor, items):
+    def broken_items():
+        yield from items[:5]
+        raise OSError("corpus read failed")
+
+    results = _run(AddressPipeline(processor), broken_items())
+    assert sorted(result_dict['index'] for result_dict in results) == [index for index, _ in items[:5]]
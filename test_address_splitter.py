@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from address_splitter import AddressSplitter
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+
+
+@pytest.fixture(scope='module')
+def splitter() -> AddressSplitter:
+    return AddressSplitter(pd.read_parquet(ADDRESS_PATH))
+
+
+@pytest.mark.parametrize('address, expected', [
+    # Separators and restarts of the hierarchy
+    ('서울 강남구, 부산 해운대구', ['서울 강남구', '부산 해운대구']),
+    ('서울 강남구 부산 해운대구', ['서울 강남구', '부산 해운대구']),
+    ('광주 서구 및 대구 중구', ['광주 서구', '대구 중구']),
+    # Single addresses
+    ('서울 서울특별시 강남구', ['서울 서울특별시 강남구']),
+    ('충남 천안 동남구 대흥동', ['충남 천안 동남구 대흥동']),
+    # A short lower-level name continuing the province (광주시 in 경기, not 광주광역시)
+    ('경기 광주 오포읍', ['경기 광주 오포읍']),
+    ('경기도 광주 오포읍 광주 서구', ['경기도 광주 오포읍', '광주 서구']),
+])
+def test_split(splitter, address, expected):
+    assert splitter.split(address) == expected
+
+
+def test_split_list_and_empty(splitter):
+    assert splitter.split(['서울 강남구', '서울 강남구', '부산 해운대구']) == ['서울 강남구', '부산 해운대구']
+    assert splitter.split(None) == []
+    assert splitter.split('') == []
+
+
+def test_tables_keep_highest_slot_per_province():
+    df = pd.DataFrame({
+        'lv0': ['경기', '경기', '경기', '광주'],
+        'lv1': ['경기도', '경기도', '경기도', '광주광역시'],
+        'lv2': ['광주시', '광주시', '수원시 장안구', '서구'],
+        'lv3': ['오포읍', '광주동', '파장동', '광주동'],
+        'lv4': [None, None, None, None],
+    })
+    splitter = AddressSplitter(df)
+    assert splitter.token_slots['광주'] == 0
+    assert splitter.token_slots['광주동'] == 2
+    assert splitter.province_slots['경기']['광주'] == 1
+    assert splitter.province_slots['경기도'] == splitter.province_slots['경기']
+    assert splitter.province_slots['광주']['광주동'] == 2
+    assert ('수원', '장안구') in splitter.continuations
@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import address_store
+from address_matcher import AddressMatcher
+from address_splitter import AddressSplitter
+from address_store import ARRAY_ENTRIES, META_FILENAME, STRING_ENTRIES, build_address_store, ensure_address_store, is_store_current, load_address_store
+from address_utils import normalize_address_df, normalize_rag_address
+from benchmarks.fakes import sample_addresses
+from gazetteer import gazetteer_patterns
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+SAMPLE_ROWS = 1500
+
+
+@pytest.fixture(scope='module')
+def address_path(tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp('source') / 'address.parquet'
+    pd.read_parquet(ADDRESS_PATH).sample(SAMPLE_ROWS, random_state=1).reset_index(drop=True).to_parquet(path)
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def store(address_path, tmp_path_factory):
+    return load_address_store(build_address_store(address_path, str(tmp_path_factory.mktemp('store') / 'address_store')))
+
+
+def test_stored_index_matches_like_a_built_one(address_path, store):
+    df_built = normalize_address_df(pd.read_parquet(address_path))
+    built = AddressMatcher(df_built, cache_size=0)
+    stored = AddressMatcher(store.df_addr_optimized, store.matcher_index, cache_size=0)
+    queries = [normalize_rag_address(q) for q in ['', 'xyz', '중구'] + sample_addresses(df_built, 50, seed=3, typo_rate=0.4)]
+    for q in queries:
+        expected = built.top_k(q, 3)
+        assert [(c.full_address, c.score, c.position) for c in stored.top_k(q, 3)] == [(c.full_address, c.score, c.position) for c in expected]
+
+
+def test_stored_splitter_tables_and_gazetteer_patterns(address_path, store):
+    df_built = normalize_address_df(pd.read_parquet(address_path))
+    built = AddressSplitter(df_built)
+    stored = AddressSplitter(None, tables=store.splitter_tables)
+    assert stored.token_slots == built.token_slots
+    assert stored.continuations == built.continuations
+    assert stored.province_slots == built.province_slots
+    assert set(store.gazetteer_patterns) == gazetteer_patterns(df_built)
+
+
+def test_stored_index_is_what_build_index_returns(address_path, store):
+    # Fails when _build_index changes without the store layout following it
+    index = AddressMatcher(normalize_address_df(pd.read_parquet(address_path)), cache_size=0).export_index()
+    assert set(index) == set(ARRAY_ENTRIES) | set(STRING_ENTRIES)
+    for name, dtype in ARRAY_ENTRIES.items():
+        assert index[name].dtype == np.dtype(dtype), name
+        assert np.array_equal(store.matcher_index[name], index[name]), name
+    for name in STRING_ENTRIES:
+        assert store.matcher_index[name] == index[name], name
+
+
+def test_staleness(tmp_path):
+    address_path = str(tmp_path / 'address.parquet')
+    store_dir = str(tmp_path / 'address_store')
+    df = pd.read_parquet(ADDRESS_PATH).head(200)
+    df.to_parquet(address_path)
+    assert not is_store_current(address_path, store_dir)
+    ensure_address_store(address_path, store_dir)
+    assert is_store_current(address_path, store_dir)
+
+    # Source touched (mtime)
+    stat = os.stat(address_path)
+    os.utime(address_path, (stat.st_atime, stat.st_mtime + 10))
+    assert not is_store_current(address_path, store_dir)
+    ensure_address_store(address_path, store_dir)
+    assert is_store_current(address_path, store_dir)
+
+    # Source rewritten (size)
+    df.head(100).to_parquet(address_path)
+    assert not is_store_current(address_path, store_dir)
+    ensure_address_store(address_path, store_dir)
+    assert len(load_address_store(store_dir).df_addr_optimized) == 100
+
+    # Store written by another version or format
+    meta_path = os.path.join(store_dir, META_FILENAME)
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    for key, value in [('version', address_store.STORE_VERSION - 1), ('format', 'other')]:
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({**meta, key: value}, f)
+        assert not is_store_current(address_path, store_dir)
+
+
+def test_format_change_invalidates_store(tmp_path, monkeypatch):
+    address_path = str(tmp_path / 'address.parquet')
+    store_dir = str(tmp_path / 'address_store')
+    pd.read_parquet(ADDRESS_PATH).head(200).to_parquet(address_path)
+    ensure_address_store(address_path, store_dir)
+    monkeypatch.setattr(address_store, 'NGRAM_SIZE', 3)
+    assert not is_store_current(address_path, store_dir)
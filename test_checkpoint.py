@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import run_address_processing
+from benchmarks.fakes import make_articles
+from benchmarks.pipeline import build_fake_processor
+from checkpoint import CheckpointWriter, load_checkpoint, merge_checkpoint
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+ARTICLES = 12
+DONE = 5 # Results in the checkpoint left by the interrupted run
+
+
+def _result(index, **fields) -> dict:
+    return {'index': index, 'matched_full_address_df': None, **fields}
+
+
+def test_segments_are_read_in_order_and_later_ones_win(tmp_path):
+    checkpoint_dir = str(tmp_path)
+    with CheckpointWriter(checkpoint_dir, '20250101_w0') as checkpoint:
+        checkpoint.append(_result(0, run=1))
+        checkpoint.append(_result(1, run=1))
+    with CheckpointWriter(checkpoint_dir, '20250102_w0') as checkpoint:
+        checkpoint.append(_result(1, run=2))
+    results = load_checkpoint(checkpoint_dir)
+    assert {index: result_dict['run'] for index, result_dict in results.items()} == {0: 1, 1: 2}
+
+
+def test_truncated_line_is_skipped(tmp_path):
+    checkpoint_dir = str(tmp_path)
+    with CheckpointWriter(checkpoint_dir, 'w0') as checkpoint:
+        checkpoint.append(_result(0))
+        checkpoint.append(_result(1, score=np.float32(91.5), count=np.int64(2)))
+    # A crash in the middle of a write
+    with open(checkpoint.path, 'a', encoding='utf-8') as f:
+        f.write('{"index": 2, "matched_full_addr')
+    results = load_checkpoint(checkpoint_dir)
+    assert sorted(results) == [0, 1]
+    assert (results[1]['score'], results[1]['count']) == (91.5, 2)
+
+
+def test_load_missing_checkpoint(tmp_path):
+    assert load_checkpoint(str(tmp_path / 'none')) == {}
+
+
+def test_merge_sorts_by_index(tmp_path):
+    checkpoint_dir = str(tmp_path / 'checkpoint')
+    for segment, indices in [('w1', [7, 3]), ('w0', [5, 1])]:
+        with CheckpointWriter(checkpoint_dir, segment) as checkpoint:
+            for index in indices:
+                checkpoint.append(_result(index, segment=segment))
+    merged = merge_checkpoint(checkpoint_dir, str(tmp_path / 'merged.parquet.gzip'))
+    assert merged['index'].tolist() == [1, 3, 5, 7]
+    assert pd.read_parquet(tmp_path / 'merged.parquet.gzip').equals(merged)
+
+
+@pytest.fixture(scope='module')
+def df_addr() -> pd.DataFrame:
+    df = pd.read_parquet(ADDRESS_PATH)
+    return df[df['lv0'].isin(['서울', '부산'])].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('use_pipeline', [True, False])
+def test_resume_skips_finished_indices(tmp_path, monkeypatch, df_addr, use_pipeline):
+    corpus_path = str(tmp_path / 'corpus.parquet')
+    pd.DataFrame({'content': make_articles(df_addr, ARTICLES, seed=2)}).to_parquet(corpus_path, row_group_size=4)
+    processor = build_fake_processor(df_addr)
+    monkeypatch.setattr(run_address_processing, 'TEXT_PATH', corpus_path)
+    monkeypatch.setattr(run_address_processing, 'build_processor', lambda *args: processor)
+
+    # The interrupted run: DONE results, then a line cut off by the crash
+    checkpoint_dir = str(tmp_path / 'checkpoint')
+    with CheckpointWriter(checkpoint_dir, 'first') as checkpoint:
+        for index in range(DONE):
+            checkpoint.append(_result(index, run='first'))
+    with open(checkpoint.path, 'a', encoding='utf-8') as f:
+        f.write('{"index": 5, "ru')
+
+    written = run_address_processing.process_range(0, ARTICLES, 'fake', checkpoint_dir, 'second', use_pipeline=use_pipeline)
+    assert written == ARTICLES - DONE
+    assert processor.llm_extractor.prompt_stats()['articles'] <= ARTICLES - DONE
+    assert os.path.exists(os.path.join(checkpoint_dir, 'metrics_second.json'))
+
+    merged = merge_checkpoint(checkpoint_dir, str(tmp_path / 'merged.parquet.gzip'))
+    assert merged['index'].tolist() == list(range(ARTICLES))
+    assert (merged['run'] == 'first').sum() == DONE
+    # Resuming a finished run does nothing
+    assert run_address_processing.process_range(0, ARTICLES, 'fake', checkpoint_dir, 'third', use_pipeline=use_pipeline) == 0
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from context_builder import CHARS_PER_TOKEN, ContextBuilder, estimate_tokens, split_sentences
+from gazetteer import Gazetteer
+
+ADDRESS_ROWS = [('서울', '서울특별시', '강남구', '역삼동', '')]
+# Sentences of SENTENCE_LENGTH characters; len counts them against the budget
+LEAD = '오늘 새벽 큰불이 났다.' # scores only its bonus
+PLACE = '강남구 역삼동 빌딩이다.' # two place names
+KEYWORD = '현장은 몹시도 혼잡했다.' # one keyword
+OTHER = '소방관 다섯 명이 왔다.'
+SENTENCE_LENGTH = 13
+
+
+@pytest.fixture(scope='module')
+def gazetteer() -> Gazetteer:
+    return Gazetteer(pd.DataFrame(ADDRESS_ROWS, columns=['lv0', 'lv1', 'lv2', 'lv3', 'lv4']))
+
+
+def _builder(gazetteer: Gazetteer | None, token_budget: int) -> ContextBuilder:
+    return ContextBuilder(gazetteer, token_budget=token_budget, token_counter=len)
+
+
+def test_sentences_have_the_same_length():
+    assert {len(sentence) for sentence in [LEAD, PLACE, KEYWORD, OTHER]} == {SENTENCE_LENGTH}
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('가' * 3) == 2
+    assert estimate_tokens('가' * 4) == 3
+
+
+def test_split_sentences():
+    assert split_sentences('첫 문장이다. 둘째?!\n\n셋째 줄\n  끝') == ['첫 문장이다.', '둘째?!', '셋째 줄', '끝']
+    assert split_sentences(' \n ') == []
+
+
+def test_text_within_budget_is_unchanged(gazetteer):
+    text = f'{OTHER}\n\n {PLACE}'
+    assert _builder(gazetteer, len(text)).build(text) == text
+
+
+def test_best_sentences_are_kept_in_their_original_order(gazetteer):
+    text = '\n'.join([KEYWORD, OTHER, PLACE, OTHER])
+    # PLACE is picked first, KEYWORD next
+    assert _builder(gazetteer, SENTENCE_LENGTH).build(text) == PLACE
+    assert _builder(gazetteer, 2 * SENTENCE_LENGTH).build(text) == f'{KEYWORD}\n{PLACE}'
+
+
+def test_lead_sentence_wins_ties(gazetteer):
+    # Both score 1; without the bonus KEYWORD would win
+    text = ' '.join([LEAD, OTHER, KEYWORD])
+    assert _builder(gazetteer, SENTENCE_LENGTH).build(text) == LEAD
+    assert _builder(gazetteer, 2 * SENTENCE_LENGTH).build(text) == f'{LEAD}\n{KEYWORD}'
+
+
+def test_place_names_need_the_gazetteer(gazetteer):
+    text = '\n'.join([OTHER, PLACE])
+    assert _builder(gazetteer, SENTENCE_LENGTH).build(text) == PLACE
+    assert _builder(None, SENTENCE_LENGTH).build(text) == OTHER
+
+
+def test_sentences_that_do_not_fit_are_skipped(gazetteer):
+    long_place = '서울 강남구 역삼동 일대 빌딩 지하 주차장에서 시작된 불이 번졌다.'
+    text = ' '.join([OTHER, long_place, KEYWORD])
+    assert _builder(gazetteer, 2 * SENTENCE_LENGTH).build(text) == f'{OTHER}\n{KEYWORD}'
+
+
+def test_article_is_cut_when_no_sentence_fits():
+    text = '가' * 100 + '.'
+    assert ContextBuilder(token_budget=10).build(text) == '가' * int(10 * CHARS_PER_TOKEN)
@@ -0,0 +1,63 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from corpus_reader import corpus_length, iter_corpus
+
+ROWS = 50
+ROW_GROUP_SIZE = 7
+
+
+def _corpus(index: pd.Index) -> pd.DataFrame:
+    contents = [f'기사 {i}' if i % 11 else None for i in range(ROWS)]
+    return pd.DataFrame({'content': contents, 'title': [f't{i}' for i in range(ROWS)]}, index=index)
+
+
+@pytest.fixture(params=['default', 'range', 'labels'])
+def corpus(request, tmp_path) -> tuple[str, pd.DataFrame]:
+    index = {
+        'default': pd.RangeIndex(ROWS),
+        'range': pd.RangeIndex(100, 100 + 2 * ROWS, 2), # stored as metadata only
+        'labels': pd.Index([f'article-{i}' for i in range(ROWS)], name='article_id'), # stored as a column
+    }[request.param]
+    df = _corpus(index)
+    path = str(tmp_path / 'corpus.parquet')
+    df.to_parquet(path, row_group_size=ROW_GROUP_SIZE)
+    return path, df
+
+
+@pytest.mark.parametrize('start, end', [(0, None), (5, 23), (14, 21), (20, 20), (45, 80), (60, None)])
+@pytest.mark.parametrize('batch_size', [3, 1024])
+def test_iter_corpus_matches_pandas(corpus, start, end, batch_size):
+    path, df = corpus
+    expected = list(zip(df.index[start:end], df['content'].iloc[start:end]))
+    assert list(iter_corpus(path, start, end, batch_size=batch_size)) == expected
+
+
+def test_corpus_length(corpus):
+    path, _ = corpus
+    assert corpus_length(path) == ROWS
+
+
+def test_iter_corpus_without_pandas_metadata(tmp_path):
+    path = str(tmp_path / 'plain.parquet')
+    pq.write_table(pa.table({'content': [f'기사 {i}' for i in range(ROWS)]}), path, row_group_size=ROW_GROUP_SIZE)
+    # Labels are row positions
+    assert list(iter_corpus(path, 8, 12)) == [(i, f'기사 {i}') for i in range(8, 12)]
+
+
+def test_iter_corpus_reads_only_the_text_column(tmp_path, monkeypatch):
+    path = str(tmp_path / 'corpus.parquet')
+    _corpus(pd.RangeIndex(ROWS)).to_parquet(path, row_group_size=ROW_GROUP_SIZE)
+    requested = []
+    iter_batches = pq.ParquetFile.iter_batches
+
+    def recording_iter_batches(self, *args, **kwargs):
+        requested.append((kwargs['columns'], kwargs['row_groups']))
+        return iter_batches(self, *args, **kwargs)
+
+    monkeypatch.setattr(pq.ParquetFile, 'iter_batches', recording_iter_batches)
+    list(iter_corpus(path, 15, 30))
+    # Rows 15-29 lie in row groups 2-4 (rows 14-34)
+    assert requested == [(['content'], [2, 3, 4])]
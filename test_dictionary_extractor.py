@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from address_utils import normalize_address_df
+from benchmarks.fakes import ADDRESS_SENTENCE
+from benchmarks.pipeline import build_fake_processor
+from dictionary_extractor import AMBIGUOUS, FOUND, NOT_FOUND, DictionaryExtractor
+from gazetteer import Gazetteer
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+
+
+@pytest.fixture(scope='module')
+def df_addr_optimized() -> pd.DataFrame:
+    return normalize_address_df(pd.read_parquet(ADDRESS_PATH))
+
+
+@pytest.fixture(scope='module')
+def extractor(df_addr_optimized) -> DictionaryExtractor:
+    return DictionaryExtractor(df_addr_optimized)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('충청남도 천안시 동남구 대흥동에서 화재가 났다', '충청남도 천안시 동남구 대흥동'),
+    # Short and stripped forms are named with the table's values
+    ('충남 천안 대흥동 주민', '충청남도 천안시 동남구 대흥동'),
+    ('서울 강서구 개화동', '서울특별시 강서구 개화동'),
+    # Rows of several provinces that agree on the mentioned levels
+    ('강서구 개화동에서', '강서구 개화동'),
+    ('광주 서구 치평동', '광주광역시 서구 치평동'),
+])
+def test_found(extractor, text, expected):
+    status, result = extractor.extract(text)
+    assert (status, result['address']) == (FOUND, expected)
+    assert extractor.extract_info(text)['address'] == expected
+
+
+@pytest.mark.parametrize('text', [
+    # A lone name is left to the LLM, however unique
+    '중구에서 사고',
+    '서울에서 열린 행사',
+    '역삼동',
+    # '남구' inside '강남구' is not a mention, which leaves 부산 alone
+    '부산 강남구',
+    '오늘 날씨는 맑음',
+])
+def test_single_level_mentions_are_not_found(extractor, text):
+    assert extractor.extract(text) == (NOT_FOUND, None)
+    assert extractor.extract_info(text) is None
+
+
+def test_min_levels(df_addr_optimized):
+    assert DictionaryExtractor(df_addr_optimized, min_levels=1).extract('역삼동')[1]['address'] == '역삼동'
+
+
+def test_several_addresses_are_ambiguous(extractor):
+    assert extractor.extract('서울 강남구 역삼동과 부산 해운대구 우동') == (AMBIGUOUS, None)
+
+
+def test_stats(df_addr_optimized):
+    extractor = DictionaryExtractor(df_addr_optimized)
+    for text in ['서울 강서구 개화동', '중구', '서울 강남구 역삼동과 부산 해운대구 우동', '날씨']:
+        extractor.extract(text)
+    assert extractor.stats() == {FOUND: 1, AMBIGUOUS: 1, NOT_FOUND: 2, 'found_rate': 0.25}
+
+
+def test_shares_the_gazetteer_automaton(df_addr_optimized):
+    gazetteer = Gazetteer(df_addr_optimized)
+    assert DictionaryExtractor(df_addr_optimized, gazetteer=gazetteer).automaton is gazetteer.automaton
+
+
+@pytest.fixture(scope='module')
+def df_addr() -> pd.DataFrame:
+    df = pd.read_parquet(ADDRESS_PATH)
+    return df[df['lv0'].isin(['서울', '부산'])].reset_index(drop=True)
+
+
+def test_hybrid_mode_falls_back_to_the_llm(df_addr):
+    processor = build_fake_processor(df_addr, extractor_mode='hybrid')
+    found = processor.process_text('서울 강남구 역삼동에서 화재가 났다.')
+    assert (found['extraction_source'], found['matched_full_address_df']) == ('dictionary', '서울특별시 강남구 역삼동')
+    assert processor.llm_extractor.llm.calls == 0
+    # A single-level mention goes to the LLM
+    fallback = processor.process_text(ADDRESS_SENTENCE.format(address='역삼동'))
+    assert (fallback['extraction_source'], fallback['address']) == ('llm', '역삼동')
+    assert processor.llm_extractor.llm.calls == 1
+
+
+def test_dictionary_mode_never_calls_the_llm(df_addr):
+    processor = build_fake_processor(df_addr, extractor_mode='dictionary')
+    result_dict = processor.process_text('중구에서 사고가 났다.')
+    assert result_dict['extraction_source'] is None and result_dict['address'] is None
+    assert processor.llm_extractor.llm.calls == 0
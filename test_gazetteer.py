@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from checkpoint import CheckpointWriter
+from gazetteer import CANDIDATE, NO_CANDIDATE, Gazetteer, compare_runs, evaluate_recall
+from run_address_processing import evaluate_prefilter
+
+# lv0-lv4 as normalize_address_df leaves them
+ADDRESS_ROWS = [
+    ('서울', '서울특별시', '강남구', '역삼동', ''),
+    ('부산', '부산광역시', '해운대구', '우동', ''),
+]
+# index -> (text, label of the --no-gazetteer run)
+LABELED = {
+    0: ('서울 강남구 역삼동에서 화재가 났다', '서울특별시 강남구 역삼동'), # positive, kept
+    1: ('도심 한복판 교차로에서 사고', '부산광역시 해운대구 우동'), # positive, skipped
+    2: ('내일은 전국이 맑겠습니다', None), # negative, skipped
+    3: ('부산 시민들이 해변에 몰렸다', None), # negative, kept
+}
+
+
+@pytest.fixture(scope='module')
+def gazetteer() -> Gazetteer:
+    return Gazetteer(pd.DataFrame(ADDRESS_ROWS, columns=['lv0', 'lv1', 'lv2', 'lv3', 'lv4']))
+
+
+def _labeled_results() -> dict:
+    return {
+        index: {'index': index, 'original_text': text, 'prefilter': None, 'matched_full_address_df': label}
+        for index, (text, label) in LABELED.items()
+    }
+
+
+def _prefiltered_results(gazetteer: Gazetteer) -> dict:
+    # A copy, so that the fixture's skip counters stay untouched
+    gazetteer = Gazetteer(None, patterns=gazetteer.patterns)
+    results = {}
+    for index, result_dict in _labeled_results().items():
+        prefilter = gazetteer.check(result_dict['original_text'])
+        label = result_dict['matched_full_address_df'] if prefilter == CANDIDATE else None
+        results[index] = {**result_dict, 'prefilter': prefilter, 'matched_full_address_df': label}
+    return results
+
+
+def test_patterns_include_stripped_forms(gazetteer):
+    assert {'서울특별시', '서울', '부산광역시', '부산', '해운대구', '역삼동'} <= gazetteer.patterns
+    assert gazetteer.find('부산광역시 해운대구 우동') == ['부산', '부산광역시', '해운대구', '우동']
+
+
+def test_evaluate_recall(gazetteer):
+    report = evaluate_recall(gazetteer, _labeled_results().values())
+    assert report == {'samples': 4, 'positives': 2, 'recall': 0.5, 'skip_rate': 0.5, 'missed_indices': [1]}
+    # evaluate_recall does not count towards the skip rate
+    assert gazetteer.stats()['scanned'] == 0
+
+
+def test_compare_runs_uses_recorded_decisions(gazetteer):
+    prefiltered = _prefiltered_results(gazetteer)
+    # Only articles in both runs are compared
+    prefiltered[4] = {'index': 4, 'original_text': '', 'prefilter': NO_CANDIDATE}
+    report = compare_runs(_labeled_results(), prefiltered)
+    assert report == {'samples': 4, 'positives': 2, 'recall': 0.5, 'skip_rate': 0.5, 'missed_indices': [1]}
+
+
+def _write_checkpoint(checkpoint_dir: str, results: dict) -> str:
+    with CheckpointWriter(checkpoint_dir, 'test') as checkpoint:
+        for result_dict in results.values():
+            checkpoint.append(result_dict)
+    return checkpoint_dir
+
+
+def test_evaluate_prefilter_from_checkpoints(tmp_path, gazetteer):
+    labeled_dir = _write_checkpoint(str(tmp_path / 'no_gazetteer'), _labeled_results())
+    prefiltered_dir = _write_checkpoint(str(tmp_path / 'prefiltered'), _prefiltered_results(gazetteer))
+    report = evaluate_prefilter(labeled_dir, prefiltered_dir, gazetteer=gazetteer)
+    assert report['gazetteer']['recall'] == report['prefiltered_run']['recall'] == 0.5
+    assert report['gazetteer']['missed_indices'] == report['prefiltered_run']['missed_indices'] == [1]
+
+    # A prefiltered run has no labels for the articles it skipped
+    with pytest.raises(ValueError):
+        evaluate_prefilter(prefiltered_dir, gazetteer=gazetteer)
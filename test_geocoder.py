@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+import geocoder
+from address_utils import normalize_address_df
+from benchmarks.fakes import FakeGeocoder
+from geocoder import CachedGeocoder, GeocodeCache, GeocodeResult, OfflineGeocoder
+
+SEOUL = GeocodeResult(37.5, 127.03, '서울특별시 강남구 역삼동')
+
+
+class MissingGeocoder(FakeGeocoder):
+    """FakeGeocoder that finds nothing."""
+
+    def geocode(self, query: str) -> None:
+        self.calls += 1
+        return None
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(geocoder.time, 'time', lambda: now[0])
+    return now
+
+
+def test_cache_hit_negative_hit_and_miss(tmp_path):
+    cache = GeocodeCache(str(tmp_path))
+    assert cache.get('서울 강남구 역삼동') == (False, None)
+    cache.put('서울 강남구 역삼동', SEOUL)
+    cache.put('없는 주소', None)
+    assert cache.get('서울 강남구 역삼동') == (True, SEOUL)
+    assert cache.get('없는 주소') == (True, None)
+    assert cache.stats() == {'hits': 1, 'negative_hits': 1, 'misses': 1, 'hit_rate': 2 / 3}
+    cache.close()
+
+    reopened = GeocodeCache(str(tmp_path))
+    assert reopened.get('서울 강남구 역삼동') == (True, SEOUL)
+    reopened.close()
+
+
+def test_cached_miss_expires(tmp_path, clock):
+    cache = GeocodeCache(str(tmp_path), negative_ttl=60)
+    cache.put('없는 주소', None)
+    cache.put('서울 강남구 역삼동', SEOUL)
+    clock[0] += 61
+    assert cache.get('없는 주소') == (False, None)
+    # Hits never expire
+    assert cache.get('서울 강남구 역삼동') == (True, SEOUL)
+    cache.close()
+
+
+def test_cached_geocoder_calls_the_network_once_per_query(tmp_path):
+    fake = FakeGeocoder()
+    cached = CachedGeocoder(fake, GeocodeCache(str(tmp_path)))
+    first = cached.geocode('서울 강남구 역삼동')
+    assert cached.geocode('서울 강남구 역삼동') == first
+    missing = CachedGeocoder(MissingGeocoder(), cached.cache)
+    assert missing.geocode('없는 주소') is None
+    assert missing.geocode('없는 주소') is None
+    assert (fake.calls, missing.geolocator.calls) == (1, 1)
+    assert cached.stats()['network_calls'] == 1
+
+
+def test_offline_geocoder_without_network_or_cache(tmp_path):
+    cached = CachedGeocoder(None, GeocodeCache(str(tmp_path)))
+    assert cached.geocode('서울 강남구 역삼동') is None
+    # Offline misses are not cached: a later online run still resolves them
+    assert cached.cache.get('서울 강남구 역삼동') == (False, None)
+    assert cached.stats()['network_calls'] == 0
+
+
+def test_offline_table_joins_on_levels():
+    df_addr = normalize_address_df(pd.DataFrame({
+        'lv0': ['서울', '서울'], 'lv1': ['서울특별시', '서울특별시'], 'lv2': ['강남구', '강남구'],
+        'lv3': ['역삼동', '삼성동'], 'lv4': [None, None], 'lv5': [float('nan')] * 2,
+    }))
+    df_coords = pd.DataFrame({
+        'lv0': ['서울', '서울'], 'lv1': ['서울특별시', '서울특별시'], 'lv2': ['강남구', '강남구'],
+        'lv3': ['역삼동', '삼성동'], 'lv4': [None, ''], 'latitude': [37.5, None], 'longitude': [127.03, None],
+    })
+    offline = OfflineGeocoder(df_coords, df_addr)
+    full_address = df_addr.loc[df_addr['lv3'] == '역삼동', 'full_address'].iloc[0]
+    assert offline.geocode(full_address) == GeocodeResult(37.5, 127.03, full_address)
+    # Rows without coordinates are left out
+    assert offline.geocode(df_addr.loc[df_addr['lv3'] == '삼성동', 'full_address'].iloc[0]) is None
+    assert offline.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
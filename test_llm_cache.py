@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+
+import llm_cache
+from benchmarks.fakes import ADDRESS_SENTENCE, FakeLLM
+from llm_cache import LLMResultCache
+from llm_extractor import LLMExtractor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Distinct, increasing access times regardless of the clock's resolution
+    ticks = itertools.count(1)
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: float(next(ticks)))
+
+
+def test_make_key_separates_parts():
+    key = LLMResultCache.make_key('model', 'template', 'ab', 'c')
+    assert key == LLMResultCache.make_key('model', 'template', 'ab', 'c')
+    assert key != LLMResultCache.make_key('model', 'template', 'a', 'bc')
+    assert key != LLMResultCache.make_key('other', 'template', 'ab', 'c')
+
+
+def test_hit_miss_and_persistence(tmp_path):
+    cache = LLMResultCache(str(tmp_path))
+    assert cache.get('a') is None
+    cache.put('a', {'address': ['서울 강남구']})
+    cache.put('a', {'address': ['부산 해운대구']}) # Replacing does not grow the cache
+    assert cache.get('a') == {'address': ['부산 해운대구']}
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1, 'max_entries': llm_cache.DEFAULT_MAX_ENTRIES}
+    cache.close()
+
+    reopened = LLMResultCache(str(tmp_path))
+    assert reopened.get('a') == {'address': ['부산 해운대구']}
+    assert reopened.stats()['entries'] == 1
+    reopened.close()
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = LLMResultCache(str(tmp_path), max_entries=10)
+    for i in range(10):
+        cache.put(f'k{i}', {'i': i})
+    # Reading k0 makes k1 and k2 the least recently used
+    assert cache.get('k0') == {'i': 0}
+    cache.put('k10', {'i': 10})
+    # One over max_entries plus EVICTION_FRACTION of it are evicted at once
+    assert cache.stats()['entries'] == 9
+    assert cache.get('k1') is None and cache.get('k2') is None
+    assert all(cache.get(f'k{i}') == {'i': i} for i in [0] + list(range(3, 11)))
+    cache.close()
+
+
+def test_extractor_reuses_cached_results(tmp_path):
+    llm = FakeLLM()
+    text = ADDRESS_SENTENCE.format(address='서울 강남구 역삼동')
+    first = LLMExtractor(llm=llm, cache_dir=str(tmp_path)).extract_info(text)
+    # A new extractor (e.g. the next run) hits the same on-disk entry
+    second = LLMExtractor(llm=llm, cache_dir=str(tmp_path)).extract_info(text)
+    assert first == second and first['address'] == ['서울 강남구 역삼동']
+    assert llm.calls == 1
+    # Another model never hits it
+    LLMExtractor(model='other', llm=llm, cache_dir=str(tmp_path)).extract_info(text)
+    assert llm.calls == 2
+
+
+def test_extractor_does_not_cache_parse_failures(tmp_path):
+    class ProseLLM(FakeLLM):
+        def invoke(self, prompt: str) -> str:
+            self.calls += 1
+            return "주소를 찾을 수 없습니다."
+
+    llm = ProseLLM()
+    extractor = LLMExtractor(llm=llm, cache_dir=str(tmp_path))
+    assert extractor.extract_info('기사') is None
+    assert extractor.extract_info('기사') is None
+    assert llm.calls == 2
+    assert extractor.cache.stats()['entries'] == 0
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+import llm_extractor
+from benchmarks.fakes import ADDRESS_SENTENCE, FILLER_SENTENCES, FakeLLM
+from llm_extractor import LLMExtractor
+
+ADDRESSES = ['서울 강남구 역삼동', '부산 해운대구 우동', '대구 중구 동인동', '광주 서구 치평동', '대전 유성구 봉명동']
+
+
+class FlakyLLM(FakeLLM):
+    """FakeLLM whose first `failures` requests raise."""
+
+    def __init__(self, failures: int, latency: float = 0.0):
+        super().__init__(latency)
+        self.failures = failures
+
+    async def ainvoke(self, prompt: str) -> str:
+        if self.calls < self.failures:
+            self.calls += 1
+            raise ConnectionError("server unavailable")
+        return await super().ainvoke(prompt)
+
+
+def _items() -> list[tuple[str, str]]:
+    # Non-integer, out-of-order indices check that results are tagged, not positional
+    return [(f'article-{i}', f"{FILLER_SENTENCES[0]} {ADDRESS_SENTENCE.format(address=address)}") for i, address in reversed(list(enumerate(ADDRESSES)))]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_extractor, 'RETRY_BACKOFF_SECONDS', 0.0)
+
+
+@pytest.mark.parametrize('batch_size', [1, 2])
+def test_extract_many_tags_results_with_their_index(batch_size):
+    items = _items()
+    results = LLMExtractor(llm=FakeLLM(latency=0.01)).extract_many(items, max_concurrency=3, batch_size=batch_size)
+    assert list(results) == [index for index, _ in items]
+    for (index, _), address in zip(items, reversed(ADDRESSES)):
+        assert results[index]['address'] == [address]
+
+
+def test_extract_many_retries_failed_requests():
+    llm = FlakyLLM(failures=2)
+    items = _items()[:1]
+    results = LLMExtractor(llm=llm).extract_many(items, retries=2)
+    assert results[items[0][0]]['address'] == [ADDRESSES[-1]]
+    assert llm.calls == 3
+
+
+def test_extract_many_gives_up_after_retries():
+    llm = FlakyLLM(failures=10)
+    results = LLMExtractor(llm=llm).extract_many(_items()[:2], max_concurrency=1, retries=1)
+    assert list(results.values()) == [None, None]
+    assert llm.calls == 4
+
+
+def test_extract_many_times_out_slow_requests():
+    results = LLMExtractor(llm=FakeLLM(latency=1.0)).extract_many(_items()[:2], timeout=0.05, retries=1)
+    assert list(results.values()) == [None, None]
+
+
+def test_extract_many_inside_running_event_loop():
+    # e.g. a Jupyter notebook cell
+    async def main() -> dict:
+        return LLMExtractor(llm=FakeLLM()).extract_many(_items(), max_concurrency=2)
+
+    results = asyncio.run(main())
+    assert [result['address'] for result in results.values()] == [[address] for address in reversed(ADDRESSES)]
+
+
+def test_extract_batch_keeps_valid_records_of_malformed_answer():
+    class MalformedBatchLLM(FakeLLM):
+        def invoke(self, prompt: str) -> str:
+            if '[기사 1]' in prompt:
+                self.calls += 1
+                return '[{"id": 0, "address": ["서울 강남구"], "who": "경찰" "when": ""}, {"id": 1, "address": ["부산 해운대구"]}]'
+            return super().invoke(prompt)
+
+    llm = MalformedBatchLLM()
+    items = _items()[:2]
+    results = LLMExtractor(llm=llm).extract_batch(items)
+    assert results[items[1][0]] == {'address': ['부산 해운대구']}
+    # Only the malformed record is requested again
+    assert llm.calls == 2
@@ -0,0 +1,125 @@
+import json
+
+import pandas as pd
+import pytest
+
+import metrics
+from benchmarks.fakes import make_articles
+from benchmarks.pipeline import build_fake_processor
+from metrics import Histogram, MetricsRegistry, _quantile
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+ARTICLES = 6
+
+
+def test_quantile_interpolates():
+    assert _quantile([], 0.5) == 0.0
+    assert _quantile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    assert _quantile([1.0, 2.0, 3.0, 4.0], 0.99) == pytest.approx(3.97)
+    assert _quantile([7.0], 0.95) == 7.0
+
+
+def test_histogram_summary():
+    histogram = Histogram(buckets=(1.0, 10.0))
+    for value in [0.5, 2.0, 4.0, 20.0]:
+        histogram.observe(value)
+    # Values above the last bound only count towards +Inf
+    assert histogram.bucket_counts == [1, 2]
+    assert histogram.summary() == {
+        'count': 4, 'sum': 26.5, 'mean': 6.625, 'min': 0.5, 'max': 20.0, 'p50': 3.0, 'p95': pytest.approx(17.6), 'p99': pytest.approx(19.52),
+    }
+    assert Histogram().summary() == {'count': 0, 'sum': 0.0, 'mean': 0.0, 'min': 0.0, 'max': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+
+
+def test_histogram_reservoir_keeps_max_samples():
+    histogram = Histogram(max_samples=100)
+    for value in range(10_000):
+        histogram.observe(float(value))
+    assert len(histogram._samples) == 100
+    # Count, sum and extremes stay exact
+    assert (histogram.count, histogram.min, histogram.max) == (10_000, 0.0, 9999.0)
+    assert 3000 < histogram.summary()['p50'] < 7000
+
+
+def test_counters_are_keyed_by_labels():
+    registry = MetricsRegistry()
+    registry.inc('prefilter', outcome='candidate')
+    registry.inc('prefilter', 2, outcome='candidate')
+    registry.inc('prefilter', outcome='no_candidate')
+    registry.set_counter('cache_lookups', 5, result='hit', cache='llm')
+    registry.set_counter('cache_lookups', 7, cache='llm', result='hit')
+    assert registry.counter('prefilter', outcome='candidate') == 3
+    assert registry.counter('cache_lookups', result='hit', cache='llm') == 7
+    assert registry.counter('errors') == 0
+    assert registry.summary()['counters'] == {
+        'cache_lookups{cache="llm",result="hit"}': 7,
+        'prefilter{outcome="candidate"}': 3,
+        'prefilter{outcome="no_candidate"}': 1,
+    }
+
+
+def test_timer_observes_the_block(monkeypatch):
+    now = iter([10.0, 10.25])
+    monkeypatch.setattr(metrics.time, 'perf_counter', lambda: next(now))
+    registry = MetricsRegistry()
+    with pytest.raises(ValueError):
+        with registry.timer('stage_latency', stage='llm'):
+            raise ValueError
+    # Failed blocks are timed too
+    assert registry.summary()['histograms']['stage_latency{stage="llm"}']['sum'] == 0.25
+
+
+def test_json_export(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc('extraction_source', source='dictionary')
+    registry.observe('article_latency', 0.5)
+    path = tmp_path / 'metrics.json'
+    registry.to_json(str(path))
+    assert json.loads(path.read_text(encoding='utf-8')) == registry.summary()
+
+
+def test_prometheus_text_format(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc('prefilter', outcome='no_candidate')
+    registry.inc('errors', 2)
+    registry.observe('stage_latency', 0.5, stage='match')
+    registry.observe('stage_latency', 2.0, stage='match')
+    registry.observe('stage_latency', 200.0, stage='match')
+    text = registry.to_prometheus(prefix='test_')
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert lines[:4] == [
+        '# TYPE test_errors_total counter',
+        'test_errors_total 2',
+        '# TYPE test_prefilter_total counter',
+        'test_prefilter_total{outcome="no_candidate"} 1',
+    ]
+    assert lines[4] == '# TYPE test_stage_latency_seconds histogram'
+    # Buckets are cumulative and end with +Inf
+    buckets = {line.split('le="')[1].split('"')[0]: int(line.rsplit(' ', 1)[1]) for line in lines if '_bucket' in line}
+    assert (buckets['0.25'], buckets['0.5'], buckets['1.0'], buckets['2.5'], buckets['120.0'], buckets['+Inf']) == (0, 1, 1, 2, 2, 3)
+    assert lines[-2:] == ['test_stage_latency_seconds_sum{stage="match"} 202.5', 'test_stage_latency_seconds_count{stage="match"} 3']
+    assert 'test_stage_latency_seconds_bucket{stage="match",le="0.5"} 1' in lines
+
+    registry.write_prometheus(str(tmp_path / 'metrics.prom'), prefix='test_')
+    assert (tmp_path / 'metrics.prom').read_text(encoding='utf-8') == text
+
+
+@pytest.fixture(scope='module')
+def df_addr() -> pd.DataFrame:
+    df = pd.read_parquet(ADDRESS_PATH)
+    return df[df['lv0'].isin(['서울', '부산'])].reset_index(drop=True)
+
+
+def test_processor_metrics(df_addr):
+    processor = build_fake_processor(df_addr)
+    for text in make_articles(df_addr, ARTICLES, seed=3):
+        processor.process_text(text)
+    registry = processor.collect_metrics()
+    summary = registry.summary()
+    assert summary['histograms']['article_latency']['count'] == ARTICLES
+    sources = {key: value for key, value in summary['counters'].items() if key.startswith('extraction_source')}
+    assert sum(sources.values()) == ARTICLES
+    assert registry.counter('llm_prompts') == processor.llm_extractor.prompt_stats()['prompts']
+    match_stats = processor.address_matcher.match_stats()
+    assert {outcome: registry.counter('match_outcome', outcome=outcome) for outcome in match_stats} == match_stats
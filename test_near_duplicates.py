@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+
+import run_address_processing
+from benchmarks.fakes import ADDRESS_SENTENCE, FILLER_SENTENCES, NO_PLACE_SENTENCES
+from benchmarks.pipeline import build_fake_processor
+from checkpoint import merge_checkpoint
+from near_duplicates import MinHashLSH, NearDuplicateFilter, _lsh_params
+
+ADDRESS_PATH = 'data/address.parquet.gzip'
+ARTICLE = ' '.join([ADDRESS_SENTENCE.format(address='서울특별시 강남구 역삼동')] + FILLER_SENTENCES)
+# Wire copies of ARTICLE with small edits
+REWRITES = [
+    ARTICLE.replace('밝혔다', '전했다'),
+    ARTICLE + ' 기자',
+    ARTICLE.replace(' ', '  \n'),
+]
+OTHER_ARTICLE = ' '.join(NO_PLACE_SENTENCES + FILLER_SENTENCES[:2])
+
+
+@pytest.mark.parametrize('threshold, num_perm', [(0.8, 128), (0.5, 128), (0.9, 64), (0.3, 7)])
+def test_lsh_params(threshold, num_perm):
+    bands, rows = _lsh_params(threshold, num_perm)
+    assert bands * rows == num_perm
+    assert (1 / bands) ** (1 / rows) <= threshold
+
+
+def test_lsh_params_below_every_option():
+    # No split reaches the threshold: fall back to one row per band
+    assert _lsh_params(0.01, 2) == (2, 1)
+
+
+def test_signature_similarity():
+    lsh = MinHashLSH()
+    signature = lsh.signature(ARTICLE)
+    lsh.insert('article', signature)
+    # Whitespace is normalized
+    assert lsh.query(lsh.signature(ARTICLE.replace(' ', ' \n '))) == ('article', 1.0)
+    key, similarity = lsh.query(lsh.signature(REWRITES[0]))
+    assert key == 'article' and 0.8 <= similarity < 1.0
+    assert lsh.query(lsh.signature(OTHER_ARTICLE)) == (None, 0.0)
+
+
+def test_duplicates_get_copies_of_the_representative_result():
+    dedup = NearDuplicateFilter()
+    items = [(0, ARTICLE), (1, REWRITES[0]), (2, OTHER_ARTICLE), (3, REWRITES[1])]
+    assert list(dedup.representatives(items)) == [(0, ARTICLE), (2, OTHER_ARTICLE)]
+
+    results = dedup.expand({'index': 0, 'original_text': ARTICLE, 'address': ['역삼동']})
+    assert results == [
+        {'index': 0, 'original_text': ARTICLE, 'address': ['역삼동'], 'duplicate_of': None},
+        {'index': 1, 'original_text': REWRITES[0], 'address': ['역삼동'], 'duplicate_of': 0},
+        {'index': 3, 'original_text': REWRITES[1], 'address': ['역삼동'], 'duplicate_of': 0},
+    ]
+    assert dedup.expand({'index': 2, 'original_text': OTHER_ARTICLE, 'address': []})[1:] == []
+    assert dedup.drain() == []
+
+    # A later chunk: the representative's result is already known
+    assert list(dedup.representatives([(4, REWRITES[2])])) == []
+    assert dedup.drain() == [{'index': 4, 'original_text': REWRITES[2], 'address': ['역삼동'], 'duplicate_of': 0}]
+    assert dedup.drain() == []
+    stats = dedup.stats()
+    assert (stats['seen'], stats['representatives'], stats['duplicates'], stats['duplicate_rate']) == (5, 2, 3, 0.6)
+
+
+def test_duplicates_of_a_failed_representative_are_unresolved():
+    dedup = NearDuplicateFilter()
+    items = [(0, ARTICLE), (1, REWRITES[0]), (2, REWRITES[1])]
+    assert list(dedup.representatives(items)) == [(0, ARTICLE)]
+    # The representative fails: expand() is never called for it
+    assert dedup.drain() == []
+    assert dedup.unresolved() == [(1, REWRITES[0]), (2, REWRITES[1])]
+    assert dedup.unresolved() == []
+
+
+@pytest.fixture(scope='module')
+def df_addr() -> pd.DataFrame:
+    df = pd.read_parquet(ADDRESS_PATH)
+    return df[df['lv0'].isin(['서울', '부산'])].reset_index(drop=True)
+
+
+def test_process_range_with_a_failed_representative(tmp_path, monkeypatch, df_addr):
+    corpus_path = str(tmp_path / 'corpus.parquet')
+    pd.DataFrame({'content': [ARTICLE, REWRITES[0], OTHER_ARTICLE, REWRITES[1]]}).to_parquet(corpus_path)
+    processor = build_fake_processor(df_addr)
+    process_text = processor.process_text
+    calls = []
+
+    def failing_first(text_content):
+        calls.append(text_content)
+        if len(calls) == 1:
+            raise RuntimeError('LLM timeout')
+        return process_text(text_content)
+
+    monkeypatch.setattr(processor, 'process_text', failing_first)
+    monkeypatch.setattr(run_address_processing, 'TEXT_PATH', corpus_path)
+    monkeypatch.setattr(run_address_processing, 'build_processor', lambda *args: processor)
+
+    checkpoint_dir = str(tmp_path / 'checkpoint')
+    written = run_address_processing.process_range(0, 4, 'fake', checkpoint_dir, 'w0', use_pipeline=False, dedup_threshold=0.8)
+    # 0 fails; 2 is processed; 1 and 3 are processed themselves, without copying one another
+    assert (written, len(calls)) == (3, 4)
+    merged = merge_checkpoint(checkpoint_dir, str(tmp_path / 'merged.parquet.gzip'))
+    assert merged['index'].tolist() == [1, 2, 3]
+    assert merged['duplicate_of'].isna().all()
+    assert merged.loc[merged['index'] != 2, 'matched_full_address_df'].tolist() == ['서울특별시 강남구 역삼동'] * 2
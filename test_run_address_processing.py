@@ -0,0 +1,55 @@
+import argparse
+
+import pandas as pd
+import pytest
+
+from run_address_processing import build_parser, merge_outputs, parse_shard, split_range
+
+
+def test_parse_shard():
+    assert parse_shard('0/1') == (0, 1)
+    assert parse_shard('3/4') == (3, 4)
+    for invalid in ['4/4', '-1/4', '0/0', '1', 'a/b']:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(invalid)
+
+
+@pytest.mark.parametrize('start, end, parts', [(0, 10, 3), (200, 300, 4), (5, 7, 4), (10, 10, 2), (10, 5, 2)])
+def test_split_range_covers_the_range_contiguously(start, end, parts):
+    ranges = split_range(start, end, parts)
+    assert len(ranges) == parts
+    assert [index for part_start, part_end in ranges for index in range(part_start, part_end)] == list(range(start, end))
+    sizes = [part_end - part_start for part_start, part_end in ranges]
+    assert max(sizes) - min(sizes) <= 1
+
+
+def test_shards_split_into_workers_cover_the_range():
+    # --shard i/N, then --workers W within each shard
+    covered = [
+        index
+        for shard_start, shard_end in split_range(0, 1001, 3)
+        for worker_start, worker_end in split_range(shard_start, shard_end, 4)
+        for index in range(worker_start, worker_end)
+    ]
+    assert covered == list(range(1001))
+
+
+def test_merge_outputs_last_input_wins(tmp_path):
+    paths = []
+    for shard, indices in enumerate([[4, 0, 2], [1, 2, 3]]):
+        path = str(tmp_path / f'shard_{shard}.parquet.gzip')
+        pd.DataFrame({'index': indices, 'shard': shard}).to_parquet(path)
+        paths.append(path)
+    merged = merge_outputs(paths, str(tmp_path / 'merged.parquet.gzip'))
+    assert merged['index'].tolist() == [0, 1, 2, 3, 4]
+    assert merged['shard'].tolist() == [0, 1, 1, 1, 0]
+    assert pd.read_parquet(tmp_path / 'merged.parquet.gzip').equals(merged)
+
+
+def test_parser():
+    args = build_parser().parse_args(['--start', '0', '--end', '-1', '--shard', '1/2', '--workers', '3', '--no-gazetteer'])
+    assert (args.start, args.end, args.shard, args.workers, args.no_gazetteer, args.command) == (0, -1, (1, 2), 3, True, None)
+    args = build_parser().parse_args(['merge', 'out.parquet', 'a.parquet', 'b.parquet'])
+    assert (args.command, args.output, args.inputs) == ('merge', 'out.parquet', ['a.parquet', 'b.parquet'])
+    args = build_parser().parse_args(['recall', 'tmp/full/'])
+    assert (args.command, args.labeled, args.prefiltered) == ('recall', 'tmp/full/', None)
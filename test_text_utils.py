@@ -0,0 +1,46 @@
+from text_utils import clean_text, extract_json, extract_json_array
+
+
+def test_clean_text_collapses_runs():
+    assert clean_text("  a   b\n\n\nc  ") == "a b\nc"
+
+
+def test_extract_json_skips_prose_and_fences():
+    assert extract_json('Answer:\n```json\n{"address": ["서울 강남구"], "note": "}{"}\n```') == {'address': ['서울 강남구'], 'note': '}{'}
+
+
+def test_extract_json_skips_values_nested_in_malformed_object():
+    assert extract_json('{"a": {"b": 1} "c": 2} {"ok": true}') == {'ok': True}
+
+
+def test_extract_json_array():
+    assert extract_json_array('```json\n[{"id": 0}, {"id": 1}]\n```') == [{'id': 0}, {'id': 1}]
+
+
+def test_extract_json_array_keeps_valid_records_of_malformed_array():
+    # Record 0 misses a comma; the nested address list must not be taken for the array
+    text = '[{"id": 0, "address": ["서울 강남구"], "who": "경찰" "when": ""}, {"id": 1, "address": ["부산 해운대구"]}]'
+    assert extract_json_array(text) == [{'id': 1, 'address': ['부산 해운대구']}]
+
+
+def test_extract_json_array_cut_off():
+    assert extract_json_array('[{"id": 0, "address": ["a"]}, {"id": 1, "addr') == [{'id': 0, 'address': ['a']}]
+
+
+def test_extract_json_array_nothing_found():
+    assert extract_json_array('no json here') is None
+
+
+def test_extract_json_skips_unclosed_brace():
+    assert extract_json('note {broken then {"address": "x"}') == {'address': 'x'}
+
+
+def test_extract_json_array_one_object_per_line():
+    # Objects holding lists must not be mistaken for the array
+    text = '{"id": 0, "address": ["서울 강남구"]}\n{"id": 1, "address": ["부산 해운대구"]}'
+    assert extract_json_array(text) == [{'id': 0, 'address': ['서울 강남구']}, {'id': 1, 'address': ['부산 해운대구']}]
+
+
+def test_extract_json_array_cut_off_record_with_list():
+    text = '[{"id": 0, "address": ["a"]}, {"id": 1, "address": ["b"], "who": "x'
+    assert extract_json_array(text) == [{'id': 0, 'address': ['a']}]
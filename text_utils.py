@@ -1,8 +1,20 @@
 import json
+import logging
 import os
-from typing import Any, Dict, List, Union
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 from datetime import datetime
 
+# --- Constants ---
+# Runs of spaces / newlines, each replaced by a single one. Two patterns with
+# literal replacements beat one alternation with a group template (r'\1\2').
+SPACE_RUN_PATTERN = re.compile(r'  +')
+NEWLINE_RUN_PATTERN = re.compile(r'\n\n+')
+JSON_VALUE_START_PATTERN = re.compile(r'[\[{]')
+JSON_CLOSE_CHARS = {'{': '}', '[': ']'}
+_JSON_DECODER = json.JSONDecoder()
+# --- End Constants ---
+
 def get_timestamp() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
@@ -66,15 +78,117 @@ def load_json_data(filepath: str) -> Union[Dict, List, None]:
 
 
 def clean_text(text: str) -> str:
-    flag = True
-    while flag:
-        flag_space = True if '  ' in text else False
-        flag_linefeed = True if '\n\n' in text else False
-        if flag_space or flag_linefeed:
-            if flag_space:
-                text = text.replace('  ', ' ')
-            if flag_linefeed:
-                text = text.replace('\n\n', '\n')
-        else:
-            flag = False
+    """
+    Collapses runs of spaces and of newlines and strips the ends. Each kind of
+    run is replaced in one regex pass, skipped when the text has none.
+    """
+    if '  ' in text:
+        text = SPACE_RUN_PATTERN.sub(' ', text)
+    if '\n\n' in text:
+        text = NEWLINE_RUN_PATTERN.sub('\n', text)
     return text.strip()
+
+
+def clean_many(texts: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """
+    clean_text over a batch of texts; None entries (missing articles) stay None.
+    """
+    return [None if text is None else clean_text(text) for text in texts]
+
+
+def _balanced_end(text: str, start: int, open_char: str, close_char: str) -> int:
+    """
+    Returns the position just past the open_char...close_char span starting at
+    start, or -1 if it is never closed. Brackets inside JSON strings are ignored.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return position + 1
+    return -1
+
+
+def iter_json_values(text: str) -> Iterator[Any]:
+    """
+    Scans text left to right and yields every top-level JSON object and array
+    that parses, e.g. inside an LLM answer with prose or markdown fences
+    around it. Each candidate is parsed by json's C decoder straight from its
+    opening bracket, so nested values and brackets inside strings are handled,
+    and the scan resumes past the end of each parsed value.
+
+    An object that fails to parse is skipped whole, so values nested in it are
+    never yielded. An array that fails to parse is searched for the objects
+    in it (the valid records of a batch answer with one malformed or cut-off
+    record), but not for nested arrays. An unclosed bracket is skipped.
+
+    Args:
+        text: Text to scan.
+
+    Yields:
+        Parsed top-level values, in order.
+    """
+    position = 0
+    broken_until = -1 # Arrays found before this position are nested in a broken value
+    while True:
+        match = JSON_VALUE_START_PATTERN.search(text, position)
+        if match is None:
+            return
+        start = match.start()
+        try:
+            value, position = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            open_char = match.group()
+            end = _balanced_end(text, start, open_char, JSON_CLOSE_CHARS[open_char])
+            if open_char == '[' or end == -1:
+                broken_until = max(broken_until, len(text) if end == -1 else end)
+                position = start + 1
+            else:
+                position = end
+            continue
+        if isinstance(value, list) and start < broken_until:
+            continue
+        yield value
+
+
+def extract_json(text: str) -> Optional[Dict]:
+    """
+    Returns the first JSON object found in text, or None if there is none.
+    """
+    for value in iter_json_values(text):
+        if isinstance(value, dict):
+            return value
+    logging.warning("No JSON object found in '%s...'", text[:100])
+    return None
+
+
+def extract_json_array(text: str) -> Optional[List]:
+    """
+    Returns the first top-level JSON array found in text; if there is none
+    (e.g. the array was cut off, or one of its records is malformed), the
+    top-level JSON objects instead, and None if there are neither.
+    """
+    records = []
+    for value in iter_json_values(text):
+        if isinstance(value, list):
+            return value
+        records.append(value)
+    if not records:
+        logging.warning("No JSON array or object found in '%s...'", text[:100])
+        return None
+    return records